@@ -1,8 +1,9 @@
 import pandas as pd
+import numpy as np
 from core.portfolio import Portfolio
 from core.position_manager import PositionManager
 from core.broker import Broker, Order
-from core.strategy import Strategy
+from core.strategy import Strategy, Signal, date_row_positions
 from core.datahub import Datahub
 from core.observer import Observer
 from core.timeline import Timeline
@@ -21,6 +22,7 @@ class BackTester:
             end_date: pd.Timestamp = None,
             benchmarks: list[str] = None,
             symbols: list[str] = None,
+            verbose: bool = False,
     ):
         """
         :param strategy: 任意符合 Strategy 接口的对象
@@ -30,6 +32,7 @@ class BackTester:
         :param broker: 负责撮合交易
         :param start_date: 回测开始日期，不填时读取所有时序数据
         :param end_date: 回测结束日期，不填时读取所有时序数据
+        :param verbose: 为True时逐日打印回测进度，默认关闭以免拖慢回测
         """
         self.strategy = strategy
         self.position_manager = position_manager
@@ -40,51 +43,83 @@ class BackTester:
         self.end_date = end_date
         self.benchmarks = benchmarks
         self.symbols = symbols
+        self.verbose = verbose
         self.observer = Observer(self.portfolio)
 
     def run_backtest_without_broker(self) -> Observer:
         # 运行回测
         start_time = time.time()  # 开始计时
         timeline = Timeline(bar_df=self.data.bar_df)
-        for dt in timeline.timeseries_iterator():
-            signals = self.strategy.generate_signals(dt)
+
+        # benchmark 收盘价在回测开始前一次性透视为 (trade_date × symbol) 宽表，循环内只做单行查询
+        benchmark_df = self.data.benchmark_df
+        if benchmark_df is not None and not benchmark_df.empty and "close" in benchmark_df.columns:
+            benchmark_close = self.data.get_pivot("close", benchmark=True)
+        else:
+            benchmark_close = pd.DataFrame()
+
+        # 每日净值与现金写入 observer 按时间轴长度预分配的缓冲区，收益等字段在回测结束后整列计算
+        main_timeline = timeline.get_main_timeline()
+        self.observer.reserve(len(main_timeline))
+
+        # 收盘价一次性透视为 (时间轴 × 标的) 矩阵，停牌日沿用最近一次收盘价；
+        # 循环内组合估值只取当日一行，按持仓标的逐列取价。
+        # 价格精度到分，float32 足够，矩阵内存减半；现金仍保持 float64
+        close_matrix = self.data.get_pivot("close").reindex(main_timeline).ffill().astype(np.float32)
+        # 循环内按行号取出当日价格向量（数组视图），按 symbol -> 列位置 直接取价，不逐日构造 Series
+        close_values = close_matrix.to_numpy()
+        close_codes = {symbol: j for j, symbol in enumerate(close_matrix.columns)}
+
+        # 支持一次性生成信号的策略先算出全部时间点的信号，循环内按日期取行
+        if self.strategy.supports_bulk:
+            signal_panel = self.strategy.generate_signals_bulk()
+            # 全量信号只校验一次结构；按日期取出的切片只含当日数据，不会有未来数据
+            Signal.validate_schema(signal_panel)
+            signal_rows = date_row_positions(signal_panel)
+
+        for i, dt in enumerate(main_timeline):
+            if self.strategy.supports_bulk:
+                signals = Signal.from_validated(signal_panel.iloc[signal_rows.get(dt, slice(0, 0))])
+            else:
+                signals = self.strategy.generate_signals(dt)
+            # 当日行情快照只切片一次
+            bars = self.data.get_bars(current_date=dt)
             orders = self.position_manager.transform_signals_to_orders(
                 signals=signals,
                 portfolio=self.portfolio,
                 data=self.data,
                 current_time=dt,
+                bars=bars,
             )
 
             # 这部分逻辑，如果后续有可能放到broker中
-            for index, row in orders.df.iterrows():
-                if row['side'] == 'BUY':
-                    buy_order_df = orders.df[(orders.df['side'] == 'BUY') & (orders.df['asset'] == row['asset'])]
-                    buy_order = Order(buy_order_df)
-                    self.portfolio.buy(buy_order)
-                elif row['side'] == 'SELL':
-                    sell_order_df = orders.df[(orders.df['side'] == 'SELL') & (orders.df['asset'] == row['asset'])]
-                    sell_order = Order(sell_order_df)
-                    self.portfolio.sell(sell_order)
-
-            total_val = round(self.portfolio.total_value(current_date=dt, data=self.data))
-            cash = round(self.portfolio.cash)
-            self.observer.record(dt, total_val, cash)
-
-            # 记录 benchmark 数据：利用 Datahub.get_bars 接口获取当日 benchmark 数据（仅提取收盘价）
-            benchmark_bars = self.data.get_bars(current_date=dt, benchmark=True)
-            if not benchmark_bars.empty:
-                # 如果返回的是 MultiIndex，则先重置索引
-                if isinstance(benchmark_bars.index, pd.MultiIndex):
-                    benchmark_bars = benchmark_bars.reset_index()
-                # 从数据中提取每个 benchmark 的收盘价（假设列名为 "close"）
-                if "close" in benchmark_bars.columns:
-                    # 假设数据中每个 benchmark 对应一行，可利用 groupby 防止重复
-                    benchmark_values = benchmark_bars.groupby("symbol")["close"].first().to_dict()
-                else:
-                    benchmark_values = {}
+            # 列只取一次转成 NumPy 数组，按 (side, asset) 派发，先卖后买以释放现金；
+            # asset 先编码为整数，逐标的筛选只比较整数编码而不是字符串
+            orders.log()
+            if len(orders) > 0:
+                side_codes = orders.side_codes()
+                asset_codes, _ = pd.factorize(orders.column('asset'))
+                for side_code in (Order.SELL_CODE, Order.BUY_CODE):
+                    side_mask = side_codes == side_code
+                    for asset_code in pd.unique(asset_codes[side_mask]):
+                        # orders 在生成时已校验过列，子订单直接按行位置从各列数组取出，无需重复校验
+                        sub_order = orders.take(np.flatnonzero(side_mask & (asset_codes == asset_code)))
+                        if side_code == Order.BUY_CODE:
+                            self.portfolio.buy(sub_order)
+                        else:
+                            self.portfolio.sell(sub_order)
+
+            total_value = self.portfolio.total_value(current_date=dt, data=self.data,
+                                                     prices=close_values[i], price_codes=close_codes)
+            self.observer.record(dt, round(total_value), round(self.portfolio.cash))
+
+            # 记录 benchmark 数据：从宽表中取当日各 benchmark 的收盘价，当日无数据的 benchmark 不记录
+            if dt in benchmark_close.index:
+                benchmark_values = benchmark_close.loc[dt].dropna().to_dict()
                 self.observer.record_benchmark(dt, benchmark_values)
 
-            print(f"当前日期:{dt}")
+            if self.verbose:
+                print(f"当前日期:{dt}")
 
         self.observer.calculate_metrics()
         self.observer.calculate_benchmark_metrics()
@@ -1,33 +1,137 @@
+import logging
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 
 class Order:
     """
-    Order 数据封装类，用于包装订单 DataFrame，并对数据结构进行验证
+    Order 数据封装类：订单按列保存为等长的一维数组（列名 -> 数组），读取 df 时才按需构造 DataFrame。
+    由 DataFrame 构造时对数据结构进行验证。
     """
-    REQUIRED_COLUMNS = {'date', 'asset', 'side', 'quantity', 'trade_price'}
+    REQUIRED_COLUMNS = frozenset({'date', 'asset', 'side', 'quantity', 'trade_price'})
+    # 可选列 side_code：side 的 int8 编码，便于按整数分支派发订单
+    BUY_CODE = 0
+    SELL_CODE = 1
 
     def __init__(self, df: pd.DataFrame):
         self._validate(df)
         self.df = df
-        self.__print_orders()
+
+    @classmethod
+    def from_validated(cls, df: pd.DataFrame) -> "Order":
+        """
+        跳过列校验直接包装，仅用于从已校验的 Order 中拆分出的子订单
+        """
+        order = cls.__new__(cls)
+        order.df = df
+        return order
+
+    @classmethod
+    def from_arrays(cls,
+                    date: np.ndarray,
+                    asset: np.ndarray,
+                    side: np.ndarray,
+                    quantity: np.ndarray,
+                    trade_price: np.ndarray,
+                    side_code: np.ndarray = None,
+                    ) -> "Order":
+        """
+        由等长的一维数组直接构造订单，不经过 DataFrame；数组按原样保存，不做复制
+        """
+        columns = {'date': date, 'asset': asset, 'side': side, 'quantity': quantity, 'trade_price': trade_price}
+        if side_code is not None:
+            columns['side_code'] = side_code
+        return cls._from_columns(columns)
+
+    @classmethod
+    def _from_columns(cls, columns: dict) -> "Order":
+        order = cls.__new__(cls)
+        order._df = None
+        order._columns = columns
+        return order
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        订单明细 DataFrame，列式订单在首次读取时构造
+        """
+        if self._df is None:
+            self._df = pd.DataFrame(self._columns, copy=False)
+        return self._df
+
+    @df.setter
+    def df(self, df: pd.DataFrame):
+        self._df = df
+        self._columns = None
 
     def _validate(self, df: pd.DataFrame):
-        missing_cols = self.REQUIRED_COLUMNS - set(df.columns)
-        if missing_cols:
+        if not self.REQUIRED_COLUMNS.issubset(df.columns):
+            missing_cols = set(self.REQUIRED_COLUMNS.difference(df.columns))
             raise ValueError(f"Order 数据缺少必需的列: {missing_cols}")
 
     def get(self):
         return self.df
 
-    def __print_orders(self):
-        if self.df.shape[0] > 0:
-            print(f"产生订单：{self.df}")
-        else:
-            pass
+    @property
+    def columns(self) -> list:
+        """
+        订单包含的列名
+        """
+        if self._columns is not None:
+            return list(self._columns)
+        return list(self._df.columns)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        返回指定列的一维数组，列式订单直接返回保存的数组，不构造 DataFrame
+        """
+        if self._columns is not None:
+            return self._columns[name]
+        return self._df[name].to_numpy()
+
+    def take(self, positions) -> "Order":
+        """
+        按行位置取出子订单，列式订单直接对各列数组取行；子订单不再重复校验
+        """
+        if self._columns is not None:
+            return self._from_columns({name: values[positions] for name, values in self._columns.items()})
+        return self.from_validated(self._df.iloc[positions])
+
+    @classmethod
+    def encode_sides(cls, sides) -> np.ndarray:
+        """
+        将 side 列编码为 int8：BUY=0，SELL=1，其他取值为 -1
+        """
+        sides = np.asarray(sides)
+        codes = np.full(sides.shape[0], -1, dtype=np.int8)
+        codes[sides == 'BUY'] = cls.BUY_CODE
+        codes[sides == 'SELL'] = cls.SELL_CODE
+        return codes
+
+    def side_codes(self) -> np.ndarray:
+        """
+        返回订单的 side 编码，订单中没有 side_code 列时按 side 列现场编码
+        """
+        if 'side_code' in self.columns:
+            return self.column('side_code')
+        return self.encode_sides(self.column('side'))
+
+    def log(self, level: int = logging.DEBUG):
+        """
+        以指定日志级别输出订单明细，级别未启用时不做任何格式化
+        """
+        if len(self) > 0 and logger.isEnabledFor(level):
+            logger.log(level, "产生订单：\n%s", self.df)
+
+    def __len__(self):
+        if self._columns is not None:
+            return len(self._columns['asset'])
+        return self._df.shape[0]
 
     def __repr__(self):
-        return f"<Order: {self.df.shape[0]} 条记录>"
+        return f"<Order: {len(self)} 条记录>"
 
 
 class Broker:
@@ -1,9 +1,172 @@
+import numpy as np
 import pandas as pd
 from typing import Dict, Any
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import copy
+import multiprocessing
+from collections import OrderedDict
+import glob
+import hashlib
+import json
 import os
 
 
+def _to_original_names(values: dict, col_mapping: dict) -> dict:
+    """
+    把以标准字段名为键的字典转换为以原始字段名为键，未出现在映射中的字段名保持不变。
+    :param col_mapping: 原始字段名 -> 标准字段名
+    """
+    original_names = {std: orig for orig, std in col_mapping.items()}
+    return {original_names.get(name, name): value for name, value in values.items()}
+
+
+def _read_parquet(path: str,
+                  col_mapping: dict,
+                  start_date: pd.Timestamp = None,
+                  end_date: pd.Timestamp = None,
+                  symbol_filter: list[str] = None
+                  ) -> pd.DataFrame:
+    """
+    读取单个 Parquet 文件，返回未经重命名的 DataFrame。
+    日期区间与 symbol 过滤会下推到 pyarrow 读取阶段，只读取满足条件的行组。
+    :param col_mapping: 原始字段名 -> 标准字段名
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("读取 Parquet 需要安装 pyarrow") from e
+
+    # 下推的过滤条件需使用文件中的原始字段名
+    original_names = {std: orig for orig, std in col_mapping.items()}
+    date_col = original_names.get('trade_date', 'trade_date')
+    symbol_col = original_names.get('symbol', 'symbol')
+
+    schema = pq.read_schema(path)
+    filters = []
+    # 只有日期列本身是时间戳类型时才能与 pd.Timestamp 比较，字符串日期交给读取后的过滤
+    if (start_date is not None and end_date is not None and date_col in schema.names
+            and pa.types.is_timestamp(schema.field(date_col).type)):
+        filters.append((date_col, '>=', start_date))
+        filters.append((date_col, '<=', end_date))
+    if symbol_filter and symbol_col in schema.names:
+        symbol_type = schema.field(symbol_col).type
+        if pa.types.is_string(symbol_type) or pa.types.is_large_string(symbol_type):
+            filters.append((symbol_col, 'in', list(symbol_filter)))
+
+    df = pq.read_table(path, filters=filters or None).to_pandas()
+    # 由 DataFrame.to_parquet 写出的文件可能带有索引，统一还原为普通列
+    if df.index.names != [None]:
+        df = df.reset_index()
+    return df
+
+
+def _expand_file_infos(file_infos: list[dict]) -> list[dict]:
+    """
+    展开 path 中的通配符（如按年拆分的 daily_*.csv），每个匹配文件生成一份配置，按文件名排序；
+    没有通配符或没有匹配文件时保持原样，由读取阶段给出文件不存在的警告。
+    """
+    expanded = []
+    for file_info in file_infos:
+        path = file_info.get('path')
+        matches = sorted(glob.glob(path)) if path and glob.has_magic(path) else []
+        if matches:
+            expanded.extend({**file_info, 'path': match} for match in matches)
+        else:
+            expanded.append(file_info)
+    return expanded
+
+
+def _is_sorted_by_date_symbol(df: pd.DataFrame) -> bool:
+    """
+    检查 trade_date、symbol 两列是否已按 (trade_date, symbol) 升序排列，只做相邻元素比较，不构造索引。
+    """
+    dates = df['trade_date'].to_numpy()
+    if len(dates) < 2:
+        return True
+    if not (dates[1:] >= dates[:-1]).all():
+        return False
+    same_date = dates[1:] == dates[:-1]
+    if not same_date.any():
+        return True
+    symbols = df['symbol'].to_numpy()
+    try:
+        return bool((symbols[1:][same_date] >= symbols[:-1][same_date]).all())
+    except TypeError:
+        # symbol 类型混杂无法比较时交给排序处理
+        return False
+
+
+def _downcast_columns(df: pd.DataFrame, exclude) -> pd.DataFrame:
+    """
+    降低数值列精度并把字符串列转为 category：float64 -> float32，object -> category。
+    需要累加的金额（如组合市值）在计算时自行提升回 float64，这里只负责存储。
+    :param exclude: 不做转换的列，如 dtypes 中显式指定的列以及即将进入索引的列
+    """
+    exclude = set(exclude)
+    conversions = {col: np.float32 for col in df.select_dtypes('float64').columns if col not in exclude}
+    conversions.update({col: 'category' for col in df.select_dtypes('object').columns if col not in exclude})
+    return df.astype(conversions) if conversions else df
+
+
+def _read_csv_arrow(path: str,
+                    col_mapping: dict,
+                    start_date: pd.Timestamp = None,
+                    end_date: pd.Timestamp = None,
+                    symbol_filter: list[str] = None,
+                    dtypes: dict = None
+                    ) -> pd.DataFrame:
+    """
+    用 pyarrow 的多线程 CSV 解析器读取单个文件，返回未经重命名的 DataFrame。
+    日期列在解析阶段转为时间戳，symbol 固定解析为字符串（保留代码前导零），
+    日期区间与 symbol 过滤在转换为 pandas 之前完成。
+    :param col_mapping: 原始字段名 -> 标准字段名
+    :param dtypes: 可选，原始字段名 -> 数据类型；能映射为 Arrow 类型的列在解析阶段直接按该类型读取，
+                   其余（如 category）在转换为 pandas 之后再 astype
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pa_csv
+    except ImportError as e:
+        raise ImportError("csv_engine='pyarrow' 需要安装 pyarrow") from e
+
+    original_names = {std: orig for orig, std in col_mapping.items()}
+    date_col = original_names.get('trade_date', 'trade_date')
+    symbol_col = original_names.get('symbol', 'symbol')
+
+    # 显式 schema：日期、symbol 以及可映射的 dtypes 不再走类型推断
+    column_types = {date_col: pa.timestamp('ns'), symbol_col: pa.string()}
+    remaining_dtypes = {}
+    for col, dtype in (dtypes or {}).items():
+        try:
+            column_types[col] = pa.from_numpy_dtype(np.dtype(dtype))
+        except (TypeError, pa.ArrowNotImplementedError):
+            remaining_dtypes[col] = dtype
+
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=64 << 20)
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        timestamp_parsers=[pa_csv.ISO8601, '%Y/%m/%d', '%Y%m%d'],
+    )
+    table = pa_csv.read_csv(path, read_options=read_options, convert_options=convert_options)
+
+    mask = None
+    if start_date is not None and end_date is not None and date_col in table.column_names:
+        dates = table[date_col]
+        mask = pc.and_(pc.greater_equal(dates, pa.scalar(start_date, type=pa.timestamp('ns'))),
+                       pc.less_equal(dates, pa.scalar(end_date, type=pa.timestamp('ns'))))
+    if symbol_filter and symbol_col in table.column_names:
+        symbol_mask = pc.is_in(table[symbol_col], value_set=pa.array(list(symbol_filter), type=pa.string()))
+        mask = symbol_mask if mask is None else pc.and_(mask, symbol_mask)
+    if mask is not None:
+        table = table.filter(mask)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    return df.astype(remaining_dtypes) if remaining_dtypes else df
+
+
 class Datahub(ABC):
     """
     读取数据，支持时序数据读取和非时序数据读取
@@ -14,6 +177,9 @@ class Datahub(ABC):
     可以根据需要重写底层“读取”逻辑来适配不同存储方式。
     """
 
+    # 按单日取快照的 LRU 缓存容量
+    BARS_CACHE_SIZE = 256
+
     def __init__(
         self,
         data_dict: Dict[str, Dict[str, Any]],
@@ -30,10 +196,13 @@ class Datahub(ABC):
                                      "ts_code": "symbol",
                                      "open_price": "open",
                                      # 其他字段映射……
-                                 }
+                                 },
+                                 # 可选，标准字段名 -> 数据类型，读取时直接按该类型解析
+                                 "dtypes": {"open": "float32"}
                              },
                              {
-                                 "path": "data/daily2.csv",
+                                 # LocalDataHub 支持通配符，按年拆分的文件可写为一条配置，每个匹配文件单独读取
+                                 "path": "data/daily_*.csv",
                                  "col_mapping": { ... }
                              },
                          ],
@@ -72,6 +241,18 @@ class Datahub(ABC):
         self.fundamental_df = None  # 用于存放财报数据
         self.info_df = None  # 用于存放元数据
 
+        # 交易日期 -> bar_df 行区间 (start, stop) 的缓存，bar_df 被重新赋值后自动失效
+        self._date_slices = None
+        self._date_slices_df = None
+        # bar_df 未按日期排序时的退路：交易日期 -> 当日快照，一次 groupby 构建，同样随 bar_df 失效
+        self._date_groups = None
+        self._date_groups_df = None
+        # 索引去重取值的缓存：'bar' / 'benchmark' -> (DataFrame, 交易日期, symbol)
+        self._level_values = {}
+        # 按单日取 bar_df 快照的 LRU 缓存：交易日期 -> 当日快照，最多保留 BARS_CACHE_SIZE 个，同样随 bar_df 失效
+        self._bars_cache = OrderedDict()
+        self._bars_cache_df = None
+
     @abstractmethod
     def load_bar_data(
             self,
@@ -112,17 +293,29 @@ class Datahub(ABC):
         """
         一键加载所有数据。
         这里不是抽象方法，因为基类可直接调用子类实现的抽象方法。
+        bar、info、fundamental 三类数据互不依赖，需要加载多类时用线程并行加载，
+        子类实现的各 load_* 方法只应写入各自的 DataFrame。
         """
         if ('bar' not in self.data_dict or
                 'daily' not in self.data_dict['bar'] or
                 'benchmark' not in self.data_dict['bar']):
             raise ValueError("data_dict must contain 'bar' with both 'daily' and 'benchmark' data.")
 
+        loaders = [partial(self.load_bar_data, start_date=start_date, end_date=end_date,
+                           symbols=symbols, benchmarks=benchmarks)]
         if 'info' in self.data_dict:
-            self.load_info_data()
+            loaders.append(self.load_info_data)
         if 'fundamental' in self.data_dict:
-            self.load_fundamental_data()
-        self.load_bar_data(start_date=start_date, end_date=end_date, symbols=symbols, benchmarks=benchmarks)
+            loaders.append(self.load_fundamental_data)
+
+        # 各类数据互不依赖、以文件读取为主，用线程并行加载；任一加载出错时异常照常抛出
+        if len(loaders) == 1:
+            loaders[0]()
+            return
+        with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+            futures = [executor.submit(loader) for loader in loaders]
+            for future in futures:
+                future.result()
 
     def get_data_by_date(self, current_date):
         """
@@ -133,10 +326,78 @@ class Datahub(ABC):
                 "Timeseries data not loaded. Call load_bar_data() first."
             )
 
-        try:
-            return self.bar_df.xs(current_date, level=0)
-        except KeyError:
-            return pd.DataFrame()
+        date_slices = self._get_date_slices()
+        if date_slices is not None:
+            bounds = date_slices.get(pd.Timestamp(current_date))
+            if bounds is None:
+                return pd.DataFrame()
+            return self.bar_df.iloc[bounds[0]:bounds[1]].droplevel(0)
+
+        snapshot = self._get_date_groups().get(pd.Timestamp(current_date))
+        return snapshot if snapshot is not None else pd.DataFrame()
+
+    def _get_date_groups(self) -> dict:
+        """
+        返回 交易日期 -> 当日快照 的映射，用于 bar_df 未按日期排序的情况，按需构建并缓存。
+        以内存换取 O(1) 的按日期访问，避免每次调用都在 MultiIndex 上做 xs。
+        """
+        if self._date_groups_df is not self.bar_df:
+            self._date_groups_df = self.bar_df
+            self._date_groups = {dt: group.droplevel(0)
+                                 for dt, group in self.bar_df.groupby(level=0, sort=False)}
+        return self._date_groups
+
+    def _get_date_slices(self) -> dict | None:
+        """
+        返回 交易日期 -> bar_df 行区间 (start, stop) 的映射，按需构建并缓存。
+        bar_df 按日期排序后，同一日期的行是连续的，按日期取快照只需一次字典查询加一次 iloc 切片。
+        :return: 映射字典；bar_df 未按日期排序时返回 None
+        """
+        if self._date_slices_df is not self.bar_df:
+            self._date_slices_df = self.bar_df
+            self._date_slices = None
+            dates = self.bar_df.index.get_level_values(0)
+            if len(dates) == 0:
+                self._date_slices = {}
+            elif dates.is_monotonic_increasing:
+                values = dates.values
+                boundaries = np.flatnonzero(values[1:] != values[:-1]) + 1
+                starts = np.r_[0, boundaries]
+                stops = np.r_[boundaries, len(values)]
+                self._date_slices = dict(zip(dates[starts], zip(starts.tolist(), stops.tolist())))
+        return self._date_slices
+
+    def get_trade_dates(self, benchmark: bool = False) -> pd.Index:
+        """
+        返回时序数据中出现过的全部交易日期（去重，保持出现顺序），计算一次后缓存。
+        :param benchmark: 如果为True则返回benchmark数据的交易日期
+        """
+        return self._get_level_values(benchmark)[0]
+
+    def get_symbols(self, benchmark: bool = False) -> pd.Index:
+        """
+        返回时序数据中出现过的全部 symbol（去重，保持出现顺序），计算一次后缓存。
+        :param benchmark: 如果为True则返回benchmark数据的 symbol
+        """
+        return self._get_level_values(benchmark)[1]
+
+    def _get_level_values(self, benchmark: bool = False) -> tuple[pd.Index, pd.Index]:
+        """
+        计算并缓存 (trade_date, symbol) 两层索引的去重取值，对应的 DataFrame 被重新赋值后自动失效。
+        不直接使用 MultiIndex.levels，是因为切片后的索引可能保留已不存在的取值。
+        """
+        key = 'benchmark' if benchmark else 'bar'
+        df = self.benchmark_df if benchmark else self.bar_df
+        if df is None:
+            raise ValueError("未加载时序数据，请先调用 load_bar_data()。")
+        cached = self._level_values.get(key)
+        if cached is None or cached[0] is not df:
+            if isinstance(df.index, pd.MultiIndex):
+                cached = (df, df.index.get_level_values(0).unique(), df.index.get_level_values(1).unique())
+            else:
+                cached = (df, pd.Index([]), pd.Index([]))
+            self._level_values[key] = cached
+        return cached[1], cached[2]
 
     def get_bars(self,
                  current_date: pd.Timestamp = None,
@@ -145,6 +406,7 @@ class Datahub(ABC):
                  symbol: str = None,
                  query: str = None,
                  benchmark: bool = False,
+                 symbols: list[str] = None,
         ) -> pd.DataFrame:
         """
         在特定日期区间，返回所有标的的行情数据快照(行索引= symbol)。
@@ -154,17 +416,32 @@ class Datahub(ABC):
         :param symbol: 标的的唯一标识
         :param query: 其他查询条件，预留参数
         :param benchmark: 如果为True则获取benchmark的数据
-        :return: 符合条件的行情数据
+        :param symbols: 多个标的的唯一标识，与 symbol 同时传入时以 symbol 为准
+        :return: 符合条件的行情数据。返回结果可能与 bar_df 共享内存，调用方不得就地修改，
+                 需要修改时请先自行 .copy()
         """
-        # 验证日期有效性
-        if current_date and not isinstance(current_date, pd.Timestamp):
-            raise ValueError("current_date must be a pd.Timestamp object.")
-        if start_date and not isinstance(start_date, pd.Timestamp):
-            raise ValueError("start_date must be a pd.Timestamp object.")
-        if end_date and not isinstance(end_date, pd.Timestamp):
-            raise ValueError("end_date must be a pd.Timestamp object.")
-        if start_date and end_date and start_date > end_date:
-            raise ValueError("start_date should not be later than end_date.")
+        # 回测循环内最常见的调用是只按单日取 bar_df 快照：校验 current_date 后直接按日期行区间切片
+        if (current_date is not None and not benchmark and query is None
+                and symbol is None and symbols is None):
+            if not isinstance(current_date, pd.Timestamp):
+                raise ValueError("current_date must be a pd.Timestamp object.")
+            if self._bars_cache_df is not self.bar_df:
+                self._bars_cache_df = self.bar_df
+                self._bars_cache = OrderedDict()
+            bars = self._bars_cache.get(current_date)
+            if bars is not None:
+                self._bars_cache.move_to_end(current_date)
+                return bars
+            date_slices = self._get_date_slices()
+            if date_slices is not None:
+                start, stop = date_slices.get(current_date, (0, 0))
+                bars = self.bar_df.iloc[start:stop]
+                self._bars_cache[current_date] = bars
+                if len(self._bars_cache) > self.BARS_CACHE_SIZE:
+                    self._bars_cache.popitem(last=False)
+                return bars
+
+        self._validate_dates(current_date, start_date, end_date)
 
         if benchmark:
             df = self.benchmark_df
@@ -174,53 +451,86 @@ class Datahub(ABC):
         if query:
             return df.query(query)
 
-        # 构造日期切片
-        if current_date:
-            date_slice = slice(current_date, current_date)
-        elif end_date:
-            date_slice = slice(None, end_date)
-        elif start_date:
-            date_slice = slice(start_date, None)
-        elif start_date and end_date:
-            date_slice = slice(start_date, end_date)
-        else:
-            date_slice = slice(None, None)
+        date_slice = self._date_slice(current_date, start_date, end_date)
+
+        if symbol:
+            symbols = [symbol]
 
         try:
-            if symbol:
-                # 索引顺序为 (trade_date, symbol)
-                return df.loc[date_slice].query(f'symbol == "{symbol}"').copy()
+            if symbols is not None:
+                # 索引顺序为 (trade_date, symbol)，直接在第二层索引上取值；
+                # 先剔除索引中不存在的 symbol，避免整个查询因 KeyError 返回空表
+                symbols = self.get_symbols(benchmark).intersection(symbols)
+                if symbols.empty:
+                    return df.iloc[:0]
+                return df.loc[(date_slice, symbols), :]
             else:
-                return df.loc[date_slice].copy()
+                return df.loc[date_slice]
         except KeyError:
             # 没有满足条件的数据时返回空DataFrame
             return pd.DataFrame()
 
-    def get_pivot(self, indicator: str) -> pd.DataFrame:
+    @staticmethod
+    def _validate_dates(current_date: pd.Timestamp = None,
+                        start_date: pd.Timestamp = None,
+                        end_date: pd.Timestamp = None):
+        """
+        验证日期参数有效性。
+        """
+        if current_date and not isinstance(current_date, pd.Timestamp):
+            raise ValueError("current_date must be a pd.Timestamp object.")
+        if start_date and not isinstance(start_date, pd.Timestamp):
+            raise ValueError("start_date must be a pd.Timestamp object.")
+        if end_date and not isinstance(end_date, pd.Timestamp):
+            raise ValueError("end_date must be a pd.Timestamp object.")
+        if start_date and end_date and start_date > end_date:
+            raise ValueError("start_date should not be later than end_date.")
+
+    @staticmethod
+    def _date_slice(current_date: pd.Timestamp = None,
+                    start_date: pd.Timestamp = None,
+                    end_date: pd.Timestamp = None) -> slice:
+        """
+        构造日期切片。
+        """
+        if current_date:
+            return slice(current_date, current_date)
+        elif end_date:
+            return slice(None, end_date)
+        elif start_date:
+            return slice(start_date, None)
+        elif start_date and end_date:
+            return slice(start_date, end_date)
+        else:
+            return slice(None, None)
+
+    def get_pivot(self, indicator: str, benchmark: bool = False) -> pd.DataFrame:
         """
         将 bar_df 按交易日期和标的代码透视，
         返回一个以 trade_date 为行索引、symbol 为列索引，
         指定指标的值作为数据的 DataFrame。主要用于相关性分析。
 
         :param indicator: 指定的指标字段名，如 'close', 'open' 等。
+        :param benchmark: 如果为True则透视benchmark的数据
         :return: 透视后的 DataFrame，行索引为交易日期，列索引为标的代码。
         """
-        if self.bar_df is None:
+        df = self.benchmark_df if benchmark else self.bar_df
+        if df is None:
             raise ValueError("未加载时序数据，请先调用 load_bar_data()。")
-        if indicator not in self.bar_df.columns:
+        if indicator not in df.columns:
             raise ValueError(f"指标 '{indicator}' 在 bar_df 中不存在。")
 
         # 如果 bar_df 的索引是 MultiIndex，假设第一层为 trade_date，第二层为 symbol
-        if isinstance(self.bar_df.index, pd.MultiIndex):
+        if isinstance(df.index, pd.MultiIndex):
             try:
-                pivot_df = self.bar_df[indicator].unstack(level=1)
+                pivot_df = df[indicator].unstack(level=1)
             except Exception as e:
                 raise ValueError("透视数据时出错，请检查 bar_df 的索引结构。") from e
         else:
             # 如果 bar_df 的索引不是 MultiIndex，则假定有 trade_date 和 symbol 两个字段
-            if "trade_date" not in self.bar_df.columns or "symbol" not in self.bar_df.columns:
+            if "trade_date" not in df.columns or "symbol" not in df.columns:
                 raise ValueError("bar_df 必须包含 'trade_date' 和 'symbol' 字段以便透视。")
-            pivot_df = self.bar_df.pivot(index="trade_date", columns="symbol", values=indicator)
+            pivot_df = df.pivot(index="trade_date", columns="symbol", values=indicator)
 
         return pivot_df
 
@@ -235,6 +545,112 @@ class LocalDataHub(Datahub):
     否则会报错。
     """
 
+    # 分块读取 CSV 时每块的行数
+    chunksize = 1_000_000
+
+    def __init__(self,
+                 data_dict: Dict[str, Dict[str, Any]],
+                 parquet_cache: bool = False,
+                 max_workers: int = 1,
+                 csv_engine: str = 'pandas',
+                 downcast: bool = False,
+                 feather_cache_dir: str = None,
+                 ):
+        """
+        :param data_dict: 数据字典，结构见 Datahub
+        :param parquet_cache: 为True时，首次读取 CSV 后在同目录写出按 (日期, symbol) 排序的 <path>.parquet 缓存，
+               之后只要缓存不比 CSV 旧就直接读缓存，并把日期区间、symbol 过滤下推到读取阶段。
+               bar 与 info 数据均生效。
+               需要安装 pyarrow
+        :param max_workers: 读取多个文件时的并行进程数，默认 1 为串行；None 时取 CPU 核数
+                            子进程以 spawn 方式启动，调用脚本的入口需放在 if __name__ == '__main__' 下
+        :param csv_engine: CSV 解析器，'pandas'（默认，分块读取）或 'pyarrow'（多线程解析，需要安装 pyarrow）
+        :param downcast: 为True时把未在 dtypes 中指定类型的 float64 列降为 float32，内存与扫描带宽减半，
+               字符串列（如行业、名称）转为 category；bar 与 info 数据均生效。
+               float32 约 7 位有效数字，对价格数据足够，但成交额等大数值会损失精度
+        :param feather_cache_dir: 不为空时，把加载完成的 bar_df / benchmark_df 以未压缩的 Feather 文件缓存到该目录，
+               以数据配置和加载参数为键；之后只要缓存不比源文件旧，就以内存映射方式直接读取缓存。
+               需要安装 pyarrow
+        """
+        super().__init__(data_dict)
+        if csv_engine not in ('pandas', 'pyarrow'):
+            raise ValueError(f"不支持的 csv_engine: {csv_engine}")
+        self.parquet_cache = parquet_cache
+        self.max_workers = max_workers
+        self.csv_engine = csv_engine
+        self.downcast = downcast
+        self.feather_cache_dir = feather_cache_dir
+
+    def _ensure_parquet(self, path: str, col_mapping: dict) -> str:
+        """
+        确保 CSV 对应的 Parquet 缓存存在且不旧于 CSV，返回缓存路径。
+        缓存保留原始字段名，仅把日期列解析为时间戳，以便下推日期过滤；
+        写出前按 (日期, symbol) 排好序，读取后无需再排序，行组的日期统计也更紧凑，下推过滤能跳过更多行组。
+        :param col_mapping: 原始字段名 -> 标准字段名
+        """
+        cache_path = f"{path}.parquet"
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+            return cache_path
+
+        df = pd.read_csv(path)
+        original_names = {std: orig for orig, std in col_mapping.items()}
+        date_col = original_names.get('trade_date', 'trade_date')
+        symbol_col = original_names.get('symbol', 'symbol')
+        if date_col in df.columns:
+            df[date_col] = pd.to_datetime(df[date_col])
+        sort_cols = [col for col in (date_col, symbol_col) if col in df.columns]
+        if sort_cols:
+            df = df.sort_values(sort_cols, kind='stable', ignore_index=True)
+        df.to_parquet(cache_path, index=False, compression='zstd')
+        return cache_path
+
+    def _read_file(self,
+                   path: str,
+                   col_mapping: dict,
+                   start_date: pd.Timestamp = None,
+                   end_date: pd.Timestamp = None,
+                   symbol_filter: list[str] = None,
+                   dtypes: dict = None
+                   ) -> pd.DataFrame:
+        """
+        读取单个原始文件，返回未经重命名的 DataFrame。
+        子类可重写以适配其他存储格式，并可选择把日期区间、symbol 过滤下推到读取阶段；
+        _load_csv_file 在读取之后仍会再过滤一次，因此这里只过滤部分条件也是安全的。
+        :param col_mapping: 原始字段名 -> 标准字段名
+        :param dtypes: 可选，标准字段名 -> 数据类型，读取时直接按该类型解析
+        """
+        original_dtypes = _to_original_names(dtypes or {}, col_mapping)
+        if self.parquet_cache:
+            cache_path = self._ensure_parquet(path, col_mapping)
+            df = _read_parquet(cache_path, col_mapping, start_date, end_date, symbol_filter)
+            return df.astype(original_dtypes) if original_dtypes else df
+        if self.csv_engine == 'pyarrow':
+            return _read_csv_arrow(path, col_mapping, start_date, end_date, symbol_filter, original_dtypes)
+
+        # 日期列在解析阶段直接转为时间戳，避免读成字符串后再二次解析
+        original_names = {std: orig for orig, std in col_mapping.items()}
+        date_col = original_names.get('trade_date', 'trade_date')
+        symbol_col = original_names.get('symbol', 'symbol')
+        header = pd.read_csv(path, nrows=0).columns
+        reader = pd.read_csv(path,
+                             dtype=original_dtypes or None,
+                             parse_dates=[date_col] if date_col in header else None,
+                             low_memory=False,
+                             chunksize=self.chunksize)
+
+        # 分块读取，每块先按日期区间、symbol 过滤再保留，峰值内存只与块大小和命中行数相关
+        chunks = []
+        for chunk in reader:
+            if (start_date is not None and end_date is not None and date_col in chunk.columns
+                    and pd.api.types.is_datetime64_any_dtype(chunk[date_col])):
+                chunk = chunk[(chunk[date_col] >= start_date) & (chunk[date_col] <= end_date)]
+            if symbol_filter and symbol_col in chunk.columns:
+                chunk = chunk[chunk[symbol_col].isin(symbol_filter)]
+            chunks.append(chunk)
+        if not chunks:
+            return pd.DataFrame(columns=header)
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
     def _load_csv_file(self,
                        file_info: dict,
                        start_date: pd.Timestamp = None,
@@ -254,14 +670,21 @@ class LocalDataHub(Datahub):
             print(f"[WARN] 文件不存在: {path}")
             return pd.DataFrame()
 
-        # 构造映射：原始字段名 -> 标准字段名
-        mapping = {std: orig for std, orig in file_info.get('col_mapping', {}).items()}
-        df = pd.read_csv(path)
-        df.rename(columns=mapping, inplace=True)
+        # 映射：原始字段名 -> 标准字段名，配置本身就是这个方向，直接使用
+        mapping = file_info.get('col_mapping') or {}
+        dtypes = file_info.get('dtypes')
+        if apply_date_filter:
+            df = self._read_file(path, mapping, start_date, end_date, symbol_filter, dtypes=dtypes)
+        else:
+            df = self._read_file(path, mapping, symbol_filter=symbol_filter, dtypes=dtypes)
+        if mapping:
+            df.rename(columns=mapping, inplace=True)
 
         if 'trade_date' not in df.columns:
             raise ValueError(f"文件 {path} 缺失 'trade_date' 字段")
-        df['trade_date'] = pd.to_datetime(df['trade_date'])
+        # 读取阶段已解析为时间戳时无需再转换
+        if not pd.api.types.is_datetime64_any_dtype(df['trade_date']):
+            df['trade_date'] = pd.to_datetime(df['trade_date'])
 
         if apply_date_filter and start_date is not None and end_date is not None:
             df = df[(df['trade_date'] >= start_date) & (df['trade_date'] <= end_date)]
@@ -272,8 +695,15 @@ class LocalDataHub(Datahub):
         # 根据 symbol_filter 过滤数据（如果传入了非空列表，则只保留指定 symbol 的数据）
         if symbol_filter:
             df = df[df['symbol'].isin(symbol_filter)]
+
+        # symbol 进入 MultiIndex 后本身就以 (编码, 取值) 存储，无需转为 category
+        if self.downcast:
+            df = _downcast_columns(df, exclude=[*(dtypes or {}), 'trade_date', 'symbol'])
+        # 文件（包括排好序写出的 parquet 缓存）通常已按日期、symbol 有序，已有序时跳过排序；
+        # 无序时在建索引之前按列做一次稳定排序，比在无序的 MultiIndex 上 sort_index 更省
+        if not _is_sorted_by_date_symbol(df):
+            df = df.sort_values(['trade_date', 'symbol'], kind='mergesort')
         df.set_index(['trade_date', 'symbol'], inplace=True)
-        df.sort_index(inplace=True)
         return df
 
     def load_bar_data(self,
@@ -286,34 +716,120 @@ class LocalDataHub(Datahub):
         加载 daily 与 benchmark 数据，daily 数据可根据 start_date 与 end_date 进行过滤，
         benchmark 数据保持全量。
         """
+        daily_files = _expand_file_infos(self.data_dict['bar']['daily'])
+        benchmark_files = _expand_file_infos(self.data_dict['bar']['benchmark'])
+
+        cache_paths = None
+        if self.feather_cache_dir:
+            cache_paths = self._feather_cache_paths(start_date, end_date, benchmarks, symbols)
+            source_paths = [file_info['path'] for file_info in daily_files + benchmark_files]
+            if self._feather_cache_valid(cache_paths, source_paths):
+                self.bar_df, self.benchmark_df = (self._read_feather(path) for path in cache_paths)
+                return
+
+        tasks = [(file_info, symbols) for file_info in daily_files]
+        tasks += [(file_info, benchmarks) for file_info in benchmark_files]
+        dfs = self._load_files(tasks, start_date=start_date, end_date=end_date)
+
         # 读取 daily 数据
-        daily_files = self.data_dict['bar']['daily']
-        daily_dfs = []
-        for file_info in daily_files:
-            df = self._load_csv_file(file_info,
-                                     start_date=start_date,
-                                     end_date=end_date,
-                                     apply_date_filter=True,
-                                     symbol_filter=symbols
-                                     )
-            if not df.empty:
-                daily_dfs.append(df)
-        self.bar_df = pd.concat(daily_dfs) if daily_dfs else pd.DataFrame()
-
-        # 读取 benchmark 数据（不做日期过滤）
-        benchmark_files = self.data_dict['bar']['benchmark']
-        benchmark_dfs = []
-        for file_info in benchmark_files:
-            df = self._load_csv_file(
-                file_info,
-                start_date=start_date,
-                end_date=end_date,
-                apply_date_filter=True,
-                symbol_filter=benchmarks
-            )
-            if not df.empty:
-                benchmark_dfs.append(df)
-        self.benchmark_df = pd.concat(benchmark_dfs) if benchmark_dfs else pd.DataFrame()
+        daily_dfs = [df for df in dfs[:len(daily_files)] if not df.empty]
+        self.bar_df = self._concat_sorted(daily_dfs)
+
+        # 读取 benchmark 数据
+        benchmark_dfs = [df for df in dfs[len(daily_files):] if not df.empty]
+        self.benchmark_df = self._concat_sorted(benchmark_dfs)
+
+        # 空表没有 (trade_date, symbol) 索引，不写缓存
+        if cache_paths is not None and not self.bar_df.empty and not self.benchmark_df.empty:
+            import pyarrow.feather as feather
+            os.makedirs(self.feather_cache_dir, exist_ok=True)
+            for df, path in zip((self.bar_df, self.benchmark_df), cache_paths):
+                feather.write_feather(df.reset_index(), path, compression='uncompressed')
+
+    def _feather_cache_paths(self,
+                             start_date: pd.Timestamp = None,
+                             end_date: pd.Timestamp = None,
+                             benchmarks: list[str] = None,
+                             symbols: list[str] = None
+                             ) -> tuple[str, str]:
+        """
+        按数据配置、加载参数及影响结果的读取选项计算缓存键，返回 (daily, benchmark) 两个缓存文件路径。
+        """
+        key = json.dumps({
+            'bar': self.data_dict['bar'],
+            'start_date': start_date,
+            'end_date': end_date,
+            'benchmarks': benchmarks,
+            'symbols': symbols,
+            'csv_engine': self.csv_engine,
+            'downcast': self.downcast,
+        }, sort_keys=True, default=str)
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return (os.path.join(self.feather_cache_dir, f"{digest}_daily.feather"),
+                os.path.join(self.feather_cache_dir, f"{digest}_benchmark.feather"))
+
+    @staticmethod
+    def _feather_cache_valid(cache_paths: tuple[str, str], source_paths: list[str]) -> bool:
+        """
+        缓存文件都存在且不比任何源文件旧时才有效。
+        """
+        if not all(os.path.exists(path) for path in cache_paths):
+            return False
+        cache_mtime = min(os.path.getmtime(path) for path in cache_paths)
+        return all(os.path.getmtime(path) <= cache_mtime for path in source_paths if os.path.exists(path))
+
+    @staticmethod
+    def _read_feather(path: str) -> pd.DataFrame:
+        """
+        以内存映射方式读取 Feather 缓存，并还原 (trade_date, symbol) 索引。
+        """
+        import pyarrow.feather as feather
+        df = feather.read_table(path, memory_map=True).to_pandas()
+        return df.set_index(['trade_date', 'symbol'])
+
+    @staticmethod
+    def _concat_sorted(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+        """
+        合并各文件的数据，保证结果按 (trade_date, symbol) 有序。
+        各文件已各自有序，按年拆分的文件首尾相接时合并结果同样有序，此时不再排序。
+        """
+        if not dfs:
+            return pd.DataFrame()
+        # 各文件读取后已是带 MultiIndex 的 pandas 表，直接 pd.concat 拼接索引，
+        # 比先转成 Arrow 表合并再整体转回 pandas 并重建索引更快
+        df = dfs[0] if len(dfs) == 1 else pd.concat(dfs, copy=False)
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        return df
+
+    def _load_files(self,
+                    tasks: list[tuple[dict, list[str]]],
+                    start_date: pd.Timestamp = None,
+                    end_date: pd.Timestamp = None
+                    ) -> list[pd.DataFrame]:
+        """
+        读取多个文件，max_workers 不为 1 且文件多于一个时用多进程并行读取。
+        :param tasks: (file_info, symbol_filter) 列表
+        :return: 与 tasks 顺序一致的 DataFrame 列表
+        """
+        kwargs = dict(start_date=start_date, end_date=end_date, apply_date_filter=True)
+        if self.max_workers == 1 or len(tasks) <= 1:
+            return [self._load_csv_file(file_info, symbol_filter=symbol_filter, **kwargs)
+                    for file_info, symbol_filter in tasks]
+
+        # 子进程只需要读取配置，去掉已加载的数据，避免把大表序列化到每个进程
+        loader = copy.copy(self)
+        loader.bar_df = loader.benchmark_df = loader.fundamental_df = loader.info_df = None
+        loader._date_slices = loader._date_slices_df = None
+        loader._date_groups = loader._date_groups_df = None
+        loader._bars_cache, loader._bars_cache_df = OrderedDict(), None
+        loader._level_values = {}
+        # 用 spawn 启动子进程：父进程跑过 numba 并行内核后已有线程池，fork 出的子进程会导致进程退出时卡住
+        spawn = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=spawn) as executor:
+            futures = [executor.submit(loader._load_csv_file, file_info, symbol_filter=symbol_filter, **kwargs)
+                       for file_info, symbol_filter in tasks]
+            return [future.result() for future in futures]
 
     def load_fundamental_data(self):
         pass
@@ -322,14 +838,43 @@ class LocalDataHub(Datahub):
         path = self.data_dict['info']['path']
         if not os.path.exists(path):
             print(f"[WARN] file not found: {path}")
-            self.bar_df = pd.DataFrame()
+            # 与 bar 数据并行加载，这里不能改动 bar_df，info_df 保持未加载状态
             return
 
         # 命名标准化
-        mapping = {key: value for key, value in self.data_dict['info']['col_mapping'].items()}
-        df = pd.read_csv(path)
+        mapping = self.data_dict['info'].get('col_mapping') or {}
+        dtypes = _to_original_names(self.data_dict['info'].get('dtypes', {}), mapping)
+        if self.parquet_cache:
+            df = pd.read_parquet(self._ensure_parquet(path, mapping))
+            if dtypes:
+                df = df.astype(dtypes)
+        else:
+            df = pd.read_csv(path, dtype=dtypes or None)
         df.rename(columns=mapping, inplace=True)
+        if self.downcast:
+            info_dtypes = self.data_dict['info'].get('dtypes', {})
+            df = _downcast_columns(df, exclude=[*info_dtypes, 'symbol'])
 
         df.set_index(['symbol'], inplace=True)
         df.sort_index(inplace=True, ascending=True)
         self.info_df = df
+
+
+class ParquetDataHub(LocalDataHub):
+    """
+    从 Parquet 列式文件加载数据，data_dict 结构与 LocalDataHub 相同，path 指向 .parquet 文件。
+    日期区间与 symbol 过滤会下推到 pyarrow 读取阶段，只读取满足条件的行组，
+    省去 CSV 的全量解析。需要安装 pyarrow。
+    """
+
+    def _read_file(self,
+                   path: str,
+                   col_mapping: dict,
+                   start_date: pd.Timestamp = None,
+                   end_date: pd.Timestamp = None,
+                   symbol_filter: list[str] = None,
+                   dtypes: dict = None
+                   ) -> pd.DataFrame:
+        df = _read_parquet(path, col_mapping, start_date, end_date, symbol_filter)
+        original_dtypes = _to_original_names(dtypes or {}, col_mapping)
+        return df.astype(original_dtypes) if original_dtypes else df
@@ -0,0 +1,168 @@
+import numpy as np
+from utils.jit import njit
+
+
+@njit(cache=True)
+def settle_cash(cash: float, costs: np.ndarray) -> tuple[float, int]:
+    """
+    按订单顺序逐笔扣减现金。
+    :param cash: 当前现金
+    :param costs: 每笔订单的成交金额，float64 数组
+    :return: (扣减后的现金, 第一笔现金不足订单的位置)，全部足够时位置为 -1，
+             此时返回的现金为该笔订单之前已扣减后的余额
+    """
+    for i in range(costs.shape[0]):
+        if cash < costs[i]:
+            return cash, i
+        cash -= costs[i]
+    return cash, -1
+
+
+@njit(cache=True)
+def max_drawdown(values: np.ndarray) -> tuple[float, int, int]:
+    """
+    单次遍历计算序列的最大回撤，回撤定义为 (此前最高值 - 当前值) / 此前最高值。
+    :param values: 资产价值序列，float64 数组，NaN 会被跳过
+    :return: (最大回撤, 对应高点位置, 对应低点位置)；没有有效数据时为 (nan, -1, -1)
+    """
+    max_dd = 0.0
+    peak = 0.0
+    peak_idx = -1
+    best_peak_idx = -1
+    best_trough_idx = -1
+    for i in range(values.shape[0]):
+        value = values[i]
+        if np.isnan(value):
+            continue
+        if peak_idx < 0 or value > peak:
+            peak = value
+            peak_idx = i
+        dd = (peak - value) / peak
+        if best_trough_idx < 0 or dd > max_dd:
+            max_dd = dd
+            best_peak_idx = peak_idx
+            best_trough_idx = i
+    if best_trough_idx < 0:
+        return np.nan, -1, -1
+    return max_dd, best_peak_idx, best_trough_idx
+
+
+@njit(cache=True)
+def interval_max_drawdowns(values: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    一次遍历计算多列序列在各区间内的最大回撤，区间之间互不影响（每个区间重新记录高点）。
+    :param values: 资产价值矩阵，float64，形状 (时间, 列)，NaN 会被跳过
+    :param starts: 各区间起始行位置，int64 数组
+    :param stops: 各区间结束行位置（不含），int64 数组
+    :return: 形状 (区间, 列) 的最大回撤矩阵；区间内没有数据行时为 0，只有 NaN 时为 nan
+    """
+    n_intervals = starts.shape[0]
+    n_cols = values.shape[1]
+    result = np.zeros((n_intervals, n_cols))
+    for j in range(n_cols):
+        for k in range(n_intervals):
+            if stops[k] <= starts[k]:
+                continue
+            max_dd = np.nan
+            peak = np.nan
+            for i in range(starts[k], stops[k]):
+                value = values[i, j]
+                if np.isnan(value):
+                    continue
+                if np.isnan(peak) or value > peak:
+                    peak = value
+                dd = (peak - value) / peak
+                if np.isnan(max_dd) or dd > max_dd:
+                    max_dd = dd
+            result[k, j] = max_dd
+    return result
+
+
+@njit(cache=True)
+def record_returns(total_values: np.ndarray, previous_value: float,
+                   inv_initial_value: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    单次遍历计算一段连续时间步的收益、收益率（百分比）与相对收益。
+    :param total_values: 组合总价值序列，float64 数组
+    :param previous_value: 序列首个时间步之前的总价值
+    :param inv_initial_value: 初始净值的倒数
+    :return: (returns, returns_pct, relative_return)；前一时间步总价值为 0 时收益率记为 0
+    """
+    n = total_values.shape[0]
+    returns = np.empty(n)
+    returns_pct = np.empty(n)
+    relative = np.empty(n)
+    prev = previous_value
+    for i in range(n):
+        value = total_values[i]
+        r = value - prev
+        returns[i] = r
+        returns_pct[i] = (r / prev) * 100.0 if prev != 0.0 else 0.0
+        relative[i] = value * inv_initial_value
+        prev = value
+    return returns, returns_pct, relative
+
+
+@njit(cache=True)
+def apply_buys(qty: np.ndarray, cost: np.ndarray, cur: np.ndarray,
+               slots: np.ndarray, quantities: np.ndarray, prices: np.ndarray) -> None:
+    """
+    按订单顺序把买入成交就地累加到持仓数组：持仓为 0 的槽位以成交价建仓，否则按加权平均更新成本价，
+    当前价格同步为新的成本价。
+    :param qty: 各槽位持仓数量，int64 数组
+    :param cost: 各槽位成本价，float64 数组
+    :param cur: 各槽位当前价格，float64 数组
+    :param slots: 每笔成交对应的槽位，int64 数组
+    :param quantities: 每笔成交数量，int64 数组
+    :param prices: 每笔成交价格，float64 数组
+    """
+    for k in range(slots.shape[0]):
+        i = slots[k]
+        old_quantity = qty[i]
+        if old_quantity == 0:
+            new_cost = prices[k]
+        else:
+            new_cost = (old_quantity * cost[i] + quantities[k] * prices[k]) / (old_quantity + quantities[k])
+        qty[i] = old_quantity + quantities[k]
+        cost[i] = new_cost
+        cur[i] = new_cost
+
+
+@njit(cache=True)
+def apply_sells(cash: float, qty: np.ndarray, cur: np.ndarray,
+                slots: np.ndarray, quantities: np.ndarray, prices: np.ndarray) -> tuple[float, int]:
+    """
+    按订单顺序把卖出成交就地扣减持仓并累加现金；未清仓的槽位当前价格更新为成交价。
+    :param cash: 当前现金
+    :param qty: 各槽位持仓数量，int64 数组
+    :param cur: 各槽位当前价格，float64 数组
+    :param slots: 每笔成交对应的槽位，不在持仓中时为 -1，int64 数组
+    :param quantities: 每笔成交数量，int64 数组
+    :param prices: 每笔成交价格，float64 数组
+    :return: (卖出后的现金, 第一笔无法成交的位置)，全部成交时位置为 -1；
+             出错时此前的成交已经生效
+    """
+    for k in range(slots.shape[0]):
+        i = slots[k]
+        if i < 0 or quantities[k] > qty[i]:
+            return cash, k
+        cash += quantities[k] * prices[k]
+        qty[i] -= quantities[k]
+        if qty[i] != 0:
+            cur[i] = prices[k]
+    return cash, -1
+
+
+# 保留 JIT 版本供 core.kernels_aot 导出；若已预编译出扩展模块，优先使用以跳过 JIT 编译
+_settle_cash_jit = settle_cash
+_max_drawdown_jit = max_drawdown
+_interval_max_drawdowns_jit = interval_max_drawdowns
+_record_returns_jit = record_returns
+_apply_buys_jit = apply_buys
+_apply_sells_jit = apply_sells
+try:
+    from core.core_kernels import (  # noqa: F811
+        settle_cash, max_drawdown, interval_max_drawdowns, record_returns, apply_buys, apply_sells
+    )
+except ImportError:
+    pass
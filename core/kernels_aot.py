@@ -0,0 +1,63 @@
+"""
+core.kernels 及 utils.technical_process 中均线内核的 AOT 编译入口。
+在仓库根目录执行 python -m core.kernels_aot，会在 core/ 下生成 core_kernels 扩展模块；
+两个模块导入时优先加载该扩展模块，免去首次调用的 JIT 编译开销。
+需要安装 numba 及 C 编译器，扩展模块缺失时自动回退到 @njit 版本。
+
+注意：numba.pycc 已被 numba 标记为弃用并计划移除，这里只作为可选的构建工具，
+且只在 build_cc() 内部导入，导入本模块本身不依赖 pycc。@njit 版本才是受支持的路径，
+没有 core_kernels 扩展模块时一切功能照常可用。
+"""
+
+import os
+
+from core import kernels
+from utils import technical_process
+
+
+def _py_func(func):
+    """
+    取出 @njit 内核的 Python 源函数，保证 AOT 与 JIT 两个版本逻辑一致
+    """
+    return getattr(func, 'py_func', func)
+
+
+def build_cc(output_dir: str = None):
+    """
+    构造导出了全部内核的 numba.pycc.CC 对象，调用其 compile() 即生成 core_kernels 扩展模块。
+    :param output_dir: 扩展模块的输出目录，默认 core/
+    :return: numba.pycc.CC
+    """
+    from numba.pycc import CC
+
+    cc = CC('core_kernels')
+    cc.output_dir = output_dir or os.path.dirname(os.path.abspath(__file__))
+
+    cc.export('settle_cash', 'Tuple((f8, i8))(f8, f8[:])')(_py_func(kernels._settle_cash_jit))
+    cc.export('max_drawdown', 'Tuple((f8, i8, i8))(f8[:])')(_py_func(kernels._max_drawdown_jit))
+    cc.export('interval_max_drawdowns', 'f8[:, :](f8[:, :], i8[:], i8[:])')(
+        _py_func(kernels._interval_max_drawdowns_jit)
+    )
+    cc.export('record_returns', 'Tuple((f8[:], f8[:], f8[:]))(f8[:], f8, f8)')(
+        _py_func(kernels._record_returns_jit)
+    )
+    cc.export('apply_buys', 'void(i8[:], f8[:], f8[:], i8[:], i8[:], f8[:])')(_py_func(kernels._apply_buys_jit))
+    cc.export('apply_sells', 'Tuple((f8, i8))(f8, i8[:], f8[:], i8[:], i8[:], f8[:])')(
+        _py_func(kernels._apply_sells_jit)
+    )
+
+    # 均线内核按输入精度分别导出；AOT 不支持 parallel，导出版本按标的逐段串行计算
+    ma_bias_signal = _py_func(technical_process._ma_bias_signal_kernel_jit)
+    cc.export('ma_bias_signal_kernel_f4',
+              'Tuple((f4[:], f4[:], f4[:], f4[:], i1[:]))(f4[:], i8[:], i8, i8, f8, f8)')(ma_bias_signal)
+    cc.export('ma_bias_signal_kernel_f8',
+              'Tuple((f8[:], f8[:], f8[:], f8[:], i1[:]))(f8[:], i8[:], i8, i8, f8, f8)')(ma_bias_signal)
+    return cc
+
+
+def main():
+    build_cc().compile()
+
+
+if __name__ == '__main__':
+    main()
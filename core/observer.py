@@ -1,9 +1,10 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from core.portfolio import Portfolio
-import plotly.express as px
 import plotly.graph_objects as go
-from utils.indicators import win_rate, annual_return, annual_volatility, drawdown
+from core.kernels import interval_max_drawdowns, record_returns
+from utils.indicators import win_rate, annual_return, annual_volatility, drawdown, drawdown_intervals
 
 
 class Observer:
@@ -14,21 +15,69 @@ class Observer:
         :param portfolio: Portfolio 对象，包含交易和持仓信息。
         """
         self.portfolio = portfolio
+        # record 逐条写入的结果先缓存在 _pending_rows 中，读取 results 时才一次性合并成 DataFrame
+        self._pending_rows = []
+        self._last_value = None
+        # reserve 预分配的 (日期, 总价值, 现金) 写入缓冲区、已写入行数，以及缓冲区首行之前的净值
+        self._reserved = None
+        self._n_reserved = 0
+        self._reserved_prev = None
+        # 初始净值的倒数，首次记录时计算一次，之后相对收益只做乘法
+        self._inv_initial_value = None
         self.results = pd.DataFrame(
             columns=["date", "total_value", "cash", "returns", "returns_pct"]
         )
         self.performance_metrics = {}
         self.drawdown_records = pd.DataFrame()
-        # 记录benchmark数据与指标
-        self.benchmark_results = []  # 每条记录为：{"date": dt, benchmark_symbol: close, ...}
+        # 记录benchmark数据与指标：收盘价按固定的列顺序逐行写入，读取时一次性构造 DataFrame
+        self._benchmark_columns = {}  # benchmark_symbol -> 列位置，按首次出现顺序
+        self._benchmark_dates = []
+        self._benchmark_rows = []  # 每行为按 _benchmark_columns 顺序排列的收盘价
+        self._benchmark_frames = None  # (绝对值, 相对收益) 的缓存，新记录写入后失效
         self.benchmark_metrics = {}  # 格式：{ benchmark_symbol: {"annual_return": ..., "max_drawdown": ..., "annual_volatility": ...} }
 
         self.initial_portfolio_value = None
-        # ===== 专门存 benchmark 的相对收益(同样用 list[dict] 结构) =====
-        self.benchmark_relative_results = []
         # 用于存储各 benchmark 的初始价格
         self.benchmark_initial_values = {}
 
+    RESULT_COLUMNS = ["date", "total_value", "cash", "returns", "returns_pct", "relative_return"]
+
+    @property
+    def results(self) -> pd.DataFrame:
+        """
+        回测结果，每个时间步一行。读取时把 record 缓存的记录一次性合并进来。
+        """
+        if self._pending_rows:
+            new_rows = pd.DataFrame.from_records(self._pending_rows, columns=self.RESULT_COLUMNS)
+            self._pending_rows = []
+            self._append_results(new_rows)
+        self._flush_reserved()
+        return self._results
+
+    @results.setter
+    def results(self, df: pd.DataFrame):
+        self._pending_rows = []
+        self._n_reserved = 0
+        self._results = df
+        self._last_value = df["total_value"].iloc[-1] if not df.empty else None
+
+    def reserve(self, n_ticks: int):
+        """
+        按回测时间轴长度预分配 record 的写入缓冲区。之后每次 record 只按下标写入日期、总价值、现金三个数组，
+        收益等字段在读取 results 时整列计算；缓冲区写满后自动合并进结果并复用。
+
+        :param n_ticks: 预计记录的时间步数，通常为主时间轴长度。
+        """
+        # 之前逐条缓存的记录先合并，保证结果顺序
+        _ = self.results
+        n_ticks = max(int(n_ticks), 1)
+        self._reserved = (
+            np.empty(n_ticks, dtype="datetime64[ns]"),
+            np.empty(n_ticks, dtype=np.float64),
+            np.empty(n_ticks, dtype=np.float64),
+        )
+        self._n_reserved = 0
+
     def record(self, dt, total_value, cash):
         """
         记录每个时间步的回测结果。
@@ -39,61 +88,162 @@ class Observer:
         """
         # 如果是第一次记录，则记下初始净值
         if self.initial_portfolio_value is None:
-            self.initial_portfolio_value = total_value
+            self._set_initial_value(total_value)
 
-        previous_value = (
-            self.results["total_value"].iloc[-1]
-            if not self.results.empty
-            else total_value
-        )
+        if self._reserved is not None:
+            # 已预分配缓冲区：只按下标写入，不构造任何 Python 对象
+            dates, total_values, cash_values = self._reserved
+            i = self._n_reserved
+            if i == len(total_values):
+                self._flush_reserved()
+                i = 0
+            if i == 0:
+                self._reserved_prev = self._last_value
+            dates[i] = dt
+            total_values[i] = total_value
+            cash_values[i] = cash
+            self._n_reserved = i + 1
+            self._last_value = total_value
+            return
+
+        previous_value = self._last_value if self._last_value is not None else total_value
         returns = total_value - previous_value
         returns_pct = (returns / previous_value) * 100 if previous_value != 0 else 0
 
         # ===== 计算组合相对收益(基于初始净值归一化，从1.0起) =====
-        relative_return = total_value / self.initial_portfolio_value
-
-        new_row = pd.DataFrame(
-            [
-                {
-                    "date": dt,
-                    "total_value": total_value,
-                    "cash": cash,
-                    "returns": returns,
-                    "returns_pct": returns_pct,
-                    "relative_return": relative_return,
-                }
-            ]
+        relative_return = total_value * self._inv_initial_value
+
+        # 只追加到缓存列表，避免每个时间步都复制整张结果表
+        self._pending_rows.append((dt, total_value, cash, returns, returns_pct, relative_return))
+        self._last_value = total_value
+
+    def record_batch(self, dates, total_values, cash):
+        """
+        一次性记录一段连续时间步的回测结果，等价于按顺序逐个调用 record，
+        但收益等字段整列向量化计算，只构造一次 DataFrame。
+
+        :param dates: 日期数组。
+        :param total_values: 组合总价值数组，与 dates 一一对应。
+        :param cash: 现金数组，与 dates 一一对应。
+        """
+        total_values = np.asarray(total_values, dtype=np.float64)
+        if total_values.size == 0:
+            return
+
+        # 如果是第一次记录，则记下初始净值
+        if self.initial_portfolio_value is None:
+            self._set_initial_value(total_values[0])
+
+        new_rows = self._build_rows(dates, total_values, cash, self._last_value)
+        # 先合并已缓存的记录，再接上本批结果
+        _ = self.results
+        self._append_results(new_rows)
+        self._last_value = total_values[-1]
+
+    def _build_rows(self, dates, total_values: np.ndarray, cash, previous_value) -> pd.DataFrame:
+        """
+        整列计算一段连续时间步的收益与相对收益，构造结果行。
+        :param previous_value: 这段时间步之前最后一条记录的总价值，没有时以首个总价值为准
+        """
+        total_values = np.ascontiguousarray(total_values, dtype=np.float64)
+        if previous_value is None:
+            previous_value = total_values[0]
+        returns, returns_pct, relative_return = record_returns(
+            total_values, float(previous_value), float(self._inv_initial_value))
+
+        return pd.DataFrame(
+            {
+                "date": pd.DatetimeIndex(dates),
+                "total_value": total_values,
+                "cash": np.asarray(cash, dtype=np.float64),
+                "returns": returns,
+                "returns_pct": returns_pct,
+                "relative_return": relative_return,
+            }
         )
-        self.results = pd.concat([self.results, new_row], ignore_index=True)
+
+    def _flush_reserved(self):
+        """
+        把预分配缓冲区中已写入的行合并进结果，缓冲区随后从头复用。
+        """
+        n = self._n_reserved
+        if n == 0:
+            return
+        self._n_reserved = 0
+        dates, total_values, cash_values = (values[:n].copy() for values in self._reserved)
+        self._append_results(self._build_rows(dates, total_values, cash_values, self._reserved_prev))
+
+    def _append_results(self, new_rows: pd.DataFrame):
+        self._results = new_rows if self._results.empty else pd.concat([self._results, new_rows], ignore_index=True)
+
+    def _set_initial_value(self, total_value):
+        """
+        记下初始净值及其倒数；初始净值为 0 时相对收益无意义，记为 nan。
+        """
+        self.initial_portfolio_value = total_value
+        self._inv_initial_value = 1.0 / total_value if total_value != 0 else float("nan")
 
     def record_benchmark(self, dt, benchmark_values: dict):
         """
-        记录每个时间步的 benchmark 收盘价(绝对值)，并额外记录相对收益。
+        记录每个时间步的 benchmark 收盘价(绝对值)，相对收益在读取 benchmark_relative_results 时整列计算。
         :param dt: 当前日期
         :param benchmark_values: {symbol: close_price, ...}
         """
-        # 1) 先保存绝对值(原先逻辑)
-        record_abs = {"date": dt}
-        # 2) 再保存相对收益(新增)
-        record_rel = {"date": dt}
+        columns = self._benchmark_columns
+        # 如果是第一次见到该 symbol，则为其分配新列并记录其初始价格；之前各行中该列记为缺失
+        if not benchmark_values.keys() <= columns.keys():
+            for sym, close_price in benchmark_values.items():
+                if sym not in columns:
+                    columns[sym] = len(columns)
+                    self.benchmark_initial_values[sym] = float(close_price)
 
-        for sym, close_price in benchmark_values.items():
-            # 绝对值
-            record_abs[sym] = close_price
+        # 写入时即转为 float，之后的指标计算与绘图不再需要做类型转换
+        self._benchmark_dates.append(dt)
+        self._benchmark_rows.append([float(benchmark_values.get(sym, np.nan)) for sym in columns])
+        self._benchmark_frames = None
 
-            # 如果是第一次见到该 symbol，则记录其初始价格
-            if sym not in self.benchmark_initial_values:
-                self.benchmark_initial_values[sym] = close_price
+    @property
+    def benchmark_results(self) -> pd.DataFrame:
+        """
+        benchmark 收盘价(绝对值)，每个时间步一行：date 列加各 benchmark 一列，当日无数据的 benchmark 为 NaN。
+        """
+        return self._get_benchmark_frames()[0]
 
-            init_price = self.benchmark_initial_values[sym]
-            # 防止除以0
-            if init_price and init_price != 0:
-                record_rel[sym] = close_price / init_price
+    @property
+    def benchmark_relative_results(self) -> pd.DataFrame:
+        """
+        benchmark 相对收益（收盘价 / 初始价格，从 1.0 起），结构与 benchmark_results 相同；初始价格为 0 时为 NaN。
+        """
+        return self._get_benchmark_frames()[1]
+
+    def _get_benchmark_frames(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        把逐行记录的收盘价一次性转为 (时间 × benchmark) 矩阵，并按列计算相对收益，结果缓存到下一次记录。
+        """
+        if self._benchmark_frames is None:
+            symbols = list(self._benchmark_columns)
+            rows = self._benchmark_rows
+            if not rows:
+                prices = np.empty((0, len(symbols)))
+            elif len(rows[0]) == len(symbols):
+                # 列只会增加，首行与列数相同说明各行等长
+                prices = np.array(rows, dtype=np.float64)
             else:
-                record_rel[sym] = float("nan")
+                prices = np.full((len(rows), len(symbols)), np.nan)
+                for i, row in enumerate(rows):
+                    prices[i, :len(row)] = row
 
-        self.benchmark_results.append(record_abs)
-        self.benchmark_relative_results.append(record_rel)
+            initial = np.array([self.benchmark_initial_values[sym] for sym in symbols], dtype=np.float64)
+            # 防止除以0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                relative = np.where(initial != 0, prices / initial, np.nan)
+
+            dates = pd.Series(self._benchmark_dates, name="date")
+            self._benchmark_frames = tuple(
+                pd.concat([dates, pd.DataFrame(values, columns=symbols)], axis=1) if rows else pd.DataFrame()
+                for values in (prices, relative)
+            )
+        return self._benchmark_frames
 
     def calculate_metrics(self, interval_months: int = 3):
         """
@@ -108,26 +258,29 @@ class Observer:
         trade_log = self.portfolio.trade_log
         self.performance_metrics["win_rate"] = win_rate(trade_log, self.portfolio)
 
+        # 各列只取一次 NumPy 数组，直接以数组 / Series 传给指标函数，不再复制结果表再 set_index
+        results = self.results
+        dates = pd.DatetimeIndex(results["date"])
+        total_values = results["total_value"].to_numpy(dtype=np.float64)
+
         # 计算年化收益率
-        start_value = self.results["total_value"].iloc[0]
-        end_value = self.results["total_value"].iloc[-1]
-        total_days = (self.results["date"].iloc[-1] - self.results["date"].iloc[0]).days
+        total_days = (dates[-1] - dates[0]).days
         self.performance_metrics["annual_return"] = annual_return(
-            start_value, end_value, total_days
+            total_values[0], total_values[-1], total_days
         )
 
         # 计算最大回撤
-        values = self.results[["date", "total_value"]].copy().set_index("date")
-        drawdown_result = drawdown(values, interval_months)
+        drawdown_result = drawdown(pd.Series(total_values, index=dates), interval_months)
         self.drawdown_records = drawdown_result[0]
         (
             self.performance_metrics["max_drawdown"],
             self.performance_metrics["max_drawdown_interval"],
         ) = drawdown_result[1]
 
-        # 计算年化波动率
-        daily_returns = self.results[["date", "returns_pct"]].copy().set_index("date")
-        daily_returns["returns_pct"] = daily_returns["returns_pct"] / 100.0
+        # 计算年化波动率：回测结果本身按时间顺序记录
+        daily_returns = results["returns_pct"].to_numpy(dtype=np.float64) / 100.0
+        if not dates.is_monotonic_increasing:
+            daily_returns = daily_returns[np.argsort(dates.values, kind="stable")]
         self.performance_metrics["annual_volatility"] = annual_volatility(daily_returns)
 
     def calculate_benchmark_metrics(self, interval_months: int = 3):
@@ -135,79 +288,98 @@ class Observer:
         针对记录的 benchmark 数据计算各 benchmark 的
         年化收益率、最大回撤、年化波动率，并写入 self.benchmark_metrics 字典中
         """
-        if not self.benchmark_results:
+        if not self._benchmark_rows:
             print("未记录到任何 benchmark 数据。")
             return
 
-        df = pd.DataFrame(self.benchmark_results)
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date").set_index("date")
-        # 对于每个 benchmark 列（除 date 外）
-        for benchmark in df.columns:
-            series = df[benchmark]
-            if series.empty:
-                continue
-            start_value = series.iloc[0]
-            end_value = series.iloc[-1]
-            total_days = (series.index[-1] - series.index[0]).days
-            ann_return = annual_return(start_value, end_value, total_days)
-
-            # 利用 drawdown 函数计算最大回撤
-            series_df = series.to_frame(name="close")
-            dd_df, (max_dd, max_dd_interval) = drawdown(series_df, interval_months)
-
-            # 计算年化波动率（先计算每日收益率）
-            daily_returns = series.pct_change().dropna()
-            daily_returns_df = pd.DataFrame({"returns_pct": daily_returns})
-            ann_vol = annual_volatility(daily_returns_df)
+        df = self.benchmark_results
+        df = df.set_index(pd.DatetimeIndex(df["date"])).drop(columns="date")
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        if df.empty:
+            return
 
+        # 所有 benchmark 在同一个 (日期 × benchmark) 矩阵上按列一次算完，不再逐列构造 Series / DataFrame
+        prices = df.to_numpy(dtype=np.float64)
+        total_days = (df.index[-1] - df.index[0]).days
+
+        # 年化收益率：首尾两行按列一次计算
+        ann_returns = annual_return(prices[0], prices[-1], total_days)
+
+        # 最大回撤：与 drawdown 一致，先按区间计算、各区间四舍五入后取最大值
+        _, starts, stops = drawdown_intervals(df.index, interval_months)
+        interval_dds = np.round(interval_max_drawdowns(prices, starts, stops), 4)
+        all_nan = np.isnan(interval_dds).all(axis=0)
+        max_dds = np.full(prices.shape[1], np.nan)
+        max_dds[~all_nan] = np.nanmax(interval_dds[:, ~all_nan], axis=0)
+
+        # 年化波动率：与 pct_change 一致，缺失价格沿用前值，首个有效价格之前的收益率不计入
+        filled = df.ffill().to_numpy(dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            daily_returns = filled[1:] / filled[:-1] - 1
+            ann_vols = np.nanstd(daily_returns, axis=0, ddof=1) * np.sqrt(250)
+
+        for benchmark, ann_return, max_dd, ann_vol in zip(df.columns, ann_returns, max_dds, ann_vols):
             self.benchmark_metrics[benchmark] = {
                 "annual_return": ann_return,
                 "max_drawdown": max_dd,
-                "annual_volatility": ann_vol,
+                "annual_volatility": round(ann_vol, 4),
             }
 
-    def plot_results(self):
+    # 数据点超过该数量时改用 WebGL 渲染的 Scattergl
+    WEBGL_THRESHOLD = 5000
+
+    def plot_results(self, show: bool = True):
         """
         只绘制“相对收益”曲线（组合与多个 benchmark），都从 1.0 起
+        :param show: 为True时直接展示图表
+        :return: plotly Figure，组合数据为空时返回 None
         """
-        # 1) 整理组合的相对收益
-        df_port = self.results[["date", "relative_return"]].copy()
-        df_port["date"] = pd.to_datetime(df_port["date"])
-        df_port = df_port.sort_values("date").reset_index(drop=True)
-
         # 如果组合数据为空，直接返回
-        if df_port.empty:
+        if self.results.empty:
             print("No portfolio data to plot.")
-            return
-
-        # 2) 整理 benchmark 的相对收益
-        df_bench_rel = pd.DataFrame(self.benchmark_relative_results)
-        if not df_bench_rel.empty:
-            df_bench_rel["date"] = pd.to_datetime(df_bench_rel["date"])
-            df_bench_rel = df_bench_rel.sort_values("date").reset_index(drop=True)
+            return None
 
-        # 3) 合并到同一个表
-        df_all = pd.merge(df_port, df_bench_rel, on="date", how="outer")
-        # 将组合的列名改得直观一些
-        df_all.rename(columns={"relative_return": "Portfolio"}, inplace=True)
+        # 各列在记录时已是 float，这里直接绘制
+        df_all = self._relative_return_frame()
 
-        # 转成数值型，避免 plotly 出错
-        for col in df_all.columns:
-            if col != "date":
-                df_all[col] = pd.to_numeric(df_all[col], errors="coerce")
-
-        # 4) 用 plotly.express 画线
+        # 3) 每条曲线直接由 NumPy 数组构造 trace，省去 px.line 把宽表转成长表的过程
         #    横轴：date；纵轴：组合和所有基准的相对收益，都从 1.0 起
         cols_to_plot = [c for c in df_all.columns if c != "date"]
-        fig = px.line(
-            df_all,
-            x="date",
-            y=cols_to_plot,
-            title="Relative Return (Base=1)",
-        )
+        scatter = go.Scattergl if len(df_all) > self.WEBGL_THRESHOLD else go.Scatter
+        x = df_all["date"].to_numpy()
+        fig = go.Figure()
+        fig.add_traces([scatter(x=x, y=df_all[col].to_numpy(), mode="lines", name=col) for col in cols_to_plot])
+        fig.update_layout(title="Relative Return (Base=1)", xaxis_title="date", yaxis_title="value",
+                          legend_title_text="variable")
         fig.update_xaxes(rangeslider_visible=True)
-        fig.show()
+        if show:
+            fig.show()
+        return fig
+
+    def _relative_return_frame(self) -> pd.DataFrame:
+        """
+        把组合与各 benchmark 的相对收益整理到同一张表：date 列加 Portfolio 及各 benchmark 列，按日期升序。
+        两者都以日期为索引对齐，回测中逐日记录时日期完全一致，直接按列拼接；否则按索引做外连接。
+        """
+        # 1) 整理组合的相对收益，组合的列名改得直观一些
+        results = self.results
+        port = pd.Series(results["relative_return"].to_numpy(dtype=np.float64),
+                         index=pd.DatetimeIndex(results["date"], name="date"), name="Portfolio")
+
+        # 2) 整理 benchmark 的相对收益，并合并到同一个表
+        df_bench_rel = self.benchmark_relative_results
+        if df_bench_rel.empty:
+            df_all = port.to_frame()
+        else:
+            df_bench_rel = df_bench_rel.set_index(pd.DatetimeIndex(df_bench_rel["date"], name="date")).drop(columns="date")
+            if df_bench_rel.index.equals(port.index):
+                df_all = pd.concat([port, df_bench_rel], axis=1)
+            else:
+                df_all = port.to_frame().join(df_bench_rel, how="outer")
+        if not df_all.index.is_monotonic_increasing:
+            df_all = df_all.sort_index()
+        return df_all.reset_index()
 
     def print_metrics(self):
         """
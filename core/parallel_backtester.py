@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Iterator
+from core.backtester import BackTester
+from core.observer import Observer
+
+
+def _run_one(config: dict[str, Any]) -> Observer:
+    """
+    在子进程中运行单个回测
+    :param config: BackTester 的构造参数
+    :return: 回测结果 Observer
+    """
+    backtester = BackTester(**config)
+    return backtester.run_backtest()
+
+
+def run_parallel(
+        configs: list[dict[str, Any]],
+        max_workers: int = None,
+) -> Iterator[tuple[int, Observer]]:
+    """
+    多进程并行运行多组回测，如不同标的组合或参数网格。
+    每个进程各自构造 BackTester 并加载数据，互不共享状态，
+    因此 config 中的对象（datahub、strategy、portfolio 等）需要可被 pickle。
+
+    :param configs: BackTester 构造参数列表，如
+           [{"data": hub, "strategy": strategy, "position_manager": pm, "portfolio": Portfolio(), ...}, ...]
+    :param max_workers: 最大进程数，默认取 CPU 核数与回测数量的较小值
+           子进程以 spawn 方式启动，调用脚本的入口需放在 if __name__ == '__main__' 下
+    :return: 按完成顺序产出 (config 在列表中的位置, Observer)
+    """
+    if not configs:
+        return
+    if max_workers is None:
+        max_workers = min(len(configs), os.cpu_count() or 1)
+
+    # 子进程用 spawn 启动而不是 fork：父进程跑过 numba 并行内核后已有线程池，fork 出的子进程会导致进程退出时卡住
+    spawn = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=spawn) as executor:
+        futures = {executor.submit(_run_one, config): i for i, config in enumerate(configs)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 from core.broker import Order
+from core.kernels import settle_cash, apply_buys, apply_sells
 from core.datahub import Datahub
 
 
@@ -8,12 +10,12 @@ class Portfolio:
     管理资金和持仓信息。
     由三部分构成:
       1) self.cash (float): 剩余可用资金
-      2) self.asset (pd.DataFrame): 当前持仓, 包含 [asset, quantity, cost_price]
+      2) self.asset (pd.DataFrame): 当前持仓, 包含 [asset, quantity, cost_price, current_price]，读取时按需构造
         - asset: 标的名称或代码
-        - quantity: 持仓数量(注意是股数而不是手数)
+        - quantity: 持仓数量(注意是股数而不是手数)，int64
         - cost_price: 加权成本价
         - current_price: 当前市场价格
-      3) self.trade_log (pd.DataFrame): 交易记录, 包含 [asset, trade_date, trade_qty, trade_price]
+      3) self.trade_log (pd.DataFrame): 交易记录, 包含 [asset, trade_date, trade_qty, trade_price]，读取时合并逐笔缓存
         - trade_qty: 买入为正, 卖出为负
     """
 
@@ -27,10 +29,102 @@ class Portfolio:
         self.cash = initial_cash
         self.initial_cash = initial_cash
 
-        # 当前持仓信息。若要支持多标的，可直接多行
-        self.asset = pd.DataFrame(columns=['asset', 'quantity', 'cost_price', 'current_price'])
-        # 交易日志
-        self.trade_log = pd.DataFrame(columns=['asset', 'trade_date', 'trade_qty', 'trade_price'])
+        # 当前持仓以列式数组存储，第 i 个槽位对应 _symbols[i]，按建仓顺序排列；
+        # _idx 为 asset -> 槽位，清仓的槽位标记为失效，重新买入时追加新槽位。
+        # 买卖只做标量写入，self.asset 在读取时才按需构造 DataFrame
+        self._idx = {}
+        self._n_slots = 0
+        self._symbols = np.empty(0, dtype=object)
+        self._qty = np.empty(0, dtype=np.int64)
+        self._cost = np.empty(0, dtype=np.float64)
+        self._cur = np.empty(0, dtype=np.float64)
+        self._live = np.empty(0, dtype=bool)
+        self._asset_df = None
+        # 交易日志：逐笔追加 (asset, trade_date, trade_qty, trade_price)，读取 self.trade_log 时才合并成 DataFrame
+        self._trade_log_buffer = []
+        self._trade_log = pd.DataFrame(columns=self.TRADE_LOG_COLUMNS)
+
+    ASSET_COLUMNS = ['asset', 'quantity', 'cost_price', 'current_price']
+    TRADE_LOG_COLUMNS = ['asset', 'trade_date', 'trade_qty', 'trade_price']
+
+    @property
+    def asset(self) -> pd.DataFrame:
+        """
+        当前持仓，每个标的一行，列为 [asset, quantity, cost_price, current_price]。
+        持仓变动后首次读取时重新构造；返回的 DataFrame 只是快照，修改它不会影响持仓，需要整体替换时请赋值给 self.asset。
+        """
+        if self._asset_df is None:
+            rows = self._live_rows()
+            self._asset_df = pd.DataFrame({
+                'asset': self._symbols[rows],
+                'quantity': self._qty[rows],
+                'cost_price': self._cost[rows],
+                'current_price': self._cur[rows],
+            })
+        return self._asset_df
+
+    @asset.setter
+    def asset(self, df: pd.DataFrame):
+        """
+        整体替换持仓；缺少 current_price 列时以成本价作为当前价格。
+        """
+        current_prices = df['current_price'] if 'current_price' in df.columns else df['cost_price']
+        n = len(df)
+        self._symbols = np.array(df['asset'].tolist(), dtype=object)
+        self._qty = df['quantity'].to_numpy(dtype=np.int64, copy=True)
+        self._cost = df['cost_price'].to_numpy(dtype=np.float64, copy=True)
+        self._cur = current_prices.to_numpy(dtype=np.float64, copy=True)
+        self._live = np.ones(n, dtype=bool)
+        self._idx = {asset: i for i, asset in enumerate(self._symbols)}
+        self._n_slots = n
+        self._asset_df = None
+
+    def _live_rows(self) -> np.ndarray:
+        """
+        当前持仓所在的槽位，按建仓顺序排列
+        """
+        return np.flatnonzero(self._live[:self._n_slots])
+
+    def _open_position(self, asset, quantity, cost_price):
+        """
+        为新建仓的标的追加一个槽位。容量用尽时先丢弃清仓留下的失效槽位，再按倍数扩容。
+        :return: 新槽位的位置
+        """
+        n = self._n_slots
+        if n == len(self._qty):
+            live = self._live_rows()
+            n = len(live)
+            capacity = max(8, 2 * n)
+            for name in ('_symbols', '_qty', '_cost', '_cur', '_live'):
+                grown = np.empty(capacity, dtype=getattr(self, name).dtype)
+                grown[:n] = getattr(self, name)[live]
+                setattr(self, name, grown)
+            self._idx = {sym: i for i, sym in enumerate(self._symbols[:n])}
+        self._symbols[n] = asset
+        self._qty[n] = quantity
+        self._cost[n] = cost_price
+        self._cur[n] = cost_price
+        self._live[n] = True
+        self._idx[asset] = n
+        self._n_slots = n + 1
+        return n
+
+    @property
+    def trade_log(self) -> pd.DataFrame:
+        """
+        交易记录，列为 [asset, trade_date, trade_qty, trade_price]。读取时把缓存的逐笔记录一次性合并进来。
+        """
+        if self._trade_log_buffer:
+            new_records = pd.DataFrame.from_records(self._trade_log_buffer, columns=self.TRADE_LOG_COLUMNS)
+            self._trade_log_buffer = []
+            self._trade_log = new_records if self._trade_log.empty else \
+                pd.concat([self._trade_log, new_records], ignore_index=True)
+        return self._trade_log
+
+    @trade_log.setter
+    def trade_log(self, df: pd.DataFrame):
+        self._trade_log_buffer = []
+        self._trade_log = df
 
     def buy(self,
             order: Order
@@ -39,124 +133,124 @@ class Portfolio:
         买入操作: 更新仓位信息, 扣减现金，忽略交易成本，买入成功时current_price=cost_price 记录交易日志
         :param order: 订单
         """
-        # 遍历订单中每一条记录
-        for _, row in order.get().iterrows():
-            asset = row['asset']
-            quantity = row['quantity']
-            trade_date = row['date']
-            if 'trade_price' in row:
-                trade_price = row['trade_price']
-            else:
-                raise ValueError("买入订单缺少交易价格字段 'trade_price'。")
-
-            total_cost = quantity * trade_price
-            if self.cash < total_cost:
-                raise ValueError(f"现金不足，无法买入 {asset}，需要 {total_cost}，当前现金 {self.cash}。")
-
-            # 扣减现金
-            self.cash -= total_cost
-
-            # 更新持仓记录
-            mask = self.asset['asset'] == asset
-            if self.asset[mask].empty:
-                # 新增持仓记录
-                new_record = pd.DataFrame({
-                    'asset': [asset],
-                    'quantity': [quantity],
-                    'cost_price': [trade_price],  # 买入时成本价为成交价
-                    'current_price': [trade_price]  # 初始当前价格设为买入价格
-                }, index=[0])
-                self.asset = pd.concat([self.asset, new_record], ignore_index=True)
-            else:
-                # 更新已有持仓
-                idx_existing = self.asset[mask].index[0]
-                old_quantity = self.asset.at[idx_existing, 'quantity']
-                old_cost_price = self.asset.at[idx_existing, 'cost_price']
-                new_quantity = old_quantity + quantity
-                # 计算加权平均成本价
-                new_cost_price = (old_quantity * old_cost_price + quantity * trade_price) / new_quantity
-                self.asset.at[idx_existing, 'quantity'] = new_quantity
-                self.asset.at[idx_existing, 'cost_price'] = new_cost_price
-                # 买入成功时将当前价格更新为新加权成本价
-                self.asset.at[idx_existing, 'current_price'] = new_cost_price
-
-            # 记录交易日志（买入交易数量为正）
-            new_record = pd.DataFrame({
-                'asset': [asset],
-                'trade_date': [trade_date],
-                'trade_qty': [quantity],
-                'trade_price': [trade_price]
-            },index=[0])
-            self.trade_log = pd.concat([self.trade_log, new_record], ignore_index=True)
+        if 'trade_price' not in order.columns:
+            raise ValueError("买入订单缺少交易价格字段 'trade_price'。")
+        # 订单各列只取一次一维数组，之后不经过 pandas
+        assets = order.column('asset').tolist()
+        quantities = np.asarray(order.column('quantity'), dtype=np.int64)
+        trade_prices = np.asarray(order.column('trade_price'), dtype=np.float64)
+
+        # 成交金额整列一次算好，顺序扣减现金交给 settle_cash 内核；
+        # 任一笔现金不足时整张订单都不生效
+        total_costs = quantities * trade_prices
+        cash_after, failed = settle_cash(float(self.cash), total_costs)
+        if failed >= 0:
+            raise ValueError(f"现金不足，无法买入 {assets[failed]}，"
+                             f"需要 {total_costs[failed]}，当前现金 {cash_after}。")
+        self.cash = cash_after
+
+        # 新标的先全部追加空槽位，由内核以成交价建仓，初始当前价格设为买入价格；
+        # 追加时可能整理槽位并重建 _idx，因此全部建仓后再统一解析槽位
+        for asset in assets:
+            if asset not in self._idx:
+                self._open_position(asset, 0, 0.0)
+        slots = np.fromiter((self._idx[asset] for asset in assets), dtype=np.int64, count=len(assets))
+        # 成本价与数量的更新交给 apply_buys 内核
+        apply_buys(self._qty, self._cost, self._cur, slots, quantities, trade_prices)
+
+        # 记录交易日志（买入交易数量为正），各列保持订单中的原始取值
+        cols = ['asset', 'date', 'quantity', 'trade_price']
+        self._trade_log_buffer.extend(zip(*(pd.Index(order.column(col)).tolist() for col in cols)))
+        self._asset_df = None
 
     def sell(self, order: Order):
         """
         卖出操作: 更新仓位信息, 增加现金, 记录交易日志
         :param order: 订单
         """
-        for _, row in order.get().iterrows():
-            asset = row['asset']
-            quantity = row['quantity']
-            trade_date = row['date']
-            if 'trade_price' in row:
-                trade_price = row['trade_price']
-            else:
-                raise ValueError("卖出订单缺少交易价格字段 'trade_price'。")
+        if 'trade_price' not in order.columns:
+            raise ValueError("卖出订单缺少交易价格字段 'trade_price'。")
 
-            # 检查是否持有该标的及持仓数量是否足够
-            mask = self.asset['asset'] == asset
-            if self.asset[mask].empty:
+        # 持仓数量校验、现金累加与持仓扣减交给 apply_sells 内核，遇到无法成交的一笔即停止
+        assets = order.column('asset').tolist()
+        slots = np.fromiter((self._idx.get(asset, -1) for asset in assets), dtype=np.int64, count=len(assets))
+        quantities = np.asarray(order.column('quantity'), dtype=np.int64)
+        cash, failed = apply_sells(float(self.cash), self._qty, self._cur, slots, quantities,
+                                   np.asarray(order.column('trade_price'), dtype=np.float64))
+        # 中途出错时已成交的部分同样生效
+        self.cash = float(cash)
+        n_filled = len(assets) if failed < 0 else failed
+
+        # 卖出后剩余为 0 的标的移除持仓记录
+        for asset, i in zip(assets[:n_filled], slots[:n_filled].tolist()):
+            if self._live[i] and self._qty[i] == 0:
+                del self._idx[asset]
+                self._live[i] = False
+
+        # 记录交易日志，卖出时交易数量记为负
+        cols = ['asset', 'date', 'quantity', 'trade_price']
+        self._trade_log_buffer.extend(
+            (asset, trade_date, -quantity, trade_price)
+            for asset, trade_date, quantity, trade_price in zip(
+                *(pd.Index(order.column(col)[:n_filled]).tolist() for col in cols))
+        )
+        self._asset_df = None
+
+        if failed >= 0:
+            asset = assets[failed]
+            i = slots[failed]
+            if i < 0 or not self._live[i]:
                 raise ValueError(f"持仓中不存在标的 {asset}，无法卖出。")
-            idx_existing = self.asset[mask].index[0]
-            current_quantity = self.asset.at[idx_existing, 'quantity']
-            if quantity > current_quantity:
-                raise ValueError(f"持仓数量不足，标的 {asset} 当前持仓 {current_quantity}，尝试卖出 {quantity}。")
-
-            # 卖出获得的现金
-            self.cash += quantity * trade_price
-
-            # 更新持仓：卖出数量扣除，如果剩余为0则移除记录，否则更新数量
-            new_quantity = current_quantity - quantity
-            if new_quantity == 0:
-                self.asset = self.asset.drop(idx_existing).reset_index(drop=True)
-            else:
-                self.asset.at[idx_existing, 'quantity'] = new_quantity
-                # 卖出后，更新持仓中的当前价格为卖出价格（此处也可以选择不更新，根据实际需求调整）
-                self.asset.at[idx_existing, 'current_price'] = trade_price
-
-            # 记录交易日志，卖出时交易数量记为负
-            new_record = pd.DataFrame({
-                'asset': [asset],
-                'trade_date': [trade_date],
-                'trade_qty': [-quantity],
-                'trade_price': [trade_price]
-            }, index=[0])
-            self.trade_log = pd.concat([self.trade_log, new_record], ignore_index=True)
+            raise ValueError(f"持仓数量不足，标的 {asset} 当前持仓 {self._qty[i]}，尝试卖出 {quantities[failed]}。")
 
     def get_asset_value(self,
                         current_date: pd.Timestamp,
-                        data: Datahub
+                        data: Datahub,
+                        bars: pd.DataFrame = None,
+                        prices: pd.Series | np.ndarray = None,
+                        price_codes: dict = None,
                         ) -> float:
         """
         计算当前持仓的市值 = ∑(quantity * 最新价格)
         :param current_date: 当前日期
         :param data: 一个行情表, index 为日期, columns 包含 'close'
+        :param bars: 可选，current_date 当日的行情快照，传入时不再重复查询 data；
+                     快照索引含 symbol 层时按标的取 close，否则所有持仓统一取首行 close
+        :param prices: 可选，当日各标的收盘价，index 为 symbol；传入时按标的逐一取价，
+                       缺失价格的标的退而使用持仓记录中的 current_price。
+                       也可以是按固定标的顺序排列的一维数组，此时需同时传入 price_codes
+        :param price_codes: prices 为数组时，symbol -> 该标的在数组中的位置
         :return: 持仓市值
         """
-        total_value = 0.0
-        # TODO:去掉循环
-        df_bar = data.get_bars(current_date=current_date)
-        for _, row in self.asset.iterrows():
-            quantity = row['quantity']
-            # 获取指定标的在当前日期的行情数据
+        # 空仓时无需查询行情
+        if not self._idx:
+            return 0.0
+
+        rows = self._live_rows()
+        current_prices = self._cur[rows]
+        if prices is None:
+            df_bar = bars if bars is not None else data.get_bars(current_date=current_date)
             if df_bar.empty:
                 # 若无法获取行情数据，则退而求其次，使用持仓记录中的 current_price
-                price = row['current_price']
+                asset_prices = current_prices
+            elif 'symbol' in df_bar.index.names:
+                prices = pd.Series(df_bar['close'].to_numpy(), index=df_bar.index.get_level_values('symbol'))
+            else:
+                # 快照中没有标的信息时，假定首行 'close' 为最新价格
+                asset_prices = np.full(len(rows), df_bar['close'].iloc[0], dtype=np.float64)
+        if prices is not None:
+            # 价格可能以 float32 存储，取出后提升为 float64 再与 int64 股数做点积，避免大额市值的舍入误差
+            if isinstance(prices, np.ndarray):
+                # 价格数组按标的位置直接取数，不经过 pandas 索引器；不在 price_codes 中的标的记为缺失
+                cols = np.fromiter((price_codes.get(symbol, -1) for symbol in self._symbols[rows]),
+                                   dtype=np.int64, count=len(rows))
+                asset_prices = np.full(len(rows), np.nan)
+                found = cols >= 0
+                asset_prices[found] = prices[cols[found]]
             else:
-                # 假定返回的 DataFrame 中 'close' 为最新价格
-                price = df_bar.iloc[0]['close']
-            total_value += quantity * price
-        return total_value
+                asset_prices = prices.reindex(self._symbols[rows]).to_numpy(dtype=np.float64)
+            asset_prices = np.where(np.isnan(asset_prices), current_prices, asset_prices)
+        return float(self._qty[rows] @ asset_prices)
 
     def get_asset_last_price(self, asset: str) -> float:
         """
@@ -165,18 +259,43 @@ class Portfolio:
         :return: 当前价格
         :raises ValueError: 如果持仓中没有该标的，则抛出异常
         """
-        mask = self.asset['asset'] == asset
-        if self.asset[mask].empty:
+        i = self._idx.get(asset)
+        if i is None:
             raise ValueError(f"资产 {asset} 不存在于当前持仓中")
         # 返回对应持仓记录中的 current_price
-        return self.asset[mask].iloc[0]['current_price']
+        return self._cur[i]
+
+    def get_asset_quantities(self, assets) -> np.ndarray:
+        """
+        批量返回指定标的的持仓数量，直接读取持仓数组，不构造 self.asset。
+        :param assets: 标的名称或代码序列
+        :return: 与 assets 一一对应的持仓数量，int64 数组，未持有的标的为 0
+        """
+        idx = self._idx
+        slots = np.fromiter((idx.get(asset, -1) for asset in assets), dtype=np.int64, count=len(assets))
+        quantities = np.zeros(len(slots), dtype=np.int64)
+        held = slots >= 0
+        quantities[held] = self._qty[slots[held]]
+        return quantities
+
+    def snapshot_last_prices(self) -> pd.Series:
+        """
+        一次性返回当前所有持仓标的的最新价格，供批量计算时按标的映射，避免逐个调用 get_asset_last_price。
+        :return: 以 asset 为索引的 current_price 序列
+        """
+        rows = self._live_rows()
+        return pd.Series(self._cur[rows], index=pd.Index(self._symbols[rows], dtype=object, name='asset'),
+                         name='current_price')
 
     def total_value(self,
                     current_date: pd.Timestamp,
-                    data: Datahub
+                    data: Datahub,
+                    bars: pd.DataFrame = None,
+                    prices: pd.Series | np.ndarray = None,
+                    price_codes: dict = None,
                     ) -> float:
         """
-        返回组合总价值 = 现金 + 持仓市值
+        返回组合总价值 = 现金 + 持仓市值，参数含义同 get_asset_value
         """
-        asset_value = self.get_asset_value(current_date, data)
+        asset_value = self.get_asset_value(current_date, data, bars, prices, price_codes)
         return self.cash + asset_value
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
 from core.strategy import Signal
 from core.portfolio import Portfolio
@@ -21,6 +22,33 @@ def get_min_lot(asset: str) -> int:
         return 100
 
 
+def get_min_lots(assets: pd.Index) -> np.ndarray:
+    """
+    get_min_lot 的批量版本，一次性返回多个资产的最小交易手数。
+    :param assets: 资产代码
+    :return: 与 assets 一一对应的最小交易手数，int64 数组
+    """
+    # 转成定长 unicode 数组后用 np.char 整列判断，口径与 get_min_lot 一致：纯数字且以 688 开头
+    assets = np.asarray(assets).astype(str)
+    is_star = np.char.isdigit(assets) & np.char.startswith(assets, '688')
+    return np.where(is_star, 200, 100).astype(np.int64)
+
+
+def close_snapshot(bars: pd.DataFrame, current_time: pd.Timestamp) -> dict:
+    """
+    把行情快照中 current_time 当日的收盘价转成 symbol -> close 字典，之后逐标的取价只做哈希查找，
+    不再经过 MultiIndex 索引器。
+    :param bars: 行情数据，index 为 (trade_date, symbol)，columns 包含 'close'
+    :param current_time: 当前日期
+    :return: symbol -> close，close 保持原列的数值类型
+    """
+    dates = bars.index.get_level_values(0)
+    on_date = dates == current_time
+    if not on_date.all():
+        bars = bars[on_date]
+    return dict(zip(bars.index.get_level_values(1), bars['close'].to_numpy()))
+
+
 class PositionManager(ABC):
     """
     抽象基类：所有PositionSizer都必须实现 transform_signals_to_orders() 方法
@@ -39,7 +67,8 @@ class PositionManager(ABC):
             portfolio: 用于查询当前资金和持仓
             data: 获取数据
             current_time: 当前回测的时间点（pd.Timestamp），用于防止引入未来数据。
-            **kwargs: 子类可能需要的其他参数(如风控、波动率、胜率等)
+            **kwargs: 子类可能需要的其他参数(如风控、波动率、胜率等)，
+                      bars: 可选，current_time 当日的行情快照，传入时不再重复查询 data
 
         返回:
             订单DataFrame, columns=[date, asset, side, quantity]
@@ -56,6 +85,20 @@ class EqualWeightPositionManager(PositionManager):
       - 交易规则：A股、科创板最少1手200股，其他最少1手100股。
     """
 
+    def __init__(self):
+        # 标的 -> 最小交易手数，标的池在回测中基本不变，每个标的只判断一次
+        self._min_lot_map = {}
+
+    def _get_min_lots(self, symbols: pd.Index) -> np.ndarray:
+        """
+        查表返回各标的的最小交易手数，首次出现的标的批量计算后写入缓存
+        """
+        min_lot_map = self._min_lot_map
+        new_symbols = [symbol for symbol in symbols if symbol not in min_lot_map]
+        if new_symbols:
+            min_lot_map.update(zip(new_symbols, get_min_lots(new_symbols).tolist()))
+        return np.fromiter((min_lot_map[symbol] for symbol in symbols), dtype=np.int64, count=len(symbols))
+
     def transform_signals_to_orders(self,
                                     signals: Signal,
                                     portfolio: Portfolio,
@@ -69,58 +112,60 @@ class EqualWeightPositionManager(PositionManager):
             根据该标的的 close 价格计算可以买入的股数，同时要求订单数量必须是最小手数的整数倍，
             否则不生成该订单。
         """
-        orders_list = []
         df_signals = signals.get()
-        current_prices = data.get_bars(current_date=current_time)
+        current_prices = kwargs.get('bars')
+        if current_prices is None:
+            current_prices = data.get_bars(current_date=current_time)
 
-        # 确保 'signal' 列为大写字符串，方便比较
-        df_signals['signal'] = df_signals['signal'].astype(str).str.upper()
+        # signal 列在 Signal 构造时已规范为 Categorical，按方向取已分好桶的行位置
+        signal_symbols = df_signals.index.get_level_values('symbol')
+        # 当日收盘价只取一次转成字典，之后按标的查表取价；缺少价格的标的抛出 KeyError
+        snapshot = None
 
         # --- 处理卖出信号 ---
-        sell_signals = df_signals[df_signals['signal'] == 'SELL']
-        if not sell_signals.empty:
-            sell_symbols = sell_signals.index.get_level_values('symbol').unique()
-            # 只查询当前持仓中需要卖出的标的
-            relevant_holdings = portfolio.asset[portfolio.asset['asset'].isin(sell_symbols)]
-            for symbol in sell_symbols:
-                holding = relevant_holdings[relevant_holdings['asset'] == symbol]
-                if not holding.empty:
-                    held_qty = holding['quantity'].values[0]
-                    if held_qty > 0:
-                        trade_price = current_prices.loc[(current_time, symbol), 'close']
-                        orders_list.append({
-                            "date": current_time,
-                            "asset": symbol,
-                            "side": "SELL",
-                            "quantity": held_qty,
-                            "trade_price": trade_price
-                        })
+        sell_symbols = signal_symbols[signals.side_positions(Signal.SELL_CODE)].unique()
+        sell_qty = np.empty(0, dtype=np.int64)
+        if len(sell_symbols) > 0:
+            # 只卖出当前持有且数量大于 0 的标的，按持仓全部卖出
+            held_qty = portfolio.get_asset_quantities(sell_symbols)
+            held = held_qty > 0
+            sell_symbols = sell_symbols[held]
+            sell_qty = held_qty[held]
+        if len(sell_symbols) > 0:
+            snapshot = close_snapshot(current_prices, current_time)
+            sell_prices = np.array([snapshot[symbol] for symbol in sell_symbols])
+        else:
+            sell_prices = np.empty(0)
 
         # --- 处理买入信号 ---
         # TODO: buy order信号处理可以考虑做进步抽象
-        buy_signals = df_signals[df_signals['signal'] == 'BUY']
-        # 开始处理买入信号的时间
-        if not buy_signals.empty:
+        buy_positions = signals.side_positions(Signal.BUY_CODE)
+        buy_symbols = signal_symbols[buy_positions].unique()
+        buy_qty = np.empty(0, dtype=np.int64)
+        buy_prices = np.empty(0)
+        if len(buy_symbols) > 0:
+            if snapshot is None:
+                snapshot = close_snapshot(current_prices, current_time)
             # 一次性获取所有买入信号的价格和最小手数
-            buy_symbols = buy_signals.index.get_level_values('symbol').unique()
-            min_lots = {symbol: get_min_lot(symbol) for symbol in buy_symbols}
-            allocated_cash = portfolio.cash / len(buy_signals)
-            for symbol in buy_symbols:
-                close_price = current_prices.loc[(current_time, symbol), 'close']
-                min_lot = min_lots[symbol]
-                raw_qty = allocated_cash / close_price
-                order_qty = int(raw_qty // min_lot) * min_lot
-                if order_qty >= min_lot:
-                    orders_list.append({
-                        "date": current_time,
-                        "asset": symbol,
-                        "side": "BUY",
-                        "quantity": order_qty,
-                        "trade_price": close_price
-                    })
-
-        # 构造订单 DataFrame
-        orders_df = pd.DataFrame(orders_list, columns=['date', 'asset', 'side', 'quantity', 'trade_price'])
-
-        return Order(orders_df)
-
+            # 价格统一按 float64 计算，float32 行情下股数取整后的成交金额才不会超出分配的现金
+            prices = np.array([snapshot[symbol] for symbol in buy_symbols], dtype=np.float64)
+            allocated_cash = portfolio.cash / len(buy_positions)
+            raw_qty = allocated_cash / prices
+            min_lots = self._get_min_lots(buy_symbols)
+            lots = raw_qty // min_lots
+            # 不足一手或价格缺失时不生成该订单
+            valid = np.isfinite(lots) & (lots >= 1)
+            buy_symbols = buy_symbols[valid]
+            buy_qty = lots[valid].astype(np.int64) * min_lots[valid]
+            buy_prices = prices[valid]
+
+        # 构造订单：卖单在前、买单在后，各列直接由数组拼接，side 与 side_code 按两侧数量整段填充，不经过 DataFrame
+        counts = [len(sell_symbols), len(buy_symbols)]
+        return Order.from_arrays(
+            date=np.full(sum(counts), current_time.to_datetime64()),
+            asset=np.concatenate([np.asarray(sell_symbols, dtype=object), np.asarray(buy_symbols, dtype=object)]),
+            side=np.repeat(np.array(['SELL', 'BUY'], dtype=object), counts),
+            quantity=np.concatenate([sell_qty, buy_qty]),
+            trade_price=np.concatenate([sell_prices, buy_prices]),
+            side_code=np.repeat(np.array([Order.SELL_CODE, Order.BUY_CODE], dtype=np.int8), counts),
+        )
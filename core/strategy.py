@@ -3,8 +3,7 @@ import warnings
 import pandas as pd
 import numpy as np
 from core.datahub import Datahub
-from utils.technical_process import moving_average
-import time
+from utils.technical_process import ma_bias_signal_kernel
 
 
 class Signal:
@@ -12,25 +11,106 @@ class Signal:
     Signal 数据封装类，用于包装信号 DataFrame，并对数据结构进行验证
     """
     # 定义必须包含的列和索引层级（可以根据需要调整）
-    REQUIRED_COLUMNS = {'close', 'signal'}
-    REQUIRED_INDEX = {'trade_date', 'symbol'}
+    REQUIRED_COLUMNS = frozenset({'close', 'signal'})
+    REQUIRED_INDEX = frozenset({'trade_date', 'symbol'})
+    # signal 列统一为固定类别的 Categorical，类别编码与 Order 的 side 编码一致
+    SIGNAL_CATEGORIES = ['BUY', 'SELL', 'HOLD']
+    BUY_CODE = 0
+    SELL_CODE = 1
+    HOLD_CODE = 2
 
     def __init__(self, df: pd.DataFrame, current_time: pd.Timestamp):
         self._validate(df, current_time)
-        self.df = df
+        self._set_df(df)
+
+    @classmethod
+    def from_validated(cls, df: pd.DataFrame) -> "Signal":
+        """
+        跳过结构与未来数据校验直接包装，仅用于从已通过 validate_schema 的全量信号中按日期取出的切片
+        """
+        signal = cls.__new__(cls)
+        signal._set_df(df)
+        return signal
+
+    def _set_df(self, df: pd.DataFrame):
+        # signal 列已是规范的 Categorical 时直接引用，否则换成规范后的新列（不改动传入的 DataFrame）
+        signals = df['signal']
+        if isinstance(signals.dtype, pd.CategoricalDtype) and \
+                list(signals.cat.categories) == self.SIGNAL_CATEGORIES:
+            self.df = df
+        else:
+            self.df = df.assign(signal=self.normalize_signals(signals))
+        # signal 编码 -> 行位置，首次按方向取信号时一次分桶，self.df 被重新赋值后失效
+        self._side_positions = None
+        self._side_positions_df = None
+
+    @classmethod
+    def normalize_signals(cls, signals: pd.Series) -> pd.Categorical:
+        """
+        将 signal 列规范为大写、类别固定为 SIGNAL_CATEGORIES 的 Categorical；
+        大小写转换只对去重后的取值做一次，无法识别的取值（含空值）记为缺失。
+        """
+        if isinstance(signals.dtype, pd.CategoricalDtype) and \
+                list(signals.cat.categories) == cls.SIGNAL_CATEGORIES:
+            return signals.array
+        codes, uniques = pd.factorize(signals)
+        categories = {category: code for code, category in enumerate(cls.SIGNAL_CATEGORIES)}
+        unique_codes = np.array([categories.get(str(value).upper(), -1) for value in uniques] + [-1],
+                                dtype=np.int8)
+        # factorize 把空值编码为 -1，正好取到末尾追加的 -1
+        return pd.Categorical.from_codes(unique_codes[codes], categories=cls.SIGNAL_CATEGORIES)
+
+    def signal_codes(self) -> np.ndarray:
+        """
+        返回 signal 列的整数编码（BUY_CODE/SELL_CODE/HOLD_CODE，缺失为 -1），
+        signal 列被替换为非 Categorical 时现场重新规范
+        """
+        signals = self.df['signal']
+        if not isinstance(signals.dtype, pd.CategoricalDtype) or \
+                list(signals.cat.categories) != self.SIGNAL_CATEGORIES:
+            return np.asarray(self.normalize_signals(signals).codes)
+        return signals.cat.codes.to_numpy()
+
+    @classmethod
+    def validate_schema(cls, df: pd.DataFrame):
+        """
+        校验信号 DataFrame 包含必需的列与索引层级
+        """
+        if not cls.REQUIRED_COLUMNS.issubset(df.columns):
+            raise ValueError(f"Signal 数据缺少必需的列: {set(cls.REQUIRED_COLUMNS.difference(df.columns))}")
+        if not cls.REQUIRED_INDEX.issubset(df.index.names):
+            raise ValueError(f"Signal 数据缺少必需的索引: {set(cls.REQUIRED_INDEX.difference(df.index.names))}")
 
     def _validate(self, df: pd.DataFrame, current_time: pd.Timestamp):
-        missing_cols = self.REQUIRED_COLUMNS - set(df.columns)
-        missing_index = self.REQUIRED_INDEX - set(df.index.names)
-        if missing_cols:
-            raise ValueError(f"Signal 数据缺少必需的列: {missing_cols}")
-        if missing_index:
-            raise ValueError(f"Signal 数据缺少必需的索引: {missing_index}")
-        # 检查索引中的日期是否存在未来数据
-        trade_dates = df.index.get_level_values('trade_date')
-        if (trade_dates > current_time).any():
+        self.validate_schema(df)
+        # 检查索引中的日期是否存在未来数据：只需比较最大日期，无需生成整列布尔数组
+        if len(df) > 0 and df.index.get_level_values('trade_date').max() > current_time:
             warnings.warn("Signal 数据包含未来数据", UserWarning)
 
+    def side_positions(self, side_code: int) -> np.ndarray:
+        """
+        返回指定方向信号所在的行位置（保持原有顺序）。
+        首次调用时对 signal 编码做一次稳定排序，把各方向的行位置一次分好桶，之后只做字典查询。
+        :param side_code: BUY_CODE / SELL_CODE / HOLD_CODE
+        :return: 行位置，int64 数组
+        """
+        if self._side_positions_df is not self.df:
+            codes = self.signal_codes()
+            order = np.argsort(codes, kind='stable')
+            sorted_codes = codes[order]
+            all_codes = np.arange(len(self.SIGNAL_CATEGORIES))
+            bounds = np.searchsorted(sorted_codes, np.r_[all_codes, len(all_codes)])
+            self._side_positions = {code: order[bounds[code]:bounds[code + 1]] for code in all_codes.tolist()}
+            self._side_positions_df = self.df
+        return self._side_positions.get(side_code, np.empty(0, dtype=np.int64))
+
+    def by_side(self, side: str) -> pd.DataFrame:
+        """
+        返回指定方向（'BUY' / 'SELL' / 'HOLD'，不区分大小写）的信号行
+        """
+        side_code = self.SIGNAL_CATEGORIES.index(side.upper())
+        return self.df.iloc[self.side_positions(side_code)]
+
     def get(self):
         return self.df
 
@@ -38,6 +118,24 @@ class Signal:
         return f"<Signal: {self.df.shape[0]} 条记录>"
 
 
+def date_row_positions(df: pd.DataFrame) -> dict:
+    """
+    一次分桶得到 交易日期 -> 当日各行位置；同一日期的行连续时用切片表示，取行时不产生拷贝索引
+    :param df: 索引包含 trade_date 层的 DataFrame
+    :return: 日期 -> slice 或 行位置数组
+    """
+    dates = df.index.get_level_values('trade_date')
+    codes, uniques = pd.factorize(dates)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    date_rows = {}
+    for date, start, stop in zip(uniques, bounds[:-1].tolist(), bounds[1:].tolist()):
+        rows = order[start:stop]
+        contiguous = rows[-1] - rows[0] == stop - start - 1
+        date_rows[date] = slice(int(rows[0]), int(rows[-1]) + 1) if contiguous else rows
+    return date_rows
+
+
 class Strategy(ABC):
     """
     策略基类
@@ -47,6 +145,17 @@ class Strategy(ABC):
 
     REQUIRED_COLUMNS = {'signal'}
     REQUIRED_INDEX = {'trade_date', 'symbol'}
+    # 为 True 时策略的信号只依赖当日及之前的数据，可以由 generate_signals_bulk() 一次算出全部时间点，
+    # 回测按日期从中取行；逐步计算才能保证因果性的策略保持 False
+    supports_bulk = False
+
+    def generate_signals_bulk(self) -> pd.DataFrame:
+        """
+        一次性生成全部时间点的信号，仅 supports_bulk 为 True 的策略需要实现。
+        Returns:
+            pd.DataFrame: index 为包含 'trade_date' 和 'symbol' 的多层索引，列同 Signal.get()
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持一次性生成全部信号")
 
     @abstractmethod
     def generate_signals(self,
@@ -75,63 +184,129 @@ class MovingAverageStrategy(Strategy):
     """
     均线策略示例：当向下偏离长周期均线到一定程度时买入，向上偏离短周期均线到一定程度时卖出。
     """
+    supports_bulk = True
+
     def __init__(self,
                  hub: Datahub,
                  indicator: str = 'close',
                  ma_buy: int = 720,
                  ma_sell: int = 180,
                  buy_bias: float = -0.3,
-                 sell_bias: float = 0.15
+                 sell_bias: float = 0.15,
+                 dtype: type = np.float32,
                  ):
+        """
+        :param dtype: 指标与均线、偏离结果的存储精度。价格精度到分，默认 float32 足够且内存带宽减半；
+                      内核内部的滚动求和始终以 float64 补偿求和累计，需要完整精度时传 np.float64
+        """
         self.hub = hub
         self.indicator = indicator
         self.ma_buy = ma_buy
         self.ma_sell = ma_sell
         self.buy_bias = buy_bias
         self.sell_bias = sell_bias
+        self.dtype = dtype
+        # 全量行情上一次性计算的均线与信号，hub.bar_df 被重新赋值后失效
+        self._signal_df = None
+        self._signal_df_src = None
+        # 交易日期 -> 全量结果中当日的行位置，随全量结果一起重建
+        self._signal_date_rows = None
 
     def generate_signals(self, current_time: pd.Timestamp, **kwargs) -> Signal:
         """
         使用父类的签名：def generate_signals(self, data: pd.DataFrame, **kwargs)
         通过 kwargs 获取策略所需的具体参数。
+        均线只依赖当日及之前的数据，因此在全量行情上一次性算好各标的的均线与信号并缓存，
+        每个时间步只取出 current_time 当日的行，不会引入未来数据。
         :param current_time:
         """
+        if self.hub.bar_df is not None:
+            signal_df = self.generate_signals_bulk()
+            # 只保留current_time的信号：按预先建好的 日期 -> 行位置 取行，不再对全量结果做 xs 筛选
+            output = signal_df.iloc[self._signal_date_rows[current_time]]
+        else:
+            # 数据源没有预先加载 bar_df（如只实现了 get_bars 的 Datahub）时，按窗口取数据现场计算
+            window = max(self.ma_buy, self.ma_sell)
+            start_date = current_time - pd.Timedelta(days=window - 1)
+            data = self.hub.get_bars(start_date=start_date, end_date=current_time)
+            rows = np.flatnonzero(data.index.get_level_values('trade_date') == current_time)
+            if len(rows) == 0:
+                raise KeyError(current_time)
+            # 均线需要整个窗口的数据，输出只构造当日的几行
+            output = self._compute_signals(data, rows)
+
+        return Signal(output, current_time)
+
+    def generate_signals_bulk(self) -> pd.DataFrame:
+        """
+        在 hub.bar_df 全量行情上一次性计算各标的的均线、偏离与信号，结果按交易日期排列（同日保持原有顺序），
+        缓存到 bar_df 被重新赋值为止。
+        """
+        bar_df = self.hub.bar_df
+        if self._signal_df_src is not bar_df:
+            signal_df = self._compute_signals(bar_df)
+            # 未按日期排序时稳定排序一次，使每个交易日的行都连续，按日期取行只是一次切片
+            if not signal_df.index.get_level_values('trade_date').is_monotonic_increasing:
+                signal_df = signal_df.iloc[np.argsort(signal_df.index.get_level_values('trade_date').values,
+                                                      kind='stable')]
+            self._signal_df = signal_df
+            self._signal_date_rows = date_row_positions(signal_df)
+            self._signal_df_src = bar_df
+        return self._signal_df
+
+    @staticmethod
+    def _build_soa(data: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        把 (trade_date, symbol) 长表排成按标的分段的列式布局：同一标的的行连续存放、段内按日期排序。
+        各标的的行数可以不同，同一 (日期, 标的) 的重复行也原样保留，因此不展开成 (日期 × 标的) 的稠密矩阵。
+        :param data: 行情数据，索引包含 trade_date 与 symbol 两层
+        :return: (order, offsets)
+                 - order: 排序后第 i 个元素在 data 中的行位置
+                 - offsets: 各标的分段的起止位置，第 k 个标的为 order[offsets[k]:offsets[k + 1]]
+        """
+        symbol_codes, symbols = pd.factorize(data.index.get_level_values('symbol'))
+        dates = data.index.get_level_values('trade_date').values
+        order = np.lexsort((dates, symbol_codes))
+        offsets = np.zeros(len(symbols) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(symbol_codes, minlength=len(symbols)), out=offsets[1:])
+        return order, offsets
 
-        # 1) 从 kwargs 中获取所需参数，若不存在则设默认值
+    def _compute_signals(self, data: pd.DataFrame, rows: np.ndarray = None) -> pd.DataFrame:
+        """
+        对一段行情数据按标的计算长短均线、偏离与信号（signal 为 Categorical，无信号时缺失）。
+        :param data: 行情数据，索引包含 trade_date 与 symbol 两层
+        :param rows: 只输出这些行位置的结果，均线仍在 data 全部数据上计算；为 None 时输出全部行
+        :return: 与 data（或 data 中 rows 各行）一一对应的
+                 [signal, 指标, close, buy_ma, sell_ma, buy_bias_val, sell_bias_val]
+        """
         indicator = self.indicator
-        ma_buy = self.ma_buy
-        ma_sell = self.ma_sell
-        buy_bias = self.buy_bias
-        sell_bias = self.sell_bias
-
-        window = max(ma_buy, ma_sell)
-        start_date = current_time - pd.Timedelta(days=window - 1)
-
-        data = self.hub.get_bars(start_date=start_date, end_date=current_time).copy()
-
-        # 2) 计算长短均线
-        # 将指标列转换为 NumPy 数组（建议提前保证数据类型合适，比如 float32 或 float64）
-        indicator_values = data[indicator].values.astype(np.float64)
-        data['buy_ma'] = moving_average(indicator_values, ma_buy)
-        data['sell_ma'] = moving_average(indicator_values, ma_sell)
-
-        # 3) 计算偏离
-        data['buy_bias_val'] = (data[indicator] - data['buy_ma']) / data['buy_ma']
-        data['sell_bias_val'] = (data[indicator] - data['sell_ma']) / data['sell_ma']
-
-        # 4) 生成 signal
-        data['signal'] = np.where(
-            data['sell_bias_val'] > sell_bias, 'SELL',
-            np.where(data['buy_bias_val'] < buy_bias, 'BUY', None)
-        )
-
-        # 5) 整理输出
-        full_output = data[['signal', indicator, 'close', 'buy_ma', 'sell_ma', 'buy_bias_val', 'sell_bias_val']].copy()
-        # 只保留current_time的信号
-        output = full_output.xs(
-                    key=current_time,
-                    level='trade_date',
-                    drop_level=False
-                )
 
-        return Signal(output, current_time)
+        # 1) 按标的分段的列式布局：每个标的的数据连续存放、段内按日期排序，内核逐段滚动计算
+        order, offsets = self._build_soa(data)
+        indicator_values = data[indicator].to_numpy(dtype=self.dtype)[order]
+
+        # 2) 融合内核单次遍历算出长短均线、偏离与信号编码，再按输出行取回各行在排序后数组中的结果
+        results = ma_bias_signal_kernel(indicator_values, offsets, self.ma_buy, self.ma_sell,
+                                        self.buy_bias, self.sell_bias)
+        sorted_pos = np.empty(len(order), dtype=np.intp)
+        sorted_pos[order] = np.arange(len(order))
+        index = data.index
+        indicator_col = data[indicator].to_numpy()
+        close_col = data['close'].to_numpy()
+        if rows is not None:
+            # 只取需要的行，不为整段数据构造输出列
+            sorted_pos = sorted_pos[rows]
+            index = index[rows]
+            indicator_col = indicator_col[rows]
+            close_col = close_col[rows]
+        buy_ma, sell_ma, buy_bias_val, sell_bias_val, codes = (values[sorted_pos] for values in results)
+
+        # 3) 信号编码与 Signal 一致，直接构造 Categorical，无信号记为缺失
+        signal = pd.Categorical.from_codes(codes, categories=Signal.SIGNAL_CATEGORIES)
+
+        # 4) 整理输出：直接由数组构造，不复制也不改动 data；indicator 为 close 时保留两列同名的 close
+        names = ['signal', indicator, 'close', 'buy_ma', 'sell_ma', 'buy_bias_val', 'sell_bias_val']
+        arrays = [signal, indicator_col, close_col, buy_ma, sell_ma, buy_bias_val, sell_bias_val]
+        output = pd.DataFrame(dict(enumerate(arrays)), index=index, copy=False)
+        output.columns = names
+        return output
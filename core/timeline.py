@@ -1,5 +1,9 @@
+import logging
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 
 class Timeline:
     def __init__(
@@ -19,6 +23,10 @@ class Timeline:
         self.how = how
         self.fillna = fillna
 
+        # 主时间轴缓存，bar_df 被重新赋值后自动失效
+        self._main_timeline = None
+        self._main_timeline_df = None
+
     def get_main_timeline(
             self,
     ) -> list[pd.Timestamp]:
@@ -30,24 +38,38 @@ class Timeline:
         if self.bar_df is None or self.bar_df.empty:
             raise ValueError("无数据输入")
 
+        if self._main_timeline_df is self.bar_df:
+            return self._main_timeline
+
         if self.how == 'union':
-            # 获取所有 daily 数据中的日期并集
-            main_timeline = self.bar_df.index.get_level_values(0).unique()
-
-            # 针对 daily 数据的每个 symbol 检查主时间线中缺失的日期
-            daily_symbols = self.bar_df.index.get_level_values(1).unique()
-            for sym in daily_symbols:
-                # 获取该 symbol 在 daily 数据中出现的所有日期
-                sym_dates = self.bar_df.loc[(slice(None), sym), :].index.get_level_values(0).unique()
-                # 缺失的日期：在主时间线中，但该 symbol 未出现的数据日期
-                missing_dates = main_timeline.difference(sym_dates)
-                if not missing_dates.empty:
-                    print(f"[INFO] Daily 数据中 symbol '{sym}' 缺失日期: {sorted(missing_dates)}")
+            # 获取所有 daily 数据中的日期并集：直接在 int64 纳秒值上编码，
+            # 编码结果同时给出主时间轴（按首次出现顺序）和每行所属日期
+            date_level = self.bar_df.index.get_level_values(0)
+            date_values = date_level.values
+            date_codes, unique_dates = pd.factorize(date_values.view(np.int64))
+            main_timeline = pd.DatetimeIndex(unique_dates.view(date_values.dtype), name=date_level.name)
+
+            # 针对 daily 数据的每个 symbol 检查主时间线中缺失的日期，仅用于输出日志，未开启 INFO 日志时跳过：
+            # 把 (symbol, 日期) 编码后一次性填入 symbol × 日期 的存在性矩阵，避免逐个 symbol 切片；
+            # 缺失的格子一次取出（按 symbol 排列），再按 symbol 切分
+            if logger.isEnabledFor(logging.INFO):
+                sym_codes, daily_symbols = pd.factorize(self.bar_df.index.get_level_values(1))
+                present = np.zeros((len(daily_symbols), len(main_timeline)), dtype=bool)
+                present[sym_codes, date_codes] = True
+                missing_syms, missing_dates = np.nonzero(~present)
+                if len(missing_syms) > 0:
+                    # 缺失的日期：在主时间线中，但该 symbol 未出现的数据日期
+                    syms, starts = np.unique(missing_syms, return_index=True)
+                    for sym, dates in zip(syms, np.split(missing_dates, starts[1:])):
+                        logger.info("Daily 数据中 symbol '%s' 缺失日期: %s",
+                                    daily_symbols[sym], sorted(main_timeline[dates]))
         else:
             pass
 
         # TODO: 实现向前补充值
 
+        self._main_timeline = main_timeline
+        self._main_timeline_df = self.bar_df
         return main_timeline
 
     def timeseries_iterator(self):
@@ -0,0 +1,138 @@
+import pandas as pd
+import pytest
+from core.datahub import LocalDataHub
+from core.strategy import Strategy, Signal
+from core.position_manager import PositionManager
+from core.portfolio import Portfolio
+from core.broker import Order
+from core.backtester import BackTester
+
+
+@pytest.fixture
+def hub(tmp_path):
+    """
+    两只标的、一个 benchmark 的 3 日行情
+    """
+    dates = pd.date_range("2021-01-01", periods=3, freq="D")
+    daily = pd.concat([
+        pd.DataFrame({"trade_date": dates, "ts_code": "A", "close": [10.0, 11.0, 12.0]}),
+        pd.DataFrame({"trade_date": dates, "ts_code": "B", "close": [20.0, 21.0, 22.0]}),
+    ])
+    bench = pd.DataFrame({"trade_date": dates, "ts_code": "bench1", "close": [100.0, 101.0, 102.0]})
+    daily_path = tmp_path / "daily.csv"
+    bench_path = tmp_path / "benchmark.csv"
+    daily.to_csv(daily_path, index=False)
+    bench.to_csv(bench_path, index=False)
+    return LocalDataHub({
+        "bar": {
+            "daily": [{"path": str(daily_path), "col_mapping": {"ts_code": "symbol"}}],
+            "benchmark": [{"path": str(bench_path), "col_mapping": {"ts_code": "symbol"}}],
+        }
+    })
+
+
+class EmptyStrategy(Strategy):
+    def generate_signals(self, current_time, **kwargs):
+        index = pd.MultiIndex.from_arrays([[], []], names=['trade_date', 'symbol'])
+        return Signal(pd.DataFrame({'close': [], 'signal': []}, index=index), current_time)
+
+
+class MultiLegPositionManager(PositionManager):
+    """
+    首日对 A 下两笔买单、对 B 下一笔买单；次日对 A 下两笔卖单
+    """
+
+    def transform_signals_to_orders(self, signals, portfolio, data, current_time, **kwargs):
+        if current_time == pd.Timestamp("2021-01-01"):
+            rows = [("A", "BUY", 100, 10.0), ("B", "BUY", 100, 20.0), ("A", "BUY", 200, 10.0)]
+        elif current_time == pd.Timestamp("2021-01-02"):
+            rows = [("A", "SELL", 100, 11.0), ("A", "SELL", 50, 11.0)]
+        else:
+            rows = []
+        return Order(pd.DataFrame(
+            [(current_time, asset, side, qty, price) for asset, side, qty, price in rows],
+            columns=['date', 'asset', 'side', 'quantity', 'trade_price'],
+        ))
+
+
+class RecordingPortfolio(Portfolio):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def buy(self, order):
+        self.calls.append(('BUY', tuple(order.get()['asset'].unique()), len(order.get())))
+        super().buy(order)
+
+    def sell(self, order):
+        self.calls.append(('SELL', tuple(order.get()['asset'].unique()), len(order.get())))
+        super().sell(order)
+
+
+def test_each_side_asset_dispatched_once_per_bar(hub):
+    """
+    测试同一 (side, asset) 的多笔订单每个 bar 只派发一次，且不会重复成交
+    """
+    portfolio = RecordingPortfolio(initial_cash=100000)
+    tester = BackTester(data=hub, strategy=EmptyStrategy(),
+                        position_manager=MultiLegPositionManager(), portfolio=portfolio)
+    observer = tester.run_backtest()
+
+    assert portfolio.calls == [
+        ('BUY', ('A',), 2),
+        ('BUY', ('B',), 1),
+        ('SELL', ('A',), 2),
+    ]
+    assert len(portfolio.trade_log) == 5
+    holding = portfolio.asset.set_index('asset')['quantity']
+    assert holding['A'] == 150
+    assert holding['B'] == 100
+    assert portfolio.cash == 100000 - 3000 - 2000 + 150 * 11.0
+    # 最后一日按各自收盘价估值
+    assert observer.results['total_value'].iloc[-1] == round(portfolio.cash + 150 * 12.0 + 100 * 22.0)
+
+
+class BulkStrategy(Strategy):
+    """
+    一次性给出全部信号：首日买入 A，第三日卖出 A；逐步生成信号的接口不应被调用
+    """
+    supports_bulk = True
+
+    def __init__(self):
+        self.bulk_calls = 0
+
+    def generate_signals_bulk(self):
+        self.bulk_calls += 1
+        index = pd.MultiIndex.from_tuples(
+            [(pd.Timestamp("2021-01-01"), "A"), (pd.Timestamp("2021-01-03"), "A")],
+            names=['trade_date', 'symbol'])
+        return pd.DataFrame({'close': [10.0, 12.0], 'signal': ['BUY', 'SELL']}, index=index)
+
+    def generate_signals(self, current_time, **kwargs):
+        raise AssertionError("bulk 策略不应逐步生成信号")
+
+
+class SignalRecordingPositionManager(PositionManager):
+    def __init__(self):
+        self.seen = []
+
+    def transform_signals_to_orders(self, signals, portfolio, data, current_time, **kwargs):
+        self.seen.append((current_time, signals.get()['signal'].tolist()))
+        return Order(pd.DataFrame(columns=['date', 'asset', 'side', 'quantity', 'trade_price']))
+
+
+def test_bulk_signals_indexed_by_date(hub):
+    """
+    测试 supports_bulk 的策略只生成一次全部信号，回测按日期取出当日信号，无信号的日期为空
+    """
+    strategy = BulkStrategy()
+    manager = SignalRecordingPositionManager()
+    BackTester(data=hub, strategy=strategy, position_manager=manager,
+               portfolio=Portfolio(initial_cash=100000)).run_backtest()
+
+    assert strategy.bulk_calls == 1
+    assert manager.seen == [
+        (pd.Timestamp("2021-01-01"), ['BUY']),
+        (pd.Timestamp("2021-01-02"), []),
+        (pd.Timestamp("2021-01-03"), ['SELL']),
+    ]
@@ -0,0 +1,85 @@
+import pandas as pd
+import numpy as np
+import pytest
+from core.broker import Order
+
+
+@pytest.fixture
+def order_df():
+    return pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01'), pd.Timestamp('2023-01-01')],
+        'asset': ['A', 'B'],
+        'side': ['SELL', 'BUY'],
+        'quantity': [100, 200],
+        'trade_price': [10.0, 20.0]
+    })
+
+
+def test_order_missing_columns(order_df):
+    """测试缺少必需列时抛出异常，并在信息中列出缺失的列"""
+    with pytest.raises(ValueError, match="trade_price"):
+        Order(order_df.drop(columns=['trade_price']))
+
+
+def test_order_from_validated(order_df):
+    """测试 from_validated 直接包装子订单"""
+    order = Order(order_df)
+    sub_order = Order.from_validated(order.get().iloc[[1]])
+    assert isinstance(sub_order, Order)
+    assert sub_order.get()['asset'].tolist() == ['B']
+    assert repr(sub_order) == "<Order: 1 条记录>"
+
+
+def test_order_log(order_df, caplog):
+    """测试订单明细仅在对应日志级别启用时输出"""
+    order = Order(order_df)
+    with caplog.at_level("INFO", logger="core.broker"):
+        order.log()
+    assert "产生订单" not in caplog.text
+
+    with caplog.at_level("DEBUG", logger="core.broker"):
+        order.log()
+    assert "产生订单" in caplog.text
+
+
+def test_encode_sides():
+    """测试 side 编码：BUY=0，SELL=1，其他为 -1"""
+    codes = Order.encode_sides(['BUY', 'SELL', 'HOLD'])
+    assert codes.dtype == 'int8'
+    assert codes.tolist() == [Order.BUY_CODE, Order.SELL_CODE, -1]
+
+
+def test_side_codes(order_df):
+    """测试无 side_code 列时按 side 现场编码，有 side_code 列时直接使用"""
+    assert Order(order_df).side_codes().tolist() == [Order.SELL_CODE, Order.BUY_CODE]
+
+    coded = order_df.assign(side_code=Order.encode_sides(order_df['side']))
+    assert Order(coded).side_codes().tolist() == [Order.SELL_CODE, Order.BUY_CODE]
+
+
+def test_order_from_arrays(order_df):
+    """测试由列数组构造订单：按列取数不构造 DataFrame，读取 df 时与由 DataFrame 构造的订单一致"""
+    order = Order.from_arrays(
+        date=order_df['date'].to_numpy(),
+        asset=order_df['asset'].to_numpy(),
+        side=order_df['side'].to_numpy(),
+        quantity=order_df['quantity'].to_numpy(),
+        trade_price=order_df['trade_price'].to_numpy(),
+        side_code=Order.encode_sides(order_df['side']),
+    )
+    assert len(order) == 2
+    assert order.column('asset').tolist() == ['A', 'B']
+    assert order.side_codes().tolist() == [Order.SELL_CODE, Order.BUY_CODE]
+    assert order._df is None
+    pd.testing.assert_frame_equal(order.get().drop(columns='side_code'), order_df)
+
+
+def test_order_take(order_df):
+    """测试按行位置取子订单，列式订单与 DataFrame 订单结果一致"""
+    arrays = {col: order_df[col].to_numpy() for col in order_df.columns}
+    for order in (Order(order_df), Order.from_arrays(**arrays)):
+        sub_order = order.take(np.array([1]))
+        assert isinstance(sub_order, Order)
+        assert sub_order.column('asset').tolist() == ['B']
+        assert sub_order.column('quantity').tolist() == [200]
+        assert repr(sub_order) == "<Order: 1 条记录>"
@@ -4,7 +4,7 @@ import pandas as pd
 import pytest
 from datetime import datetime
 import numpy as np
-from core.datahub import LocalDataHub
+from core.datahub import LocalDataHub, ParquetDataHub, _is_sorted_by_date_symbol
 
 
 # ========== Fixture：构造测试所需的 CSV 文件 ==========
@@ -263,7 +263,7 @@ def test_missing_info_file(tmp_path, data_dict):
 
     hub = LocalDataHub(data_dict_modified)
     hub.load_info_data()
-    # 根据代码逻辑，当文件不存在时，会打印警告，并将 bar_df 置为空（info_df 保持 None）
+    # 根据代码逻辑，当文件不存在时，会打印警告，info_df 保持 None
     assert hub.info_df is None
 
 
@@ -295,6 +295,19 @@ def test_load_fundamental_data(data_dict):
     assert hub.fundamental_df is None
 
 
+def test_get_data_by_date_unsorted(data_dict):
+    """
+    测试 bar_df 未按日期排序时 get_data_by_date 的快照与排序时一致
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    expected = {dt: hub.get_data_by_date(dt) for dt in hub.get_trade_dates()}
+    hub.bar_df = hub.bar_df.sort_index(level=1)
+    for dt, snapshot in expected.items():
+        pd.testing.assert_frame_equal(hub.get_data_by_date(dt), snapshot)
+    assert hub.get_data_by_date(pd.Timestamp("2021-01-05")).empty
+
+
 def test_get_data_by_date_no_data(data_dict):
     """
     测试在未加载数据时调用 get_data_by_date 应抛出异常
@@ -344,6 +357,23 @@ def test_get_pivot_missing(data_dict_missing):
     pd.testing.assert_frame_equal(pivot.sort_index().sort_index(axis=1), expected)
 
 
+def test_get_pivot_benchmark(data_dict):
+    """
+    测试 benchmark=True 时透视 benchmark 数据
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    pivot = hub.get_pivot("close", benchmark=True)
+
+    expected = pd.DataFrame({
+        "bench1": [100.0, 101.0]
+    }, index=pd.to_datetime(["2021-01-01", "2021-01-02"]))
+    expected.index.name = "trade_date"
+    expected.columns.name = "symbol"
+
+    pd.testing.assert_frame_equal(pivot.sort_index(), expected)
+
+
 def test_get_pivot_invalid_indicator(data_dict):
     """
     测试当传入不存在的指标时，get_pivot 抛出 ValueError 异常
@@ -360,4 +390,412 @@ def test_get_pivot_without_loading_data(data_dict):
     """
     hub = LocalDataHub(data_dict)
     with pytest.raises(ValueError, match=re.escape("未加载时序数据，请先调用 load_bar_data()。")):
-        hub.get_pivot("open")
\ No newline at end of file
+        hub.get_pivot("open")
+
+
+# ========== 测试 ParquetDataHub ==========
+
+@pytest.fixture
+def parquet_data_dict(tmp_path):
+    """
+    构造 Parquet 格式的 daily 与 benchmark 数据，trade_date 存为时间戳类型
+    """
+    pytest.importorskip("pyarrow")
+    daily = pd.DataFrame({
+        "trade_date": pd.to_datetime(["2021-01-01", "2021-01-02", "2021-01-03"] * 2),
+        "ts_code": ["000001.SH"] * 3 + ["000002.SH"] * 3,
+        "open_price": [10.0, 10.5, 11.0, 20.0, 20.5, 21.0],
+    })
+    benchmark = pd.DataFrame({
+        "trade_date": pd.to_datetime(["2021-01-01", "2021-01-02", "2021-01-03"]),
+        "ts_code": ["bench1"] * 3,
+        "close_price": [100.0, 101.0, 102.0],
+    })
+    daily_path = tmp_path / "daily.parquet"
+    benchmark_path = tmp_path / "benchmark.parquet"
+    daily.to_parquet(daily_path, index=False)
+    # benchmark 带索引写出，读取时应还原为普通列
+    benchmark.set_index(["trade_date", "ts_code"]).to_parquet(benchmark_path)
+    mapping = {"trade_date": "trade_date", "ts_code": "symbol", "open_price": "open", "close_price": "close"}
+    return {
+        "bar": {
+            "daily": [{"path": str(daily_path), "col_mapping": mapping}],
+            "benchmark": [{"path": str(benchmark_path), "col_mapping": mapping}],
+        }
+    }
+
+
+def test_parquet_load_bar_data(parquet_data_dict):
+    """
+    测试 ParquetDataHub 加载结果与 LocalDataHub 结构一致：MultiIndex (trade_date, symbol)
+    """
+    hub = ParquetDataHub(parquet_data_dict)
+    hub.load_bar_data()
+
+    assert isinstance(hub.bar_df.index, pd.MultiIndex)
+    assert list(hub.bar_df.index.names) == ["trade_date", "symbol"]
+    assert len(hub.bar_df) == 6
+    assert hub.bar_df.loc[(pd.Timestamp("2021-01-02"), "000002.SH"), "open"] == 20.5
+    assert (pd.Timestamp("2021-01-03"), "bench1") in hub.benchmark_df.index
+
+
+def test_parquet_filters_pushdown(parquet_data_dict):
+    """
+    测试日期区间与 symbol 过滤生效
+    """
+    hub = ParquetDataHub(parquet_data_dict)
+    hub.load_bar_data(start_date=pd.Timestamp("2021-01-02"),
+                      end_date=pd.Timestamp("2021-01-03"),
+                      symbols=["000001.SH"])
+
+    expected_index = pd.MultiIndex.from_tuples(
+        [(pd.Timestamp("2021-01-02"), "000001.SH"), (pd.Timestamp("2021-01-03"), "000001.SH")],
+        names=["trade_date", "symbol"],
+    )
+    pd.testing.assert_index_equal(hub.bar_df.index, expected_index)
+    assert hub.benchmark_df.index.get_level_values(0).min() == pd.Timestamp("2021-01-02")
+
+
+def test_parquet_string_dates(tmp_path):
+    """
+    测试 trade_date 以字符串存储时不下推日期过滤，仍能在读取后正确过滤
+    """
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({
+        "trade_date": ["2021-01-01", "2021-01-02"],
+        "symbol": ["A", "A"],
+        "close": [1.0, 2.0],
+    })
+    path = tmp_path / "daily.parquet"
+    df.to_parquet(path, index=False)
+    hub = ParquetDataHub({"bar": {"daily": [{"path": str(path)}], "benchmark": []}})
+    hub.load_bar_data(start_date=pd.Timestamp("2021-01-02"), end_date=pd.Timestamp("2021-01-02"))
+    assert hub.bar_df["close"].tolist() == [2.0]
+
+
+def test_parquet_cache(data_dict):
+    """
+    测试 parquet_cache：首次加载写出缓存，之后直接读缓存且结果与 CSV 一致；CSV 更新后缓存重建
+    """
+    pytest.importorskip("pyarrow")
+    csv_hub = LocalDataHub(data_dict)
+    csv_hub.load_bar_data()
+
+    hub = LocalDataHub(data_dict, parquet_cache=True)
+    hub.load_bar_data()
+    daily_path = data_dict["bar"]["daily"][0]["path"]
+    cache_path = daily_path + ".parquet"
+    assert os.path.exists(cache_path)
+    pd.testing.assert_frame_equal(hub.bar_df, csv_hub.bar_df)
+
+    # 第二次加载走缓存，过滤条件同样生效
+    hub.load_bar_data(start_date=pd.Timestamp("2021-01-02"),
+                      end_date=pd.Timestamp("2021-01-02"),
+                      symbols=["000002.SH"])
+    assert hub.bar_df["open"].tolist() == [20.5]
+
+    # CSV 比缓存新时重新生成缓存
+    pd.DataFrame({"trade_date": ["2021-01-03"], "ts_code": ["000003.SH"], "open_price": [30.0]}) \
+        .to_csv(daily_path, index=False)
+    os.utime(daily_path, (os.path.getmtime(cache_path) + 10,) * 2)
+    hub.load_bar_data()
+    assert hub.bar_df.index.get_level_values("symbol").tolist() == ["000003.SH"]
+
+
+def test_parquet_cache_sorted_and_info(tmp_path, data_dict):
+    """
+    测试 parquet 缓存按 (日期, symbol) 排序写出，info 数据同样走缓存
+    """
+    pytest.importorskip("pyarrow")
+    unsorted = pd.DataFrame({"trade_date": ["2021-01-02", "2021-01-01", "2021-01-01"],
+                             "ts_code": ["000001.SH", "000002.SH", "000001.SH"],
+                             "open_price": [10.5, 20.0, 10.0]})
+    daily_path = tmp_path / "daily_unsorted.csv"
+    unsorted.to_csv(daily_path, index=False)
+    data_dict["bar"]["daily"][0]["path"] = str(daily_path)
+
+    hub = LocalDataHub(data_dict, parquet_cache=True)
+    hub.load_all_data()
+    cached = pd.read_parquet(str(daily_path) + ".parquet")
+    assert cached["ts_code"].tolist() == ["000001.SH", "000002.SH", "000001.SH"]
+    assert hub.bar_df["open"].tolist() == [10.0, 20.0, 10.5]
+
+    assert os.path.exists(data_dict["info"]["path"] + ".parquet")
+    assert hub.info_df.loc["000002.SH", "name"] == "Another Corp"
+
+
+def test_load_with_dtypes(data_dict):
+    """
+    测试 col_mapping 之外的 dtypes 配置：按标准字段名指定类型，读取阶段即完成解析
+    """
+    data_dict["bar"]["daily"][0]["dtypes"] = {"open": "float32"}
+    data_dict["info"]["dtypes"] = {"name": "string"}
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+
+    assert hub.bar_df["open"].dtype == np.float32
+    assert hub.bar_df.index.get_level_values("trade_date").dtype == "datetime64[ns]"
+    assert hub.benchmark_df["close"].dtype == np.float64
+    assert hub.info_df["name"].dtype == "string"
+
+
+def test_load_csv_in_chunks(data_dict):
+    """
+    测试分块读取：块大小小于文件行数时，逐块过滤后的结果与整体读取一致
+    """
+    full_hub = LocalDataHub(data_dict)
+    full_hub.load_bar_data(start_date=pd.Timestamp("2021-01-02"),
+                           end_date=pd.Timestamp("2021-01-02"),
+                           symbols=["000001.SH", "000002.SH"])
+
+    hub = LocalDataHub(data_dict)
+    hub.chunksize = 1
+    hub.load_bar_data(start_date=pd.Timestamp("2021-01-02"),
+                      end_date=pd.Timestamp("2021-01-02"),
+                      symbols=["000001.SH", "000002.SH"])
+    pd.testing.assert_frame_equal(hub.bar_df, full_hub.bar_df)
+    assert hub.bar_df["open"].tolist() == [10.5, 20.5]
+
+
+def test_get_data_by_date_slices(data_dict):
+    """
+    测试按日期行区间取快照与 xs 结果一致，bar_df 重新赋值后缓存失效
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    for dt in [pd.Timestamp("2021-01-01"), pd.Timestamp("2021-01-02")]:
+        pd.testing.assert_frame_equal(hub.get_data_by_date(dt), hub.bar_df.xs(dt, level=0))
+    assert hub.get_data_by_date(pd.Timestamp("2021-01-05")).empty
+
+    hub.bar_df = hub.bar_df.loc[pd.Timestamp("2021-01-02"):]
+    assert hub.get_data_by_date(pd.Timestamp("2021-01-01")).empty
+    assert hub.get_data_by_date(pd.Timestamp("2021-01-02"))["open"].tolist() == [10.5, 20.5]
+
+
+def test_get_bars_symbols(data_dict):
+    """
+    测试按 symbol / symbols 在索引层取值，不存在的 symbol 被忽略
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    bars = hub.get_bars(end_date=pd.Timestamp("2021-01-02"), symbols=["000002.SH", "999999.SH"])
+    assert bars.index.get_level_values("symbol").unique().tolist() == ["000002.SH"]
+    assert bars["open"].tolist() == [20.0, 20.5]
+
+    bars = hub.get_bars(current_date=pd.Timestamp("2021-01-02"), symbol="000001.SH")
+    assert bars["open"].tolist() == [10.5]
+
+    empty = hub.get_bars(current_date=pd.Timestamp("2021-01-02"), symbol="999999.SH")
+    assert empty.empty
+    assert list(empty.columns) == ["open"]
+
+
+def test_load_bar_data_parallel(data_dict):
+    """
+    测试多进程并行读取与串行读取结果一致
+    """
+    serial = LocalDataHub(data_dict)
+    serial.load_bar_data(symbols=["000001.SH"])
+    parallel = LocalDataHub(data_dict, max_workers=2)
+    parallel.load_bar_data(symbols=["000001.SH"])
+    pd.testing.assert_frame_equal(parallel.bar_df, serial.bar_df)
+    pd.testing.assert_frame_equal(parallel.benchmark_df, serial.benchmark_df)
+
+
+def test_pyarrow_csv_engine(data_dict):
+    """
+    测试 csv_engine='pyarrow' 的读取与过滤结果与默认 pandas 解析一致
+    """
+    pytest.importorskip("pyarrow")
+    kwargs = dict(start_date=pd.Timestamp("2021-01-02"), end_date=pd.Timestamp("2021-01-02"),
+                  symbols=["000002.SH"])
+    pandas_hub = LocalDataHub(data_dict)
+    pandas_hub.load_bar_data(**kwargs)
+    arrow_hub = LocalDataHub(data_dict, csv_engine="pyarrow")
+    arrow_hub.load_bar_data(**kwargs)
+
+    pd.testing.assert_frame_equal(arrow_hub.bar_df, pandas_hub.bar_df)
+    pd.testing.assert_frame_equal(arrow_hub.benchmark_df, pandas_hub.benchmark_df)
+    assert arrow_hub.bar_df["open"].tolist() == [20.5]
+
+
+def test_pyarrow_csv_engine_schema(tmp_path):
+    """
+    测试 pyarrow 引擎按显式 schema 解析：纯数字代码保留前导零，dtypes 在解析阶段生效
+    """
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "daily.csv"
+    path.write_text("trade_date,ts_code,close_price,vol\n"
+                    "2021-01-01,000001,10.0,100\n"
+                    "2021-01-01,600000,20.0,200\n")
+    mapping = {"trade_date": "trade_date", "ts_code": "symbol", "close_price": "close", "vol": "volume"}
+    hub = LocalDataHub({"bar": {"daily": [{"path": str(path), "col_mapping": mapping,
+                                           "dtypes": {"close": "float32", "volume": "int32"}}],
+                                "benchmark": []}},
+                       csv_engine="pyarrow")
+    hub.load_bar_data(symbols=["000001"])
+    assert hub.bar_df.index.get_level_values("symbol").tolist() == ["000001"]
+    assert hub.bar_df["close"].dtype == np.float32
+    assert hub.bar_df["volume"].dtype == np.int32
+
+
+def test_invalid_csv_engine(data_dict):
+    with pytest.raises(ValueError):
+        LocalDataHub(data_dict, csv_engine="polars")
+
+
+def test_load_with_downcast(data_dict):
+    """
+    测试 downcast=True 时 float64 列降为 float32，dtypes 中显式指定的列保持不变
+    """
+    data_dict["bar"]["benchmark"][0]["dtypes"] = {"close": "float64"}
+    hub = LocalDataHub(data_dict, downcast=True)
+    hub.load_bar_data()
+    assert hub.bar_df["open"].dtype == np.float32
+    assert hub.bar_df["open"].tolist() == [10.0, 20.0, 10.5, 20.5]
+    assert hub.benchmark_df["close"].dtype == np.float64
+
+    # info 数据中的字符串列转为 category，symbol 仍作为索引
+    hub.load_info_data()
+    assert isinstance(hub.info_df["name"].dtype, pd.CategoricalDtype)
+    assert hub.info_df.loc["000001.SH", "name"] == "Test Corp"
+
+
+def test_load_glob_path(tmp_path, data_dict):
+    """
+    测试 path 中的通配符展开为多个按年拆分的文件，合并结果与单文件一致
+    """
+    mapping = data_dict["bar"]["daily"][0]["col_mapping"]
+    full = pd.read_csv(data_dict["bar"]["daily"][0]["path"])
+    for year, part in (("2020", full.iloc[:2]), ("2021", full.iloc[2:])):
+        part.to_csv(tmp_path / f"daily_{year}.csv", index=False)
+
+    expected = LocalDataHub(data_dict)
+    expected.load_all_data()
+
+    data_dict["bar"]["daily"] = [{"path": str(tmp_path / "daily_*.csv"), "col_mapping": mapping}]
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    pd.testing.assert_frame_equal(hub.bar_df, expected.bar_df)
+    # info 与 bar 并行加载，互不影响
+    pd.testing.assert_frame_equal(hub.info_df, expected.info_df)
+
+
+def test_is_sorted_by_date_symbol():
+    """
+    测试按 (trade_date, symbol) 的有序性检查：同一日期内 symbol 逆序、日期逆序都判为无序
+    """
+    dates = pd.to_datetime(["2021-01-01", "2021-01-01", "2021-01-02"])
+    assert _is_sorted_by_date_symbol(pd.DataFrame({"trade_date": dates, "symbol": ["A", "B", "A"]}))
+    assert not _is_sorted_by_date_symbol(pd.DataFrame({"trade_date": dates, "symbol": ["B", "A", "A"]}))
+    assert not _is_sorted_by_date_symbol(pd.DataFrame({"trade_date": dates[::-1], "symbol": ["A", "A", "B"]}))
+    assert _is_sorted_by_date_symbol(pd.DataFrame({"trade_date": dates[:1], "symbol": ["Z"]}))
+
+
+def test_load_unsorted_file(tmp_path, data_dict):
+    """
+    测试单个无序文件加载后按 (trade_date, symbol) 排序，同一键的行保持文件中的相对顺序
+    """
+    unsorted = pd.DataFrame({"trade_date": ["2021-01-02", "2021-01-01", "2021-01-01"],
+                             "ts_code": ["000001.SH", "000002.SH", "000001.SH"],
+                             "open_price": [10.5, 20.0, 10.0]})
+    path = tmp_path / "daily_unsorted.csv"
+    unsorted.to_csv(path, index=False)
+    data_dict["bar"]["daily"][0]["path"] = str(path)
+    hub = LocalDataHub(data_dict)
+    hub.load_bar_data()
+    assert hub.bar_df.index.is_monotonic_increasing
+    assert hub.bar_df["open"].tolist() == [10.0, 20.0, 10.5]
+
+
+def test_load_multiple_files_sorted(tmp_path, data_dict):
+    """
+    测试多个 daily 文件乱序给出时，合并结果仍按 (trade_date, symbol) 有序
+    """
+    later = pd.DataFrame({"trade_date": ["2021-01-03", "2021-01-03"],
+                          "ts_code": ["000002.SH", "000001.SH"],
+                          "open_price": [21.0, 11.0]})
+    later_path = tmp_path / "daily_later.csv"
+    later.to_csv(later_path, index=False)
+    first = data_dict["bar"]["daily"][0]
+    data_dict["bar"]["daily"] = [{"path": str(later_path), "col_mapping": first["col_mapping"]}, first]
+
+    hub = LocalDataHub(data_dict)
+    hub.load_bar_data()
+    assert hub.bar_df.index.is_monotonic_increasing
+    assert hub.bar_df["open"].tolist() == [10.0, 20.0, 10.5, 20.5, 11.0, 21.0]
+
+
+def test_get_trade_dates_and_symbols(data_dict):
+    """
+    测试交易日期与 symbol 去重取值被缓存，数据重新赋值后重新计算
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    dates = hub.get_trade_dates()
+    assert list(dates) == [pd.Timestamp("2021-01-01"), pd.Timestamp("2021-01-02")]
+    assert hub.get_trade_dates() is dates
+    assert list(hub.get_symbols()) == ["000001.SH", "000002.SH"]
+    assert list(hub.get_symbols(benchmark=True)) == ["bench1"]
+
+    # 切片后 MultiIndex.levels 仍保留 000001.SH，去重取值不应保留
+    hub.bar_df = hub.bar_df.loc[(slice(None), ["000002.SH"]), :]
+    assert list(hub.get_symbols()) == ["000002.SH"]
+    assert hub.get_bars(end_date=pd.Timestamp("2021-01-02"), symbol="000001.SH").empty
+
+
+def test_feather_cache(tmp_path, data_dict):
+    """
+    测试 Feather 缓存：首次加载写出缓存，再次加载读取缓存且结果一致；加载参数不同时使用不同缓存
+    """
+    pytest.importorskip("pyarrow")
+    cache_dir = tmp_path / "cache"
+    hub = LocalDataHub(data_dict, feather_cache_dir=str(cache_dir))
+    hub.load_bar_data()
+    expected_bar, expected_benchmark = hub.bar_df, hub.benchmark_df
+    assert len(os.listdir(cache_dir)) == 2
+
+    # 改写源文件但保持其修改时间早于缓存，仍读到原数据，说明命中了缓存
+    daily_path = data_dict["bar"]["daily"][0]["path"]
+    pd.DataFrame({"trade_date": ["2021-01-03"], "ts_code": ["000003.SH"], "open_price": [30.0]}) \
+        .to_csv(daily_path, index=False)
+    os.utime(daily_path, (0, 0))
+    cached_hub = LocalDataHub(data_dict, feather_cache_dir=str(cache_dir))
+    cached_hub.load_bar_data()
+    pd.testing.assert_frame_equal(cached_hub.bar_df, expected_bar)
+    pd.testing.assert_frame_equal(cached_hub.benchmark_df, expected_benchmark)
+
+    # 加载参数不同，不命中已有缓存，读取改写后的源文件
+    cached_hub.load_bar_data(symbols=["000003.SH"])
+    assert list(cached_hub.bar_df.index.get_level_values("symbol")) == ["000003.SH"]
+    assert len(os.listdir(cache_dir)) == 4
+
+
+def test_get_bars_current_date_matches_loc(data_dict):
+    """
+    测试按单日取快照的快速路径与按标签切片结果一致，无数据日期返回空表
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    for dt in [pd.Timestamp("2021-01-01"), pd.Timestamp("2021-01-02"), pd.Timestamp("2021-01-05")]:
+        pd.testing.assert_frame_equal(hub.get_bars(current_date=dt), hub.bar_df.loc[dt:dt])
+
+
+def test_get_bars_current_date_lru_cache(data_dict):
+    """
+    测试按单日取快照命中 LRU 缓存，超出容量时淘汰最久未用的日期，bar_df 重新赋值后缓存失效
+    """
+    hub = LocalDataHub(data_dict)
+    hub.load_all_data()
+    hub.BARS_CACHE_SIZE = 1
+    dt1, dt2 = pd.Timestamp("2021-01-01"), pd.Timestamp("2021-01-02")
+    bars = hub.get_bars(current_date=dt1)
+    assert hub.get_bars(current_date=dt1) is bars
+    hub.get_bars(current_date=dt2)
+    assert list(hub._bars_cache) == [dt2]
+
+    hub.bar_df = hub.bar_df.copy()
+    refreshed = hub.get_bars(current_date=dt2)
+    assert list(hub._bars_cache) == [dt2]
+    assert hub._bars_cache[dt2] is refreshed
+    pd.testing.assert_frame_equal(refreshed, hub.bar_df.loc[dt2:dt2])
@@ -22,6 +22,9 @@ class DummyPortfolio:
     def get_asset_last_price(self, asset):
         return self.price_dict.get(asset, 0)
 
+    def snapshot_last_prices(self):
+        return pd.Series(self.price_dict, dtype=float)
+
 
 def test_win_rate_empty():
     """测试空交易记录，返回 0.0"""
@@ -125,6 +128,21 @@ def test_drawdown():
     assert pytest.approx(dd_value, rel=1e-3) == 0.0455
 
 
+def test_drawdown_unsorted_input():
+    """
+    测试输入日期乱序时，回撤结果与有序输入一致
+    """
+    dates = pd.date_range(start="2025-01-01", periods=10, freq="D")
+    values = [100, 110, 105, 120, 115, 130, 125, 140, 135, 150]
+    df = pd.DataFrame(values, index=dates, columns=["value"])
+
+    expected_df, expected_max = drawdown(df, interval_months=1)
+    result_df, result_max = drawdown(df.iloc[::-1], interval_months=1)
+
+    pd.testing.assert_frame_equal(result_df, expected_df)
+    assert result_max == expected_max
+
+
 def test_annual_volatility():
     """
     测试年化波动率：
@@ -140,6 +158,24 @@ def test_annual_volatility():
     vol = annual_volatility(df)
     assert pytest.approx(vol, rel=1e-3) == expected_annual_vol
 
+    # Series、数组输入与 DataFrame 结果一致，缺失值被忽略
+    assert annual_volatility(df["return"]) == vol
+    assert annual_volatility(np.array(returns)) == vol
+    assert annual_volatility(np.array(returns + [np.nan])) == vol
+    assert np.isnan(annual_volatility(np.array([0.01])))
+
+
+def test_drawdown_accepts_series():
+    """
+    测试 drawdown 直接传入 Series 与传入单列 DataFrame 的结果一致
+    """
+    dates = pd.date_range(start="2025-01-01", periods=90, freq="D")
+    series = pd.Series(np.linspace(100, 80, 90) + np.sin(np.arange(90)) * 5, index=dates)
+    expected_df, expected_max = drawdown(series.to_frame(name="value"), interval_months=1)
+    result_df, result_max = drawdown(series, interval_months=1)
+    pd.testing.assert_frame_equal(result_df, expected_df)
+    assert result_max == expected_max
+
 
 def test_zero_winning_reward():
     """
@@ -254,3 +290,30 @@ def test_compute_future_return_future_days_1():
     pd.testing.assert_series_equal(
         result["end_price"], expected_end_price, check_names=False
     )
+
+
+def test_win_rate_all_closed():
+    """
+    测试没有未平仓头寸时也能直接返回闭仓胜率，而不依赖此前调用遗留的结果
+    """
+    trade_log = pd.DataFrame({
+        "asset": ["A", "A"],
+        "trade_date": pd.to_datetime(["2023-01-01", "2023-01-02"]),
+        "trade_qty": [100, -100],
+        "trade_price": [10.0, 12.0],
+    })
+    result = win_rate(trade_log, DummyPortfolio({}))
+    assert isinstance(result, float)
+    assert result == 0.0
+
+
+def test_annual_return_vectorized():
+    """
+    测试数组输入按元素计算，与逐个标量调用结果一致；起始价值非正时为 0
+    """
+    starts = np.array([100.0, 50.0, 0.0])
+    ends = np.array([120.0, 40.0, 10.0])
+    result = annual_return(starts, ends, 730)
+    expected = [annual_return(s, e, 730) for s, e in zip(starts, ends)]
+    np.testing.assert_array_equal(result, expected)
+    assert result[2] == 0.0
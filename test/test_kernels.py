@@ -0,0 +1,162 @@
+import importlib.util
+import os
+import shutil
+import sysconfig
+import pytest
+import numpy as np
+from core.kernels import (
+    settle_cash, max_drawdown, interval_max_drawdowns, record_returns, apply_buys, apply_sells
+)
+from utils.technical_process import _ma_bias_signal_kernel_jit
+
+
+def test_settle_cash_all_affordable():
+    """现金充足时逐笔扣减，返回剩余现金和 -1"""
+    cash, failed = settle_cash(1000.0, np.array([100.0, 200.0, 300.0]))
+    assert cash == 400.0
+    assert failed == -1
+
+
+def test_settle_cash_insufficient():
+    """第二笔现金不足时，返回其位置以及扣减第一笔后的现金"""
+    cash, failed = settle_cash(500.0, np.array([300.0, 300.0, 100.0]))
+    assert failed == 1
+    assert cash == 200.0
+
+
+def test_settle_cash_empty():
+    """无订单时现金不变"""
+    cash, failed = settle_cash(100.0, np.array([], dtype=np.float64))
+    assert cash == 100.0
+    assert failed == -1
+
+
+def _has_c_compiler() -> bool:
+    """按 Python 构建时记录的编译器判断本机能否编译 C 扩展"""
+    cc = (sysconfig.get_config_var("CC") or "cc").split()
+    return bool(cc) and shutil.which(cc[0]) is not None
+
+
+# AOT 测试要完整编译一次 C 扩展，耗时较长，设置 RAYQUANT_AOT_TEST=1 时才运行
+@pytest.mark.skipif(os.environ.get("RAYQUANT_AOT_TEST") != "1",
+                    reason="设置 RAYQUANT_AOT_TEST=1 以运行 AOT 编译测试")
+@pytest.mark.skipif(not _has_c_compiler(), reason="未找到 C 编译器，无法进行 AOT 编译")
+def test_settle_cash_aot_matches_jit(tmp_path):
+    """AOT 编译出的扩展模块与 JIT 版本结果一致"""
+    numba = pytest.importorskip("numba")
+    pytest.importorskip("numba.pycc")
+    if numba.config.DISABLE_JIT:
+        pytest.skip("NUMBA_DISABLE_JIT 下无法进行 AOT 编译")
+    from core import kernels, kernels_aot
+
+    kernels_aot.build_cc(str(tmp_path)).compile()
+    spec = importlib.util.spec_from_file_location(
+        "core_kernels", next(tmp_path.glob("core_kernels*")))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    costs = np.array([300.0, 300.0, 100.0])
+    assert module.settle_cash(500.0, costs) == kernels._settle_cash_jit(500.0, costs)
+    assert module.settle_cash(1000.0, costs) == kernels._settle_cash_jit(1000.0, costs)
+    values = np.array([100.0, 120.0, 90.0, 130.0])
+    assert module.max_drawdown(values) == kernels._max_drawdown_jit(values)
+    matrix = np.column_stack([values, values[::-1]])
+    bounds = np.array([0, 2], dtype=np.int64), np.array([2, 4], dtype=np.int64)
+    np.testing.assert_array_equal(module.interval_max_drawdowns(matrix, *bounds),
+                                  kernels._interval_max_drawdowns_jit(matrix, *bounds))
+    for expected, result in zip(kernels._record_returns_jit(values, 100.0, 0.01),
+                                module.record_returns(values, 100.0, 0.01)):
+        np.testing.assert_array_equal(result, expected)
+    for apply in (kernels._apply_buys_jit, module.apply_buys):
+        qty, cost, cur = np.array([0, 100], dtype=np.int64), np.array([0.0, 10.0]), np.array([0.0, 11.0])
+        apply(qty, cost, cur, np.array([0, 1], dtype=np.int64), np.array([50, 100], dtype=np.int64),
+              np.array([8.0, 12.0]))
+        np.testing.assert_array_equal(cost, [8.0, 11.0])
+    sell_results = []
+    for apply in (kernels._apply_sells_jit, module.apply_sells):
+        qty, cur = np.array([100], dtype=np.int64), np.array([10.0])
+        sell_results.append((apply(0.0, qty, cur, np.array([0, -1], dtype=np.int64),
+                                   np.array([40, 1], dtype=np.int64), np.array([9.0, 1.0])), qty[0], cur[0]))
+    assert sell_results[0] == sell_results[1]
+    values = np.round(100 + np.cumsum(np.random.default_rng(0).normal(0, 3, 60)), 2)
+    offsets = np.array([0, 40, 60], dtype=np.int64)
+    for dtype, aot_kernel in ((np.float32, module.ma_bias_signal_kernel_f4),
+                              (np.float64, module.ma_bias_signal_kernel_f8)):
+        args = (values.astype(dtype), offsets, 10, 5, -0.03, 0.03)
+        for expected, result in zip(_ma_bias_signal_kernel_jit(*args), aot_kernel(*args)):
+            assert result.dtype == expected.dtype
+            np.testing.assert_array_equal(result, expected)
+
+
+def test_max_drawdown():
+    """单次遍历得到最大回撤及其高点、低点位置，与 cummax 计算结果一致"""
+    values = np.array([100.0, 120.0, 90.0, 130.0, 104.0, 110.0])
+    max_dd, peak_idx, trough_idx = max_drawdown(values)
+    cummax = np.maximum.accumulate(values)
+    assert max_dd == pytest.approx(((cummax - values) / cummax).max())
+    assert (peak_idx, trough_idx) == (1, 2)
+
+
+def test_max_drawdown_nan_and_empty():
+    """NaN 被跳过，没有有效数据时返回 nan"""
+    max_dd, peak_idx, trough_idx = max_drawdown(np.array([np.nan, 100.0, np.nan, 80.0]))
+    assert max_dd == pytest.approx(0.2)
+    assert (peak_idx, trough_idx) == (1, 3)
+    assert np.isnan(max_drawdown(np.array([], dtype=np.float64))[0])
+    assert max_drawdown(np.array([5.0, 6.0]))[0] == 0.0
+
+
+def test_interval_max_drawdowns():
+    """各区间、各列独立计算最大回撤，与逐段调用 max_drawdown 一致；空区间为 0，全 NaN 区间为 nan"""
+    values = np.array([[100.0, 50.0],
+                       [80.0, np.nan],
+                       [120.0, np.nan],
+                       [60.0, np.nan],
+                       [90.0, 40.0]])
+    starts = np.array([0, 2, 5], dtype=np.int64)
+    stops = np.array([2, 4, 5], dtype=np.int64)
+    result = interval_max_drawdowns(values, starts, stops)
+    assert result.shape == (3, 2)
+    for k in range(2):
+        for j in range(2):
+            expected = max_drawdown(values[starts[k]:stops[k], j].copy())[0]
+            np.testing.assert_equal(result[k, j], expected)
+    assert result[0, 0] == pytest.approx(0.2)
+    assert np.isnan(result[1, 1])
+    assert (result[2] == 0).all()
+
+
+def test_record_returns():
+    """逐步收益、收益率与相对收益与向量化计算一致；前值为 0 时收益率记为 0"""
+    values = np.array([0.0, 100.0, 110.0, 99.0])
+    returns, returns_pct, relative = record_returns(values, 50.0, 1 / 50.0)
+    previous = np.array([50.0, 0.0, 100.0, 110.0])
+    np.testing.assert_allclose(returns, values - previous)
+    np.testing.assert_allclose(returns_pct, [-100.0, 0.0, 10.0, -10.0])
+    np.testing.assert_allclose(relative, values / 50.0)
+
+
+def test_apply_buys():
+    """空槽位以成交价建仓，已有持仓按加权平均更新成本价，当前价格同步为成本价"""
+    qty = np.array([0, 100], dtype=np.int64)
+    cost = np.array([0.0, 10.0])
+    cur = np.array([0.0, 11.0])
+    apply_buys(qty, cost, cur, np.array([0, 1, 0], dtype=np.int64), np.array([50, 100, 50], dtype=np.int64),
+               np.array([8.0, 12.0, 10.0]))
+    np.testing.assert_array_equal(qty, [100, 200])
+    np.testing.assert_allclose(cost, [9.0, 11.0])
+    np.testing.assert_array_equal(cur, cost)
+
+
+def test_apply_sells():
+    """逐笔扣减持仓并累加现金，遇到不在持仓或数量不足的一笔即停止，此前的成交保留"""
+    qty = np.array([100, 50], dtype=np.int64)
+    cur = np.array([10.0, 20.0])
+    cash, failed = apply_sells(1000.0, qty, cur, np.array([0, 1, 1], dtype=np.int64),
+                               np.array([40, 50, 10], dtype=np.int64), np.array([9.0, 21.0, 22.0]))
+    assert (cash, failed) == (1000.0 + 360.0 + 1050.0, 2)
+    np.testing.assert_array_equal(qty, [60, 0])
+    # 清仓的槽位不更新当前价格
+    np.testing.assert_array_equal(cur, [9.0, 20.0])
+    assert apply_sells(0.0, qty, cur, np.array([-1], dtype=np.int64), np.array([1], dtype=np.int64),
+                       np.array([1.0]))[1] == 0
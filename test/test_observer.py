@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.observer import Observer
+from core.portfolio import Portfolio
+from utils.indicators import annual_return, annual_volatility, drawdown
+
+
+@pytest.fixture
+def daily_values():
+    """
+    构造 4 个交易日的组合净值与现金
+    """
+    dates = pd.date_range("2023-01-02", periods=4, freq="D")
+    total_values = [1000.0, 1100.0, 990.0, 1200.0]
+    cash = [1000.0, 500.0, 500.0, 0.0]
+    return dates, total_values, cash
+
+
+def test_record_batch_matches_record(daily_values):
+    """
+    测试 record_batch 与逐日调用 record 的结果一致
+    """
+    dates, total_values, cash = daily_values
+
+    observer_step = Observer(Portfolio())
+    for dt, value, c in zip(dates, total_values, cash):
+        observer_step.record(dt, value, c)
+
+    observer_batch = Observer(Portfolio())
+    observer_batch.record_batch(dates.to_numpy(), np.array(total_values), np.array(cash))
+
+    pd.testing.assert_frame_equal(observer_batch.results, observer_step.results, check_dtype=False)
+    assert observer_batch.initial_portfolio_value == 1000.0
+
+
+def test_record_batch_continues_previous_records(daily_values):
+    """
+    测试 record_batch 接在已有记录之后时，首日收益基于上一条记录计算
+    """
+    dates, total_values, cash = daily_values
+    observer = Observer(Portfolio())
+    observer.record(dates[0], total_values[0], cash[0])
+    observer.record_batch(dates[1:], total_values[1:], cash[1:])
+
+    assert len(observer.results) == 4
+    assert observer.results["returns"].iloc[1] == 100.0
+    assert observer.results["returns_pct"].iloc[1] == pytest.approx(10.0)
+    assert observer.results["relative_return"].iloc[-1] == pytest.approx(1.2)
+
+
+def test_record_buffers_until_results_read(daily_values):
+    """
+    测试 record 只缓存记录，读取 results 时才合并；合并后继续 record 仍接续上一条记录
+    """
+    dates, total_values, cash = daily_values
+    observer = Observer(Portfolio())
+    observer.record(dates[0], total_values[0], cash[0])
+    observer.record(dates[1], total_values[1], cash[1])
+    assert len(observer._pending_rows) == 2
+
+    assert observer.results["total_value"].tolist() == [1000.0, 1100.0]
+    assert observer._pending_rows == []
+
+    observer.record(dates[2], total_values[2], cash[2])
+    results = observer.results
+    assert list(results.columns) == Observer.RESULT_COLUMNS
+    assert results["returns"].tolist() == [0.0, 100.0, -110.0]
+    assert results["relative_return"].iloc[-1] == pytest.approx(0.99)
+
+
+def test_calculate_benchmark_metrics_matches_per_column():
+    """
+    测试按矩阵一次计算的 benchmark 指标与逐列调用 annual_return / drawdown / annual_volatility 的结果一致，
+    包括某个 benchmark 在部分日期缺失数据的情况
+    """
+    dates = pd.date_range("2023-01-01", periods=200, freq="D")
+    rng = np.random.default_rng(0)
+    prices = {
+        "A": 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates))),
+        "B": 50 * np.cumprod(1 + rng.normal(0, 0.01, len(dates))),
+    }
+    observer = Observer(Portfolio())
+    for i, dt in enumerate(dates):
+        values = {"A": prices["A"][i]}
+        # B 在中间一段日期没有数据
+        if not 50 <= i < 60:
+            values["B"] = prices["B"][i]
+        observer.record_benchmark(dt, values)
+    observer.calculate_benchmark_metrics()
+
+    df = pd.DataFrame(observer.benchmark_results).set_index("date")
+    for benchmark in ["A", "B"]:
+        series = df[benchmark]
+        total_days = (series.index[-1] - series.index[0]).days
+        _, (max_dd, _) = drawdown(series.to_frame(name="close"), 3)
+        daily_returns = pd.DataFrame({"returns_pct": series.ffill().pct_change().dropna()})
+        metrics = observer.benchmark_metrics[benchmark]
+        assert metrics["annual_return"] == annual_return(series.iloc[0], series.iloc[-1], total_days)
+        assert metrics["max_drawdown"] == max_dd
+        assert metrics["annual_volatility"] == annual_volatility(daily_returns)
+
+
+def test_relative_return_uses_initial_value(daily_values):
+    """
+    测试相对收益以首次记录的净值为基准；初始净值为 0 时相对收益为 nan 而不是抛出异常
+    """
+    dates, total_values, cash = daily_values
+    observer = Observer(Portfolio())
+    for dt, value, c in zip(dates, total_values, cash):
+        observer.record(dt, value, c)
+    expected = [value / total_values[0] for value in total_values]
+    assert observer.results["relative_return"].tolist() == pytest.approx(expected)
+
+    observer = Observer(Portfolio())
+    observer.record(dates[0], 0.0, 0.0)
+    observer.record_batch(dates[1:], total_values[1:], cash[1:])
+    assert observer.results["relative_return"].isna().all()
+
+
+def test_relative_return_frame(daily_values):
+    """
+    测试组合与 benchmark 相对收益按日期对齐：日期一致时直接拼接，不一致时外连接并按日期排序
+    """
+    dates, total_values, cash = daily_values
+    observer = Observer(Portfolio())
+    observer.record_batch(dates, total_values, cash)
+    for dt, price in zip(dates, [10.0, 11.0, 12.0, 9.0]):
+        observer.record_benchmark(dt, {"bench": price})
+
+    df_all = observer._relative_return_frame()
+    assert list(df_all.columns) == ["date", "Portfolio", "bench"]
+    assert df_all["date"].tolist() == list(dates)
+    assert df_all["Portfolio"].tolist() == pytest.approx([1.0, 1.1, 0.99, 1.2])
+    assert df_all["bench"].tolist() == pytest.approx([1.0, 1.1, 1.2, 0.9])
+
+    # benchmark 多出一个更早的日期、缺少最后一天
+    shifted = Observer(Portfolio())
+    shifted.record_batch(dates, total_values, cash)
+    for dt, price in zip([dates[0] - pd.Timedelta(days=1), *dates[:-1]], [10.0, 11.0, 12.0, 9.0]):
+        shifted.record_benchmark(dt, {"bench": price})
+    df_all = shifted._relative_return_frame()
+    assert len(df_all) == 5
+    assert df_all["date"].is_monotonic_increasing
+    assert np.isnan(df_all["Portfolio"].iloc[0]) and np.isnan(df_all["bench"].iloc[-1])
+
+    # 没有 benchmark 时只有组合一列
+    no_bench = Observer(Portfolio())
+    no_bench.record_batch(dates, total_values, cash)
+    assert list(no_bench._relative_return_frame().columns) == ["date", "Portfolio"]
+
+
+def test_reserve_matches_record(daily_values):
+    """
+    测试预分配缓冲区后逐日 record 的结果与未预分配时一致；缓冲区写满后自动合并并复用，
+    与 record_batch 交替调用时顺序与收益计算保持正确
+    """
+    dates, total_values, cash = daily_values
+    expected = Observer(Portfolio())
+    for dt, value, c in zip(dates, total_values, cash):
+        expected.record(dt, value, c)
+
+    for n_ticks in (4, 3, 1):
+        observer = Observer(Portfolio())
+        observer.reserve(n_ticks)
+        for dt, value, c in zip(dates, total_values, cash):
+            observer.record(dt, value, c)
+        pd.testing.assert_frame_equal(observer.results, expected.results, check_dtype=False)
+
+    observer = Observer(Portfolio())
+    observer.reserve(4)
+    observer.record(dates[0], total_values[0], cash[0])
+    observer.record_batch(dates[1:3], total_values[1:3], cash[1:3])
+    observer.record(dates[3], total_values[3], cash[3])
+    pd.testing.assert_frame_equal(observer.results, expected.results, check_dtype=False)
+
+
+def test_record_benchmark_fixed_columns(daily_values):
+    """
+    测试 benchmark 按固定列顺序记录：之后新出现的 benchmark 追加为新列，之前的日期记为缺失；
+    相对收益以各 benchmark 首次出现时的价格为基准，初始价格为 0 时为 NaN
+    """
+    dates, _, _ = daily_values
+    observer = Observer(Portfolio())
+    observer.record_benchmark(dates[0], {"A": 10.0, "Z": 0.0})
+    observer.record_benchmark(dates[1], {"A": 12.0})
+    observer.record_benchmark(dates[2], {"A": 11.0, "B": 5.0, "Z": 1.0})
+
+    abs_df = observer.benchmark_results
+    assert list(abs_df.columns) == ["date", "A", "Z", "B"]
+    assert abs_df["date"].tolist() == list(dates[:3])
+    assert abs_df["A"].tolist() == [10.0, 12.0, 11.0]
+    assert np.isnan(abs_df["B"].iloc[0]) and abs_df["B"].iloc[2] == 5.0
+
+    rel_df = observer.benchmark_relative_results
+    assert rel_df["A"].tolist() == pytest.approx([1.0, 1.2, 1.1])
+    assert rel_df["B"].iloc[2] == 1.0
+    assert rel_df["Z"].isna().all()
+
+    # 新记录写入后结果随之更新
+    observer.record_benchmark(dates[3], {"A": 9.0})
+    assert len(observer.benchmark_results) == 4
+
+
+def test_plot_results_traces(daily_values):
+    """
+    测试相对收益图每条曲线对应一个 trace，数据与 _relative_return_frame 一致
+    """
+    dates, total_values, cash = daily_values
+    observer = Observer(Portfolio())
+    assert observer.plot_results(show=False) is None
+
+    observer.record_batch(dates, total_values, cash)
+    for dt, price in zip(dates, [10.0, 11.0, 12.0, 9.0]):
+        observer.record_benchmark(dt, {"bench": price})
+    fig = observer.plot_results(show=False)
+    df_all = observer._relative_return_frame()
+    assert [trace.name for trace in fig.data] == ["Portfolio", "bench"]
+    assert fig.data[0].type == "scatter"
+    np.testing.assert_allclose(fig.data[1].y, df_all["bench"].to_numpy())
+
+
+def test_record_benchmark_coerces_to_float(daily_values):
+    """
+    测试 benchmark 价格写入时即转为 float：整数、float32 等输入都得到 float64 列，无法转换的值直接报错
+    """
+    dates, _, _ = daily_values
+    observer = Observer(Portfolio())
+    observer.record_benchmark(dates[0], {"A": 10, "B": np.float32(2.5)})
+    observer.record_benchmark(dates[1], {"A": "11", "B": 3.0})
+    assert (observer.benchmark_results[["A", "B"]].dtypes == np.float64).all()
+    assert observer.benchmark_initial_values == {"A": 10.0, "B": 2.5}
+    with pytest.raises(ValueError):
+        observer.record_benchmark(dates[2], {"A": "n/a"})
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from core.datahub import LocalDataHub
+from core.strategy import MovingAverageStrategy
+from core.position_manager import EqualWeightPositionManager
+from core.portfolio import Portfolio
+from core.backtester import BackTester
+from core.parallel_backtester import run_parallel
+
+
+@pytest.fixture
+def data_dict(tmp_path):
+    """
+    构造两只标的、一个 benchmark 的 60 日行情，价格先跌后涨以便触发买卖信号
+    """
+    dates = pd.date_range("2021-01-01", periods=60, freq="D")
+    prices = np.concatenate([np.linspace(100, 60, 30), np.linspace(60, 120, 30)])
+    daily = pd.concat([
+        pd.DataFrame({"trade_date": dates, "ts_code": "000001.SH", "close": prices}),
+        pd.DataFrame({"trade_date": dates, "ts_code": "000002.SH", "close": prices * 2}),
+    ])
+    bench = pd.DataFrame({"trade_date": dates, "ts_code": "bench1", "close": np.linspace(100, 110, 60)})
+    daily_path = tmp_path / "daily.csv"
+    bench_path = tmp_path / "benchmark.csv"
+    daily.to_csv(daily_path, index=False)
+    bench.to_csv(bench_path, index=False)
+    return {
+        "bar": {
+            "daily": [{"path": str(daily_path), "col_mapping": {"ts_code": "symbol"}}],
+            "benchmark": [{"path": str(bench_path), "col_mapping": {"ts_code": "symbol"}}],
+        }
+    }
+
+
+def make_config(data_dict, buy_bias):
+    hub = LocalDataHub(data_dict)
+    return {
+        "data": hub,
+        "strategy": MovingAverageStrategy(hub=hub, ma_buy=10, ma_sell=5, buy_bias=buy_bias, sell_bias=0.05),
+        "position_manager": EqualWeightPositionManager(),
+        "portfolio": Portfolio(initial_cash=1000000),
+    }
+
+
+def test_run_parallel_matches_serial(data_dict):
+    """
+    测试并行回测结果与逐个串行回测一致，且按 config 位置对应
+    """
+    biases = [-0.05, -0.1]
+    parallel = dict(run_parallel([make_config(data_dict, b) for b in biases], max_workers=2))
+    assert sorted(parallel) == [0, 1]
+
+    for i, bias in enumerate(biases):
+        serial = BackTester(**make_config(data_dict, bias)).run_backtest()
+        pd.testing.assert_frame_equal(parallel[i].results, serial.results)
+
+
+def test_run_parallel_empty():
+    """
+    测试空配置列表不启动进程，直接结束
+    """
+    assert list(run_parallel([])) == []
@@ -1,5 +1,6 @@
 import pytest
 import pandas as pd
+import numpy as np
 from core.portfolio import Portfolio
 from core.broker import Order
 
@@ -113,6 +114,25 @@ def test_buy_insufficient_cash():
         portfolio.buy(order)
 
 
+def test_buy_insufficient_cash_is_atomic():
+    """测试多笔买入中任一笔资金不足时，整张订单都不生效"""
+    portfolio = Portfolio(initial_cash=3000)
+    # 第一笔 1000 可以成交，第二笔 2500 超出剩余资金
+    order_data = pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01'), pd.Timestamp('2023-01-01')],
+        'asset': ['A', 'B'],
+        'side': ['BUY', 'BUY'],
+        'quantity': [10, 25],
+        'trade_price': [100, 100]
+    })
+    with pytest.raises(ValueError, match="现金不足，无法买入 B"):
+        portfolio.buy(Order(order_data))
+
+    assert portfolio.cash == 3000
+    assert portfolio.asset.empty
+    assert portfolio.trade_log.empty
+
+
 def test_sell_partial():
     """测试部分卖出"""
     portfolio = Portfolio(initial_cash=5000)
@@ -285,4 +305,247 @@ def test_total_value():
     dummy = DummyDatahub()
     # 使用 dummy，持仓市值 = 20*150 = 3000，总价值 = 8000 + 3000 = 11000
     total_val = portfolio.total_value(pd.Timestamp('2023-01-01'), dummy)
-    assert total_val == 11000
\ No newline at end of file
+    assert total_val == 11000
+
+
+def test_total_value_with_bars():
+    """测试传入当日行情快照时直接使用快照，不再查询 Datahub"""
+    portfolio = Portfolio(initial_cash=10000)
+    order_data_buy = pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01')],
+        'asset': ['A'],
+        'side': ['BUY'],
+        'quantity': [20],
+        'trade_price': [100]
+    })
+    portfolio.buy(Order(order_data_buy))
+
+    bars = pd.DataFrame([{'close': 120}])
+    # data 传 None，若仍去查询 Datahub 会直接报错
+    total_val = portfolio.total_value(pd.Timestamp('2023-01-01'), None, bars=bars)
+    assert total_val == 8000 + 20 * 120
+
+
+def test_get_asset_value_empty_portfolio():
+    """测试空仓时持仓市值为 0，且不查询行情"""
+    portfolio = Portfolio(initial_cash=10000)
+    assert portfolio.get_asset_value(pd.Timestamp('2023-01-01'), None) == 0.0
+    assert portfolio.total_value(pd.Timestamp('2023-01-01'), None) == 10000
+
+
+def test_get_asset_value_with_prices():
+    """测试传入当日收盘价序列时按标的逐一取价，缺失价格的标的使用 current_price"""
+    portfolio = Portfolio(initial_cash=10000)
+    order_data_buy = pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01')] * 2,
+        'asset': ['A', 'B'],
+        'side': ['BUY', 'BUY'],
+        'quantity': [20, 10],
+        'trade_price': [100, 50]
+    })
+    portfolio.buy(Order(order_data_buy))
+
+    prices = pd.Series({'A': 120.0, 'C': 999.0})
+    asset_val = portfolio.get_asset_value(pd.Timestamp('2023-01-02'), None, prices=prices)
+    assert asset_val == 20 * 120 + 10 * 50
+    total_val = portfolio.total_value(pd.Timestamp('2023-01-02'), None, prices=prices)
+    assert total_val == 7500 + 20 * 120 + 10 * 50
+
+
+def test_asset_value_with_price_vector():
+    """测试按 price_codes 从价格数组取价，缺失或不在数组中的标的使用持仓记录中的 current_price"""
+    portfolio = Portfolio(initial_cash=10000)
+    order_data_buy = pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01')] * 3,
+        'asset': ['A', 'B', 'D'],
+        'side': ['BUY'] * 3,
+        'quantity': [20, 10, 5],
+        'trade_price': [100, 50, 40]
+    })
+    portfolio.buy(Order(order_data_buy))
+
+    prices = np.array([999.0, np.nan, 120.0], dtype=np.float32)
+    price_codes = {'C': 0, 'B': 1, 'A': 2}
+    asset_val = portfolio.get_asset_value(pd.Timestamp('2023-01-02'), None, prices=prices, price_codes=price_codes)
+    assert asset_val == 20 * 120 + 10 * 50 + 5 * 40
+    total_val = portfolio.total_value(pd.Timestamp('2023-01-02'), None, prices=prices, price_codes=price_codes)
+    assert total_val == portfolio.cash + asset_val
+
+
+def test_asset_dtypes():
+    """测试持仓股数以 int64 存储，float32 价格估值结果与 float64 一致"""
+    portfolio = Portfolio(initial_cash=10000)
+    assert portfolio.asset['quantity'].dtype == 'int64'
+    order_data_buy = pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01')],
+        'asset': ['A'],
+        'side': ['BUY'],
+        'quantity': [30],
+        'trade_price': [100.25]
+    })
+    portfolio.buy(Order(order_data_buy))
+    assert portfolio.asset['quantity'].dtype == 'int64'
+
+    prices = pd.Series({'A': 120.5}, dtype='float32')
+    assert portfolio.get_asset_value(pd.Timestamp('2023-01-02'), None, prices=prices) == 30 * 120.5
+
+
+def test_snapshot_last_prices():
+    """测试一次性取出所有持仓的最新价格，与逐个调用 get_asset_last_price 一致"""
+    portfolio = Portfolio(initial_cash=10000)
+    assert portfolio.snapshot_last_prices().empty
+    order_data_buy = pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01')] * 2,
+        'asset': ['A', 'B'],
+        'side': ['BUY', 'BUY'],
+        'quantity': [20, 10],
+        'trade_price': [100, 50]
+    })
+    portfolio.buy(Order(order_data_buy))
+
+    last_prices = portfolio.snapshot_last_prices()
+    assert last_prices.to_dict() == {asset: portfolio.get_asset_last_price(asset) for asset in ['A', 'B']}
+    assert pd.Series(['B', 'A', 'C']).map(last_prices).tolist()[:2] == [50.0, 100.0]
+
+
+def test_trade_log_and_asset_materialized_on_read():
+    """测试交易日志逐笔缓存、读取时才合并；持仓变动后 asset 快照随之更新"""
+    portfolio = Portfolio(initial_cash=100000)
+    for day, price in enumerate([100, 110, 120], start=1):
+        portfolio.buy(Order(pd.DataFrame({
+            'date': [pd.Timestamp(f'2023-01-0{day}')],
+            'asset': ['A'],
+            'side': ['BUY'],
+            'quantity': [10],
+            'trade_price': [price]
+        })))
+    assert len(portfolio._trade_log_buffer) == 3
+    assert portfolio.trade_log['trade_price'].tolist() == [100, 110, 120]
+    assert portfolio._trade_log_buffer == []
+
+    snapshot = portfolio.asset
+    assert portfolio.asset is snapshot
+    assert snapshot.iloc[0]['quantity'] == 30
+    assert snapshot.iloc[0]['cost_price'] == pytest.approx(110)
+
+    portfolio.sell(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-04')],
+        'asset': ['A'],
+        'side': ['SELL'],
+        'quantity': [10],
+        'trade_price': [130]
+    })))
+    assert portfolio.asset is not snapshot
+    assert portfolio.asset.iloc[0]['quantity'] == 20
+    assert portfolio.asset.iloc[0]['current_price'] == 130
+    assert portfolio.trade_log['trade_qty'].tolist() == [10, 10, 10, -10]
+
+
+def test_asset_setter():
+    """测试整体替换持仓，缺少 current_price 时以成本价代替"""
+    portfolio = Portfolio(initial_cash=10000)
+    portfolio.asset = pd.DataFrame([{'asset': 'A', 'quantity': 100, 'cost_price': 50}])
+    assert list(portfolio.asset.columns) == Portfolio.ASSET_COLUMNS
+    assert portfolio.asset['quantity'].dtype == 'int64'
+    assert portfolio.get_asset_last_price('A') == 50
+    with pytest.raises(ValueError):
+        portfolio.get_asset_last_price('B')
+
+
+def test_position_slots_reused_after_close():
+    """测试清仓后重新买入追加到末尾、持仓数超过初始容量时扩容且顺序不变"""
+    portfolio = Portfolio(initial_cash=1e8)
+    assets = [f'S{i:02d}' for i in range(20)]
+    portfolio.buy(Order(pd.DataFrame({
+        'date': pd.Timestamp('2023-01-01'),
+        'asset': assets,
+        'side': 'BUY',
+        'quantity': 100,
+        'trade_price': 10.0
+    })))
+    portfolio.sell(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-02')] * 2,
+        'asset': ['S00', 'S05'],
+        'side': ['SELL'] * 2,
+        'quantity': [100, 100],
+        'trade_price': [11.0, 11.0]
+    })))
+    portfolio.buy(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-03')],
+        'asset': ['S00'],
+        'side': ['BUY'],
+        'quantity': [200],
+        'trade_price': [12.0]
+    })))
+    expected = [a for a in assets if a not in ('S00', 'S05')] + ['S00']
+    assert portfolio.asset['asset'].tolist() == expected
+    assert portfolio.asset.iloc[-1]['quantity'] == 200
+    assert portfolio.snapshot_last_prices().index.tolist() == expected
+    prices = pd.Series(1.0, index=assets)
+    assert portfolio.get_asset_value(pd.Timestamp('2023-01-03'), None, prices=prices) == 18 * 100 + 200
+
+
+def test_buy_existing_and_new_asset_when_slots_compacted():
+    """测试槽位用尽时同一订单中先加仓已有标的再买入新标的，整理槽位后加仓仍记到原标的上"""
+    portfolio = Portfolio(initial_cash=1e9)
+    assets = [f'S{i}' for i in range(8)]
+    portfolio.buy(Order(pd.DataFrame({
+        'date': pd.Timestamp('2023-01-01'),
+        'asset': assets,
+        'side': 'BUY',
+        'quantity': 100,
+        'trade_price': 1.0
+    })))
+    portfolio.sell(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-02')],
+        'asset': ['S0'],
+        'side': ['SELL'],
+        'quantity': [100],
+        'trade_price': [1.0]
+    })))
+    portfolio.buy(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-03')] * 2,
+        'asset': ['S7', 'X'],
+        'side': ['BUY'] * 2,
+        'quantity': [100, 100],
+        'trade_price': [2.0, 3.0]
+    })))
+    asset = portfolio.asset.set_index('asset')
+    assert asset.index.tolist() == assets[1:] + ['X']
+    assert asset.loc['S7', 'quantity'] == 200
+    assert asset.loc['S7', 'cost_price'] == pytest.approx(1.5)
+    assert asset.loc['X', 'quantity'] == 100
+    assert asset.loc['X', 'cost_price'] == pytest.approx(3.0)
+
+
+def test_get_asset_value_with_symbol_bars():
+    """测试行情快照按 symbol 取价，快照中缺失的标的使用 current_price"""
+    portfolio = Portfolio(initial_cash=100000)
+    portfolio.buy(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-01')] * 2,
+        'asset': ['A', 'B'],
+        'side': ['BUY'] * 2,
+        'quantity': [10, 20],
+        'trade_price': [100, 50]
+    })))
+    bars = pd.DataFrame(
+        {'close': [120.0, 7.0]},
+        index=pd.MultiIndex.from_tuples([(pd.Timestamp('2023-01-02'), 'A'), (pd.Timestamp('2023-01-02'), 'C')],
+                                        names=['trade_date', 'symbol']))
+    assert portfolio.get_asset_value(pd.Timestamp('2023-01-02'), None, bars=bars) == 10 * 120 + 20 * 50
+
+
+def test_get_asset_quantities():
+    """测试批量查询持仓数量，未持有或已清仓的标的为 0"""
+    portfolio = Portfolio(initial_cash=100000)
+    assert portfolio.get_asset_quantities(['A']).tolist() == [0]
+    portfolio.asset = pd.DataFrame([{'asset': 'A', 'quantity': 100, 'cost_price': 10.0},
+                                    {'asset': 'B', 'quantity': 200, 'cost_price': 20.0}])
+    portfolio.sell(Order(pd.DataFrame({
+        'date': [pd.Timestamp('2023-01-02')],
+        'asset': ['A'],
+        'side': ['SELL'],
+        'quantity': [100],
+        'trade_price': [11.0]
+    })))
+    assert portfolio.get_asset_quantities(pd.Index(['B', 'C', 'A'])).tolist() == [200, 0, 0]
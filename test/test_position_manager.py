@@ -1,10 +1,12 @@
 import pytest
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
 # 导入待测试的类和方法
 from core.strategy import Signal
 from core.portfolio import Portfolio
+from core.broker import Order
 from core.position_manager import EqualWeightPositionManager, get_min_lot
 from core.datahub import Datahub
 
@@ -236,4 +238,115 @@ def test_multiple_buy_signals(portfolio_buy, current_time, datahub):
     # 校验 '000002.SH' 订单
     order_000002 = orders_df[orders_df["asset"] == "000002.SH"].iloc[0]
     raw_qty_000002 = allocated_cash / 20        # 500000/20 = 25000
-    assert order_000002["quantity"] == 25000
\ No newline at end of file
+    assert order_000002["quantity"] == 25000
+
+
+def test_buy_order_with_bars_snapshot(portfolio_buy, current_time):
+    """
+    测试通过 bars 传入当日行情快照时，直接使用快照中的价格，不再查询 data
+    """
+    index_tuples = [(current_time, "000002.SH")]
+    index_names = ["trade_date", "symbol"]
+    signal = create_signal({"close": [20], "signal": ["BUY"]}, index_tuples, index_names, current_time)
+    bars = pd.DataFrame(
+        [{"trade_date": current_time, "symbol": "000002.SH", "close": 20}]
+    ).set_index(["trade_date", "symbol"])
+
+    manager = EqualWeightPositionManager()
+    orders_df = manager.transform_signals_to_orders(
+        signals=signal,
+        portfolio=portfolio_buy,
+        data=None,
+        current_time=current_time,
+        bars=bars,
+    ).get()
+
+    assert len(orders_df) == 1
+    assert orders_df.iloc[0]["quantity"] == 50000
+
+
+def test_get_min_lots_matches_get_min_lot():
+    """批量最小手数与逐个调用 get_min_lot 一致"""
+    from core.position_manager import get_min_lots
+    assets = pd.Index(["688001", "688001.SH", "000002.SH", "123456"])
+    assert get_min_lots(assets).tolist() == [get_min_lot(asset) for asset in assets]
+    assert get_min_lots(["688002", "600000"]).tolist() == [200, 100]
+    assert get_min_lots([]).tolist() == []
+
+
+def test_mixed_signals_orders(current_time):
+    """
+    测试同时存在卖出与买入信号：卖出订单在前，未持有的卖出信号与不足一手的买入信号被忽略
+    """
+    portfolio = Portfolio(initial_cash=10000)
+    portfolio.asset = pd.DataFrame([{"asset": "A", "quantity": 300, "cost_price": 10.0}])
+    index_tuples = [(current_time, s) for s in ["A", "B", "C", "D"]]
+    signal = create_signal({"close": [11.0, 12.0, 40.0, 80.0], "signal": ["sell", "SELL", "BUY", "BUY"]}, index_tuples,
+                           ["trade_date", "symbol"], current_time)
+    bars = pd.DataFrame(
+        {"close": [11.0, 12.0, 40.0, 80.0]},
+        index=pd.MultiIndex.from_tuples(index_tuples, names=["trade_date", "symbol"]),
+    )
+
+    orders_df = EqualWeightPositionManager().transform_signals_to_orders(
+        signals=signal, portfolio=portfolio, data=None, current_time=current_time, bars=bars,
+    ).get()
+
+    assert orders_df["asset"].tolist() == ["A", "C"]
+    assert orders_df["side"].tolist() == ["SELL", "BUY"]
+    assert orders_df["quantity"].tolist() == [300, 100]
+    assert orders_df["trade_price"].tolist() == [11.0, 40.0]
+    assert (orders_df["date"] == current_time).all()
+    assert orders_df["side_code"].tolist() == Order.encode_sides(orders_df["side"]).tolist()
+    assert orders_df["quantity"].dtype == np.int64
+
+
+def test_buy_order_with_float32_prices(current_time):
+    """
+    测试 float32 行情下买入金额不超过分配的现金，订单可以直接成交
+    """
+    portfolio = Portfolio(initial_cash=1e6)
+    index_tuples = [(current_time, "000002.SH")]
+    signal = create_signal({"close": [3333.3335], "signal": ["BUY"]}, index_tuples,
+                           ["trade_date", "symbol"], current_time)
+    bars = pd.DataFrame(
+        {"close": np.array([3333.3335], dtype=np.float32)},
+        index=pd.MultiIndex.from_tuples(index_tuples, names=["trade_date", "symbol"]),
+    )
+
+    order = EqualWeightPositionManager().transform_signals_to_orders(
+        signals=signal, portfolio=portfolio, data=None, current_time=current_time, bars=bars,
+    )
+    orders_df = order.get()
+    assert orders_df["quantity"].tolist() == [200]
+    assert (orders_df["quantity"] * orders_df["trade_price"]).sum() <= 1e6
+    portfolio.buy(order)
+    assert portfolio.cash >= 0
+
+
+def test_min_lot_map_cached(portfolio_buy, current_time):
+    """最小手数按标的缓存，重复出现的标的不再重新判断"""
+    manager = EqualWeightPositionManager()
+    index_tuples = [(current_time, "688001"), (current_time, "000002.SH")]
+    signal = create_signal({"close": [50, 20], "signal": ["BUY", "BUY"]}, index_tuples,
+                           ["trade_date", "symbol"], current_time)
+    bars = pd.DataFrame(
+        {"close": [50, 20]}, index=pd.MultiIndex.from_tuples(index_tuples, names=["trade_date", "symbol"]))
+    orders_df = manager.transform_signals_to_orders(
+        signals=signal, portfolio=portfolio_buy, data=None, current_time=current_time, bars=bars).get()
+    assert manager._min_lot_map == {"688001": 200, "000002.SH": 100}
+    assert orders_df["quantity"].tolist() == [10000, 25000]
+
+
+def test_close_snapshot(current_time):
+    """收盘价快照只保留当日数据，并保持原列的数值类型"""
+    from core.position_manager import close_snapshot
+    bars = pd.DataFrame(
+        {"close": np.array([1.5, 2.5, 3.5], dtype=np.float32)},
+        index=pd.MultiIndex.from_tuples(
+            [(current_time, "A"), (current_time, "B"), (current_time + pd.Timedelta(days=1), "A")],
+            names=["trade_date", "symbol"]),
+    )
+    snapshot = close_snapshot(bars, current_time)
+    assert snapshot == {"A": 1.5, "B": 2.5}
+    assert snapshot["A"].dtype == np.float32
@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 import pytest
 from datetime import datetime
-from core.strategy import MovingAverageStrategy, Signal
+from core.strategy import MovingAverageStrategy, Signal, date_row_positions
 from core.datahub import Datahub  # 如果你想mock，可以替换成fake类
 
 
@@ -100,11 +100,11 @@ def test_moving_average_strategy():
     # 8) 进一步检查对应日期的行是否只有一行 (因为我们只有一个symbol)
     assert len(df_signal) == 1, "测试示例中只期望1个symbol在该日出现信号"
 
-    # 9) 你可以检查具体值，比如 signal 列生成 'BUY'/'SELL'/'None'
+    # 9) 你可以检查具体值，比如 signal 列生成 'BUY'/'SELL'/缺失（无信号）
     #    这需要根据生成数据和策略参数来判定，下面仅给示例断言
-    possible_signals = {'BUY', 'SELL', None}
+    possible_signals = {'BUY', 'SELL'}
     gen_signal = df_signal['signal'].iloc[0]
-    assert gen_signal in possible_signals, f"信号不在预期范围内: {gen_signal}"
+    assert pd.isna(gen_signal) or gen_signal in possible_signals, f"信号不在预期范围内: {gen_signal}"
 
     # 如果你想更进一步检验数值，可以print出来看
     print(df_signal)
@@ -147,4 +147,151 @@ def test_signal_missing_index():
     current_time = pd.Timestamp('2025-01-10')
     # 预期抛出 ValueError
     with pytest.raises(ValueError, match="缺少必需的索引"):
-        Signal(data, current_time)
\ No newline at end of file
+        Signal(data, current_time)
+
+
+def test_signal_normalized_to_categorical():
+    """signal 列在构造时统一为大写的 Categorical，无法识别的取值记为缺失，不修改传入的 DataFrame"""
+    current_time = pd.Timestamp('2023-01-01')
+    index = pd.MultiIndex.from_tuples([(current_time, s) for s in 'ABCDE'], names=['trade_date', 'symbol'])
+    df = pd.DataFrame({'close': [1.0] * 5, 'signal': ['buy', 'SELL', None, 'hold', 'foo']}, index=index)
+    signal = Signal(df, current_time=current_time)
+
+    assert df['signal'].tolist() == ['buy', 'SELL', None, 'hold', 'foo']
+    assert list(signal.get()['signal'].cat.categories) == Signal.SIGNAL_CATEGORIES
+    assert signal.signal_codes().tolist() == [Signal.BUY_CODE, Signal.SELL_CODE, -1, Signal.HOLD_CODE, -1]
+
+    # signal 列被替换为字符串后仍能现场编码
+    signal.df['signal'] = ['SELL', 'sell', 'BUY', None, 'HOLD']
+    assert signal.signal_codes().tolist() == [Signal.SELL_CODE, Signal.SELL_CODE, Signal.BUY_CODE, -1,
+                                              Signal.HOLD_CODE]
+
+
+def test_signal_by_side():
+    """按方向分桶的信号保持原有顺序，缺失与其他方向的信号不会混入"""
+    current_time = pd.Timestamp('2023-01-01')
+    index = pd.MultiIndex.from_tuples([(current_time, s) for s in 'ABCDE'], names=['trade_date', 'symbol'])
+    df = pd.DataFrame({'close': [1.0] * 5, 'signal': ['SELL', None, 'buy', 'SELL', 'BUY']}, index=index)
+    signal = Signal(df, current_time=current_time)
+
+    assert signal.side_positions(Signal.SELL_CODE).tolist() == [0, 3]
+    assert signal.side_positions(Signal.BUY_CODE).tolist() == [2, 4]
+    assert signal.side_positions(Signal.HOLD_CODE).tolist() == []
+    assert signal.by_side('buy').index.get_level_values('symbol').tolist() == ['C', 'E']
+
+    # 重新赋值 df 后重新分桶
+    signal.df = signal.df.iloc[::-1]
+    assert signal.side_positions(Signal.SELL_CODE).tolist() == [1, 4]
+
+
+class PanelDatahub(Datahub):
+    """
+    预先加载了多标的 bar_df 的 Datahub，index = (trade_date, symbol)
+    """
+    def __init__(self, bar_df: pd.DataFrame):
+        super().__init__({"bar": {"path": "", "col_mapping": {}}})
+        self.bar_df = bar_df
+
+    def load_bar_data(self):
+        pass
+
+    def load_fundamental_data(self):
+        pass
+
+    def load_info_data(self):
+        pass
+
+
+def test_moving_average_strategy_per_symbol_cached():
+    """均线按标的分别计算，与 pandas 分组滚动一致；全量结果只计算一次，bar_df 重新赋值后重算"""
+    dates = pd.date_range('2025-01-01', periods=12, freq='D')
+    idx = pd.MultiIndex.from_product([dates, ['A', 'B']], names=['trade_date', 'symbol'])
+    close = np.column_stack([np.linspace(100, 80, 12), np.linspace(10, 20, 12)]).ravel()
+    hub = PanelDatahub(pd.DataFrame({'close': close}, index=idx))
+    strategy = MovingAverageStrategy(hub=hub, indicator='close', ma_buy=5, ma_sell=3, buy_bias=-0.03,
+                                     sell_bias=0.03)
+
+    current_time = dates[-1]
+    df_signal = strategy.generate_signals(current_time=current_time).get()
+    expected_ma = hub.bar_df['close'].groupby(level='symbol').transform(lambda s: s.rolling(5).mean())
+    np.testing.assert_allclose(df_signal['buy_ma'].to_numpy(), expected_ma.loc[current_time].to_numpy())
+    assert df_signal['signal'].tolist() == ['BUY', 'SELL']
+    # 计算过程不改动行情数据
+    assert list(hub.bar_df.columns) == ['close']
+
+    cached = strategy._signal_df
+    strategy.generate_signals(current_time=dates[-2])
+    assert strategy._signal_df is cached
+    hub.bar_df = hub.bar_df.copy()
+    strategy.generate_signals(current_time=current_time)
+    assert strategy._signal_df is not cached
+
+
+def test_date_row_positions():
+    """日期分桶：连续的行用切片表示，不连续的行用位置数组，均保持原有顺序"""
+    d1, d2 = pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02')
+    idx = pd.MultiIndex.from_tuples([(d1, 'A'), (d1, 'B'), (d2, 'A'), (d1, 'C'), (d2, 'B')],
+                                    names=['trade_date', 'symbol'])
+    date_rows = date_row_positions(pd.DataFrame({'close': range(5)}, index=idx))
+    assert date_rows[d1].tolist() == [0, 1, 3]
+    assert date_rows[d2].tolist() == [2, 4]
+
+    sorted_rows = date_row_positions(pd.DataFrame({'close': range(5)}, index=idx[[0, 1, 3, 2, 4]]))
+    assert sorted_rows == {d1: slice(0, 3), d2: slice(3, 5)}
+
+
+def test_signal_validation_and_from_validated():
+    """未来数据按最大日期告警；已规范的 signal 列直接引用；from_validated 跳过校验"""
+    current_time = pd.Timestamp('2023-01-01')
+    index = pd.MultiIndex.from_tuples([(current_time, 'A'), (current_time + pd.Timedelta(days=1), 'B')],
+                                      names=['trade_date', 'symbol'])
+    df = pd.DataFrame({'close': [1.0, 2.0], 'signal': ['BUY', 'SELL']}, index=index)
+    with pytest.warns(UserWarning, match="未来数据"):
+        signal = Signal(df, current_time=current_time)
+
+    normalized = signal.get()
+    assert Signal(normalized.iloc[:1], current_time=current_time).get() is not normalized
+    same = normalized.iloc[:1]
+    assert Signal(same, current_time=current_time).get() is same
+
+    wrapped = Signal.from_validated(df)
+    assert wrapped.signal_codes().tolist() == [Signal.BUY_CODE, Signal.SELL_CODE]
+    with pytest.raises(ValueError, match="缺少必需的列"):
+        Signal.validate_schema(df[['close']])
+
+
+def test_moving_average_strategy_unsorted_bars():
+    """bar_df 未按日期排序时全量信号按日期稳定排序一次，每个交易日都是连续切片"""
+    dates = pd.date_range('2025-01-01', periods=6, freq='D')
+    idx = pd.MultiIndex.from_product([['A', 'B'], dates], names=['symbol', 'trade_date'])
+    hub = PanelDatahub(pd.DataFrame({'close': np.arange(12, dtype=float) + 1}, index=idx))
+    strategy = MovingAverageStrategy(hub=hub, ma_buy=3, ma_sell=2, buy_bias=-0.5, sell_bias=0.5)
+
+    panel = strategy.generate_signals_bulk()
+    assert panel.index.get_level_values('trade_date').is_monotonic_increasing
+    assert all(isinstance(rows, slice) for rows in strategy._signal_date_rows.values())
+    df_signal = strategy.generate_signals(current_time=dates[-1]).get()
+    assert df_signal.index.get_level_values('symbol').tolist() == ['A', 'B']
+    np.testing.assert_allclose(df_signal['buy_ma'].to_numpy(), [5.0, 11.0])
+
+
+def test_build_soa_segments_by_symbol():
+    """按标的分段：段内按日期排序，各段长度可不同，重复行保留"""
+    dates = pd.to_datetime(['2024-01-02', '2024-01-01', '2024-01-01', '2024-01-03', '2024-01-01'])
+    index = pd.MultiIndex.from_arrays([dates, ['A', 'B', 'A', 'A', 'A']], names=['trade_date', 'symbol'])
+    data = pd.DataFrame({'close': [2.0, 5.0, 1.0, 3.0, 1.5]}, index=index)
+    order, offsets = MovingAverageStrategy._build_soa(data)
+    np.testing.assert_array_equal(offsets, [0, 4, 5])
+    np.testing.assert_array_equal(data['close'].to_numpy()[order], [1.0, 1.5, 2.0, 3.0, 5.0])
+
+
+def test_compute_signals_selected_rows():
+    """只输出部分行时，结果与全量计算后取出这些行一致"""
+    dates = pd.date_range('2024-01-01', periods=12, freq='D')
+    index = pd.MultiIndex.from_product([dates, ['A', 'B']], names=['trade_date', 'symbol'])
+    close = np.concatenate([np.linspace(10, 20, 12), np.linspace(30, 15, 12)]).reshape(2, 12).T.ravel()
+    data = pd.DataFrame({'close': close}, index=index)
+    strategy = MovingAverageStrategy(PanelDatahub(data), ma_buy=4, ma_sell=3, buy_bias=-0.03, sell_bias=0.03)
+    rows = np.array([21, 23, 22])
+    pd.testing.assert_frame_equal(strategy._compute_signals(data, rows),
+                                  strategy._compute_signals(data).iloc[rows])
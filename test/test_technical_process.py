@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from utils.technical_process import moving_average, grouped_rolling_mean, ma_bias_signal_kernel
+
+
+def test_moving_average():
+    """累计和计算的移动平均与 pandas rolling 一致，窗口不足时为 NaN"""
+    values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+    expected = pd.Series(values).rolling(3).mean().to_numpy()
+    np.testing.assert_allclose(moving_average(values, 3), expected)
+    assert np.isnan(moving_average(values, 6)).all()
+
+
+def test_grouped_rolling_mean_matches_pandas():
+    """按分组滚动均值与 pandas groupby().rolling().mean() 一致，分组之间互不影响，NaN 不计入"""
+    rng = np.random.default_rng(0)
+    values = rng.normal(100, 10, 60)
+    values[[5, 33]] = np.nan
+    group_ids = np.repeat(np.array([0, 1, 2], dtype=np.int64), [25, 5, 30])
+    result = grouped_rolling_mean(values, group_ids, 4)
+    expected = pd.Series(values).groupby(group_ids).transform(lambda s: s.rolling(4).mean()).to_numpy()
+    np.testing.assert_allclose(result, expected)
+    assert np.array_equal(np.isnan(result), np.isnan(expected))
+
+
+def test_ma_bias_signal_kernel_matches_pandas():
+    """融合内核的均线、偏离与信号与逐步的 pandas 计算一致"""
+    rng = np.random.default_rng(1)
+    values = 100 + np.cumsum(rng.normal(0, 3, 80))
+    group_ids = np.repeat(np.array([0, 1], dtype=np.int64), [50, 30])
+    offsets = np.array([0, 50, 80], dtype=np.int64)
+    buy_ma, sell_ma, buy_bias_val, sell_bias_val, signal = ma_bias_signal_kernel(
+        values, offsets, 10, 4, -0.03, 0.03)
+
+    grouped = pd.Series(values).groupby(group_ids)
+    expected_buy_ma = grouped.transform(lambda s: s.rolling(10).mean()).to_numpy()
+    expected_sell_ma = grouped.transform(lambda s: s.rolling(4).mean()).to_numpy()
+    np.testing.assert_allclose(buy_ma, expected_buy_ma)
+    np.testing.assert_allclose(sell_ma, expected_sell_ma)
+    expected_bb = (values - expected_buy_ma) / expected_buy_ma
+    expected_sb = (values - expected_sell_ma) / expected_sell_ma
+    np.testing.assert_allclose(buy_bias_val, expected_bb)
+    np.testing.assert_allclose(sell_bias_val, expected_sb)
+    expected_signal = np.where(expected_sb > 0.03, 1, np.where(expected_bb < -0.03, 0, -1))
+    np.testing.assert_array_equal(signal, expected_signal)
+    assert signal.dtype == np.int8
+    assert {0, 1, -1} <= set(signal.tolist())
+
+
+def test_ma_bias_signal_kernel_shared_window():
+    """长短窗口相同时共用一个窗口，结果与分别计算一致"""
+    values = np.array([10.0, 11.0, np.nan, 13.0, 9.0, 8.0, 12.0, 15.0])
+    group_ids = np.zeros(len(values), dtype=np.int64)
+    offsets = np.array([0, len(values)], dtype=np.int64)
+    buy_ma, sell_ma, buy_bias_val, sell_bias_val, _ = ma_bias_signal_kernel(values, offsets, 3, 3, -0.1, 0.1)
+    expected = grouped_rolling_mean(values, group_ids, 3)
+    np.testing.assert_array_equal(buy_ma, expected)
+    np.testing.assert_array_equal(sell_ma, expected)
+    np.testing.assert_array_equal(sell_bias_val, buy_bias_val)
+
+
+def test_ma_bias_signal_kernel_float32():
+    """float32 输入按 float32 输出，内部以 float64 累计，结果与 float64 计算一致"""
+    rng = np.random.default_rng(2)
+    values = np.round(100 + np.cumsum(rng.normal(0, 3, 200)), 2)
+    offsets = np.array([0, 120, 200], dtype=np.int64)
+    expected = ma_bias_signal_kernel(values, offsets, 30, 10, -0.05, 0.05)
+    result = ma_bias_signal_kernel(values.astype(np.float32), offsets, 30, 10, -0.05, 0.05)
+    for res, exp in zip(result[:4], expected[:4]):
+        assert res.dtype == np.float32
+        np.testing.assert_allclose(res, exp, rtol=1e-5, atol=1e-6)
+    np.testing.assert_array_equal(result[4], expected[4])
@@ -1,3 +1,4 @@
+import logging
 import pandas as pd
 import pytest
 from core.timeline import Timeline
@@ -11,7 +12,7 @@ def test_empty_bar_df():
         tl.get_main_timeline()
 
 
-def test_main_timeline_union(capsys):
+def test_main_timeline_union(caplog):
     # 构造测试数据：
     # symbol 'A' 有两个日期，symbol 'B' 只有一个日期
     dates_A = pd.to_datetime(['2020-01-01', '2020-01-02'])
@@ -30,10 +31,11 @@ def test_main_timeline_union(capsys):
 
     # 初始化 Timeline，使用默认的 'union' 策略
     tl = Timeline(df)
-    main_timeline = tl.get_main_timeline()
+    with caplog.at_level(logging.INFO, logger="core.timeline"):
+        main_timeline = tl.get_main_timeline()
 
-    # 立即捕获 get_main_timeline() 的打印输出
-    captured = capsys.readouterr().out
+    # 捕获 get_main_timeline() 的日志输出
+    captured = caplog.text
     assert "symbol 'B'" in captured, f"捕获输出中没有 'symbol 'B''，捕获内容为：{captured}"
     assert "2020-01-02" in captured, f"捕获输出中没有 '2020-01-02'，捕获内容为：{captured}"
 
@@ -57,4 +59,50 @@ def test_timeseries_iterator():
     # 从迭代器中获取所有日期
     iterated_dates = list(tl.timeseries_iterator())
     expected_dates = list(pd.to_datetime(['2020-01-01', '2020-01-02']))
-    assert iterated_dates == expected_dates, "迭代器返回的日期不符合预期"
\ No newline at end of file
+    assert iterated_dates == expected_dates, "迭代器返回的日期不符合预期"
+
+
+def test_main_timeline_missing_dates_per_symbol(caplog):
+    # symbol 'A' 缺 2020-01-03，'B' 缺 2020-01-01，'C' 完整
+    rows = [('2020-01-01', 'A'), ('2020-01-02', 'A'),
+            ('2020-01-02', 'B'), ('2020-01-03', 'B'),
+            ('2020-01-01', 'C'), ('2020-01-02', 'C'), ('2020-01-03', 'C')]
+    index = pd.MultiIndex.from_tuples([(pd.Timestamp(d), s) for d, s in rows], names=['trade_date', 'symbol'])
+    df = pd.DataFrame({'close': range(len(rows))}, index=index)
+
+    with caplog.at_level(logging.INFO, logger="core.timeline"):
+        Timeline(df).get_main_timeline()
+    lines = caplog.messages
+    assert len(lines) == 2
+    assert "symbol 'A'" in lines[0] and "2020-01-03" in lines[0]
+    assert "symbol 'B'" in lines[1] and "2020-01-01" in lines[1]
+
+
+def test_main_timeline_cached(caplog):
+    # 重复调用直接返回缓存，不再重复检查缺失日期；bar_df 重新赋值后重新计算
+    index = pd.MultiIndex.from_tuples([(pd.Timestamp('2020-01-01'), 'A'), (pd.Timestamp('2020-01-02'), 'A'),
+                                       (pd.Timestamp('2020-01-01'), 'B')], names=['trade_date', 'symbol'])
+    df = pd.DataFrame({'close': [1, 2, 3]}, index=index)
+    tl = Timeline(df)
+    with caplog.at_level(logging.INFO, logger="core.timeline"):
+        first = tl.get_main_timeline()
+        assert "symbol 'B'" in caplog.text
+        caplog.clear()
+
+        assert tl.get_main_timeline() is first
+        assert list(tl.timeseries_iterator()) == list(first)
+        assert caplog.text == ""
+
+    tl.bar_df = df.iloc[:1]
+    assert list(tl.get_main_timeline()) == [pd.Timestamp('2020-01-01')]
+
+
+def test_main_timeline_without_info_logging(caplog):
+    # 未开启 INFO 日志时不做缺失日期检查，主时间轴不受影响
+    index = pd.MultiIndex.from_tuples([(pd.Timestamp('2020-01-01'), 'A'), (pd.Timestamp('2020-01-02'), 'A'),
+                                       (pd.Timestamp('2020-01-01'), 'B')], names=['trade_date', 'symbol'])
+    df = pd.DataFrame({'close': [1, 2, 3]}, index=index)
+    with caplog.at_level(logging.WARNING, logger="core.timeline"):
+        main_timeline = Timeline(df).get_main_timeline()
+    assert caplog.text == ""
+    assert list(main_timeline) == [pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-02')]
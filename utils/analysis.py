@@ -55,10 +55,10 @@ def risk_and_return(
 
         # 计算每日收益率（向量化，首日收益率无法计算则删除）
         daily_returns = series.pct_change().dropna()
-        ann_vol = annual_volatility(daily_returns.to_frame(name='value'))
+        ann_vol = annual_volatility(daily_returns)
 
         # 计算区间最大回撤及对应区间，drawdown返回 (interval_drawdowns_df, (max_dd, (start_date, end_date)))
-        dd_res = drawdown(series.to_frame(name='value'), interval_months)
+        dd_res = drawdown(series, interval_months)
         _, (max_dd, dd_interval) = dd_res
 
         # 计算每日回撤序列：当前值相对于历史最高值的百分比变化
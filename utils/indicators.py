@@ -1,6 +1,7 @@
 import numpy as np
 import pandas as pd
 from core.portfolio import Portfolio
+from core.kernels import max_drawdown
 
 
 def win_rate(
@@ -18,7 +19,6 @@ def win_rate(
     :param portfolio: Portfolio 对象，用于获取最新价格。
     :return: 交易胜率（0-1 之间的小数）。
     """
-    global _rate
     if trade_log.empty:
         return 0.0
 
@@ -44,33 +44,32 @@ def win_rate(
     last_trade_with_position = last_trade[last_trade['cumulative_qty'] > 0]
 
     if not last_trade_with_position.empty:
-        # 获取每个资产的最后价格，计算浮动盈亏
-        last_trade_with_position['last_price'] = last_trade_with_position['asset'].apply(
-            portfolio.get_asset_last_price)
-        last_trade_with_position['floating_profit'] = (
-                (last_trade_with_position['last_price'] - last_trade_with_position['trade_price']) *
-                last_trade_with_position['cumulative_qty']
+        # 一次性取出所有持仓的最新价格，按资产映射后整列计算浮动盈亏
+        last_prices = last_trade_with_position['asset'].map(portfolio.snapshot_last_prices()).to_numpy(dtype=np.float64)
+        floating_profit = (
+                (last_prices - last_trade_with_position['trade_price'].to_numpy(dtype=np.float64)) *
+                last_trade_with_position['cumulative_qty'].to_numpy(dtype=np.float64)
         )
 
         # 统计浮盈的未平仓交易
-        floating_wins = (last_trade_with_position['floating_profit'] > 0).sum()
+        floating_wins = int((floating_profit > 0).sum())
         win_count += floating_wins
         total_count += len(last_trade_with_position)
-        _rate = win_count / total_count if total_count > 0 else 0.0
 
-    return round(_rate, 4)
+    rate = win_count / total_count if total_count > 0 else 0.0
+    return round(rate, 4)
 
 
 def annual_return(
-        start_value: float,
-        end_value: float,
+        start_value: float | np.ndarray,
+        end_value: float | np.ndarray,
         total_days: int,
         df: pd.DataFrame = None,
-) -> float:
+) -> float | np.ndarray:
     """
     计算年化收益率。
-    :param start_value: 起始价值
-    :param end_value: 结束价值
+    :param start_value: 起始价值；传入数组时按元素计算多个标的的年化收益率，返回同形状数组
+    :param end_value: 结束价值，与 start_value 形状一致
     :param total_days: 总天数，根据自然年转换得到复利周期
     :param df: DataFrame，总价值的时间序列，若输入df时，直接自动计算。字段要求，包含
                 index: 日期，按日
@@ -84,12 +83,19 @@ def annual_return(
         start_value = df.iloc[0, 0]
         end_value = df.iloc[-1, 0]
 
+    if np.ndim(start_value) or np.ndim(end_value):
+        start_value = np.asarray(start_value, dtype=np.float64)
+        end_value = np.asarray(end_value, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annualized_return = np.where(start_value > 0, (end_value / start_value) ** (365 / total_days) - 1, 0.0)
+        return np.round(annualized_return, 4)
+
     annualized_return = ((end_value / start_value) ** (365 / total_days)) - 1 if start_value > 0 else 0
     return round(annualized_return, 4)
 
 
 def drawdown(
-        df: pd.DataFrame,
+        df: pd.DataFrame | pd.Series,
         interval_months: int
 ) -> tuple[pd.DataFrame, tuple]:
     """
@@ -98,6 +104,7 @@ def drawdown(
     :param df: DataFrame，字段要求，包含
                 index: 日期，按日
                 value: 字段名不做要求，表示资产价值即可
+               也可以直接传入以日期为索引的资产价值 Series
     :param interval_months: 区间长度，单位为月，默认 3 个月。
     :return: (interval_drawdowns_df, (最大回撤百分比, 对应区间))
              interval_drawdowns_df: DataFrame，MultiIndex为['start_date','end_date']，
@@ -105,41 +112,24 @@ def drawdown(
              (最大回撤百分比, 对应区间): tuple，第一个元素为所有区间中的最大回撤百分比，
              第二个元素为对应区间的 (起始日期, 结束日期)。
     """
-    # 确保按照日期排序
-    df = df.sort_index()
+    # 确保按照日期排序（回测产出的序列通常已有序，仅在无序时排序，避免多余的排序和拷贝）
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
 
-    # 假设资产价值在第一列
-    asset_series = df.iloc[:, 0]
-
-    # 获取数据起始和结束日期
-    start_date = asset_series.index.min()
-    end_date = asset_series.index.max()
+    # DataFrame 时假设资产价值在第一列
+    asset_series = df.iloc[:, 0] if isinstance(df, pd.DataFrame) else df
+    values = asset_series.to_numpy(dtype=np.float64)
+    dates = asset_series.index
 
     intervals = []
-
-    current_start = start_date
-    while current_start <= end_date:
-        # 计算当前区间的结束日期：起始日 + interval_months个月 - 1天
-        current_end = current_start + pd.DateOffset(months=interval_months) - pd.Timedelta(days=1)
-        if current_end > end_date:
-            current_end = end_date
-
-        # 截取当前区间内的数据
-        interval_data = asset_series.loc[current_start:current_end]
-
-        # 计算回撤：先计算累计最大值，再计算回撤百分比
-        if not interval_data.empty:
-            cummax = interval_data.cummax()
-            dd_series = (cummax - interval_data) / cummax
-            max_dd = dd_series.max()
+    for (current_start, current_end), lo, hi in zip(*drawdown_intervals(dates, interval_months)):
+        # 计算回撤：单次遍历维护累计最大值，得到回撤百分比的最大值
+        if hi > lo:
+            max_dd = max_drawdown(values[lo:hi])[0]
         else:
             max_dd = 0  # 如果数据为空，则回撤设为0
-
         intervals.append((current_start, current_end, max_dd))
 
-        # 下一区间的起始日期为当前结束日期的下一天
-        current_start = current_end + pd.Timedelta(days=1)
-
         # 构造DataFrame，使用多重索引 (起始日期, 结束日期)
     interval_drawdowns_df = pd.DataFrame(intervals, columns=['start_date', 'end_date', 'drawdown'])
     interval_drawdowns_df['drawdown'] = interval_drawdowns_df['drawdown'].round(4)
@@ -152,24 +142,63 @@ def drawdown(
     return interval_drawdowns_df, (overall_max_dd, max_row)
 
 
+def drawdown_intervals(
+        dates: pd.DatetimeIndex,
+        interval_months: int
+) -> tuple[list[tuple], np.ndarray, np.ndarray]:
+    """
+    把升序的日期序列按 interval_months 个月切分为连续区间，供 drawdown 等按区间统计的指标共用。
+    :param dates: 升序的日期索引
+    :param interval_months: 区间长度，单位为月
+    :return: (区间列表, 起始位置数组, 结束位置数组)
+             区间列表中每个元素为 (起始日期, 结束日期)；
+             第 k 个区间对应 dates 中 [starts[k], stops[k]) 的行
+    """
+    # 获取数据起始和结束日期
+    start_date = dates.min()
+    end_date = dates.max()
+
+    intervals = []
+    current_start = start_date
+    while current_start <= end_date:
+        # 计算当前区间的结束日期：起始日 + interval_months个月 - 1天
+        current_end = current_start + pd.DateOffset(months=interval_months) - pd.Timedelta(days=1)
+        if current_end > end_date:
+            current_end = end_date
+        intervals.append((current_start, current_end))
+        # 下一区间的起始日期为当前结束日期的下一天
+        current_start = current_end + pd.Timedelta(days=1)
+
+    # 日期有序，按位置二分查找区间边界
+    starts = dates.searchsorted([start for start, _ in intervals], side='left').astype(np.int64)
+    stops = dates.searchsorted([end for _, end in intervals], side='right').astype(np.int64)
+    return intervals, starts, stops
+
+
 def annual_volatility(
-        df: pd.DataFrame
+        df: pd.DataFrame | pd.Series | np.ndarray
 ) -> float:
     """
     计算年化波动率，基于收益率的标准差。
     :param df: DataFrame，字段要求，包含
                 index: 日期，按日
                 value: 字段名不做要求，表示每日回报率即可
+               也可以直接传入以日期为索引的 Series，或已按时间排序的每日回报率数组，省去构造 DataFrame
     :return 浮点数，保留小数点后四位
     """
-    # 确保数据按照日期排序
-    df = df.sort_index()
-
-    # 假设每日回报率在第一列
-    daily_returns = df.iloc[:, 0]
+    if isinstance(df, (pd.DataFrame, pd.Series)):
+        # 确保数据按照日期排序
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        # DataFrame 时假设每日回报率在第一列
+        daily_returns = df.iloc[:, 0] if isinstance(df, pd.DataFrame) else df
+        daily_returns = daily_returns.to_numpy(dtype=np.float64)
+    else:
+        daily_returns = np.asarray(df, dtype=np.float64)
 
-    # 计算每日收益率标准差
-    daily_std = daily_returns.std()
+    # 计算每日收益率标准差（样本标准差，忽略缺失值）
+    daily_returns = daily_returns[~np.isnan(daily_returns)]
+    daily_std = daily_returns.std(ddof=1) if daily_returns.size > 1 else np.nan
 
     # 使用250个交易日将日波动率年化
     annual_vol = daily_std * np.sqrt(250)
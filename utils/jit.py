@@ -0,0 +1,23 @@
+"""
+可选的 numba 加速：安装了 numba 时使用 numba.njit 编译数值内核，
+未安装时 njit 退化为不做任何处理的装饰器、prange 退化为 range，保证纯 Python 环境下也能运行。
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """
+        numba.njit 的占位实现，兼容 @njit 与 @njit(cache=True) 两种写法。
+        """
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from utils.jit import njit, prange
 
 
 def moving_average(arr: np.ndarray, window: int) -> np.ndarray:
@@ -15,6 +16,144 @@ def moving_average(arr: np.ndarray, window: int) -> np.ndarray:
     return np.concatenate((np.full(window - 1, np.nan), ma))
 
 
+@njit(cache=True)
+def _kahan_add(sum_x: float, comp: float, value: float) -> tuple[float, float]:
+    """
+    补偿求和：把 value 加进累计和，返回 (新的累计和, 补偿项)
+    """
+    y = value - comp
+    t = sum_x + y
+    return t, t - sum_x - y
+
+
+@njit(cache=True)
+def grouped_rolling_mean(values: np.ndarray, group_ids: np.ndarray, window: int) -> np.ndarray:
+    """
+    按分组计算滚动均值，单次遍历维护窗口内的累计和与有效观测数（补偿求和，减少累计误差），
+    每个时间步只加入新值、移出窗口外的旧值。
+    与 pandas 的 rolling(window).mean() 一致：窗口内有效值不足 window 个时为 NaN，NaN 不计入。
+    :param values: 指标序列，float64 数组，同一分组的数据连续存放且按时间排序
+    :param group_ids: 每个元素所属的分组编号，int64 数组，分组变化时窗口重新累计
+    :param window: 窗口长度
+    :return: 与 values 等长的滚动均值
+    """
+    n = values.shape[0]
+    result = np.empty(n)
+    group_start = 0
+    sum_x, comp, nobs = 0.0, 0.0, 0
+    for i in range(n):
+        if i > 0 and group_ids[i] != group_ids[i - 1]:
+            group_start = i
+            sum_x, comp, nobs = 0.0, 0.0, 0
+        if not np.isnan(values[i]):
+            sum_x, comp = _kahan_add(sum_x, comp, values[i])
+            nobs += 1
+        if i - window >= group_start and not np.isnan(values[i - window]):
+            sum_x, comp = _kahan_add(sum_x, comp, -values[i - window])
+            nobs -= 1
+        result[i] = sum_x / nobs if nobs >= window else np.nan
+    return result
+
+
+@njit(cache=True, nogil=True)
+def _ma_bias_signal_segment(values: np.ndarray, start: int, stop: int, ma_buy: int, ma_sell: int,
+                            buy_bias: float, sell_bias: float, buy_ma: np.ndarray, sell_ma: np.ndarray,
+                            buy_bias_val: np.ndarray, sell_bias_val: np.ndarray, signal: np.ndarray):
+    """
+    在 values[start:stop] 这一段（单个标的）上计算均线、偏离与信号，结果写入输出数组的同一区间。
+    """
+    buy_sum, buy_comp, buy_nobs = 0.0, 0.0, 0
+    sell_sum, sell_comp, sell_nobs = 0.0, 0.0, 0
+    # 长短窗口相同时两条均线完全一致，只维护一个窗口
+    shared = ma_buy == ma_sell
+    for i in range(start, stop):
+        value = values[i]
+        if not np.isnan(value):
+            buy_sum, buy_comp = _kahan_add(buy_sum, buy_comp, value)
+            buy_nobs += 1
+        if i - ma_buy >= start and not np.isnan(values[i - ma_buy]):
+            buy_sum, buy_comp = _kahan_add(buy_sum, buy_comp, -values[i - ma_buy])
+            buy_nobs -= 1
+        b_ma = buy_sum / buy_nobs if buy_nobs >= ma_buy else np.nan
+        bb = (value - b_ma) / b_ma
+
+        if shared:
+            s_ma = b_ma
+            sb = bb
+        else:
+            if not np.isnan(value):
+                sell_sum, sell_comp = _kahan_add(sell_sum, sell_comp, value)
+                sell_nobs += 1
+            if i - ma_sell >= start and not np.isnan(values[i - ma_sell]):
+                sell_sum, sell_comp = _kahan_add(sell_sum, sell_comp, -values[i - ma_sell])
+                sell_nobs -= 1
+            s_ma = sell_sum / sell_nobs if sell_nobs >= ma_sell else np.nan
+            sb = (value - s_ma) / s_ma
+        buy_ma[i] = b_ma
+        sell_ma[i] = s_ma
+        buy_bias_val[i] = bb
+        sell_bias_val[i] = sb
+        # 无分支地由两个比较结果得到编码：卖出优先，其次买入，否则 -1；
+        # 与 NaN 比较恒为 False，均线尚未形成时不产生信号
+        is_sell = sb > sell_bias
+        is_buy = (bb < buy_bias) & (not is_sell)
+        signal[i] = np.int8(2 * is_sell + is_buy - 1)
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def ma_bias_signal_kernel(values: np.ndarray, offsets: np.ndarray, ma_buy: int, ma_sell: int,
+                          buy_bias: float, sell_bias: float
+                          ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    均线偏离策略的融合内核：单次遍历同时维护长短两个滚动窗口（窗口相同时共用一个），
+    算出两条均线、两个偏离度与信号，不再为每一步中间结果分配整列数组。均线口径同 grouped_rolling_mean。
+    偏离度 = (指标 - 均线) / 均线；向上偏离短周期均线超过 sell_bias 时卖出，否则向下偏离长周期均线
+    低于 buy_bias 时买入。
+    :param values: 指标序列，float64 或 float32 数组，按标的分段连续存放（每段即一个标的的一列），段内按时间排序；
+                   float32 输入时均线与偏离按 float32 输出，但滚动和与偏离比较仍以 float64 计算
+    :param offsets: 各段的起止位置，int64 数组，第 k 段为 values[offsets[k]:offsets[k + 1]]
+    :param ma_buy: 买入参考的长周期均线窗口
+    :param ma_sell: 卖出参考的短周期均线窗口
+    :param buy_bias: 买入偏离阈值
+    :param sell_bias: 卖出偏离阈值
+    :return: (buy_ma, sell_ma, buy_bias_val, sell_bias_val, signal)；signal 为 int8，
+             0 买入、1 卖出、-1 无信号，与 core.strategy.Signal 的编码一致
+    """
+    # 各标的分段互不依赖、写入的输出区间也不重叠，按标的并行计算
+    n = values.shape[0]
+    buy_ma = np.empty(n, dtype=values.dtype)
+    sell_ma = np.empty(n, dtype=values.dtype)
+    buy_bias_val = np.empty(n, dtype=values.dtype)
+    sell_bias_val = np.empty(n, dtype=values.dtype)
+    signal = np.empty(n, dtype=np.int8)
+    for k in prange(offsets.shape[0] - 1):
+        _ma_bias_signal_segment(values, offsets[k], offsets[k + 1], ma_buy, ma_sell, buy_bias, sell_bias,
+                                buy_ma, sell_ma, buy_bias_val, sell_bias_val, signal)
+    return buy_ma, sell_ma, buy_bias_val, sell_bias_val, signal
+
+
+# 保留 JIT 版本的引用；存在 AOT 编译的 core.core_kernels 时按输入精度改用其中的导出版本
+_ma_bias_signal_kernel_jit = ma_bias_signal_kernel
+try:
+    from core.core_kernels import ma_bias_signal_kernel_f4, ma_bias_signal_kernel_f8
+except ImportError:
+    pass
+else:
+    def ma_bias_signal_kernel(values: np.ndarray, offsets: np.ndarray, ma_buy: int, ma_sell: int,
+                              buy_bias: float, sell_bias: float
+                              ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        同 _ma_bias_signal_kernel_jit，float32 / float64 输入调用 AOT 导出版本，其他精度回退到 JIT 版本。
+        """
+        if values.dtype == np.float32:
+            kernel = ma_bias_signal_kernel_f4
+        elif values.dtype == np.float64:
+            kernel = ma_bias_signal_kernel_f8
+        else:
+            kernel = _ma_bias_signal_kernel_jit
+        return kernel(values, offsets, ma_buy, ma_sell, buy_bias, sell_bias)
+
+
 def calculate_moving_average_bias(
         df: pd.DataFrame,
         mas: list[int],